@@ -0,0 +1,125 @@
+# backend/benchmarks/locustfile.py
+"""
+HTTP load profile for a running server seeded with `manage.py seed_synthetic`.
+
+    pip install -r benchmarks/requirements.txt
+    locust -f benchmarks/locustfile.py --host http://localhost:8000 \
+        --headless -u 50 -r 10 -t 2m --csv bench
+
+Locust reports p50/p95/p99 and requests/s per endpoint (and writes them to
+bench_stats.csv with --csv). Webhooks are only signed correctly when
+PAYSTACK_SECRET_KEY here matches the server's.
+"""
+import hashlib
+import hmac
+import json
+import os
+import random
+import uuid
+
+from locust import HttpUser, between, task
+
+EMAIL_DOMAIN = "bench.example"
+PASSWORD = os.environ.get("BENCH_PASSWORD", "bench-password")
+SEED = int(os.environ.get("BENCH_SEED", "42"))
+TENANTS = int(os.environ.get("BENCH_TENANTS", "40"))  # 40 x --scale
+PAYSTACK_SECRET_KEY = os.environ.get("PAYSTACK_SECRET_KEY", "")
+
+AREAS = ["Lekki", "Ikoyi", "Yaba", "Surulere", "Ikeja", "Ajah", "Victoria Island", "Gbagada"]
+KINDS = ["apartment", "duplex", "studio", "bungalow", "terrace", "penthouse"]
+
+# Wallet uids of tenants logged in so far, used as transfer recipients
+WALLETS = set()
+
+
+def login(client, email):
+    resp = client.post("/api/users/auth/token/", json={"email": email, "password": PASSWORD}, name="auth/token")
+    resp.raise_for_status()
+    return {"Authorization": f"Bearer {resp.json()['access']}"}
+
+
+class TenantUser(HttpUser):
+    """Browses listings, sends wallet transfers."""
+
+    weight = 8
+    wait_time = between(0.5, 2)
+
+    def on_start(self):
+        self.headers = login(self.client, f"tenant.{SEED}.{random.randrange(TENANTS)}@{EMAIL_DOMAIN}")
+        wallets = self.client.get("/api/wallet/wallets/", headers=self.headers, name="wallets").json()
+        results = wallets.get("results", wallets) if isinstance(wallets, dict) else wallets
+        self.wallet_uid = results[0]["uid"] if results else None
+        if self.wallet_uid:
+            WALLETS.add(self.wallet_uid)
+
+    @task(6)
+    def search_listings(self):
+        params = {"q": f"{random.choice(KINDS)} {random.choice(AREAS)}"}
+        self.client.get("/api/properties/listings/", params=params, headers=self.headers, name="listings?q")
+
+    @task(3)
+    def nearby_listings(self):
+        params = {
+            "lat": f"{random.uniform(6.40, 6.70):.5f}",
+            "lng": f"{random.uniform(3.20, 3.60):.5f}",
+            "radius": random.choice(["2", "5", "10"]),
+        }
+        self.client.get("/api/properties/listings/", params=params, headers=self.headers, name="listings?lat&lng")
+
+    @task(1)
+    def transfer(self):
+        recipients = sorted(WALLETS - {self.wallet_uid})
+        if not self.wallet_uid or not recipients:
+            return
+        self.client.post(
+            "/api/wallet/wallets/transfer/",
+            json={"recipient": random.choice(recipients), "amount": f"{random.randint(1, 500)}.00"},
+            headers=self.headers,
+            name="wallet transfer",
+        )
+
+
+class StaffUser(HttpUser):
+    """Pulls the collection reports."""
+
+    weight = 1
+    wait_time = between(2, 5)
+
+    def on_start(self):
+        self.headers = login(self.client, f"staff.{SEED}@{EMAIL_DOMAIN}")
+
+    @task
+    def collection_summary(self):
+        self.client.get("/api/rents/reports/collection-summary/", headers=self.headers, name="rents collection-summary")
+
+    @task
+    def payments_summary(self):
+        self.client.get("/api/payments/reports/summary/", headers=self.headers, name="payments summary")
+
+
+class PaystackWebhooks(HttpUser):
+    """Signed charge.success deliveries, as Paystack would send them."""
+
+    weight = 2
+    wait_time = between(0.2, 1)
+
+    @task
+    def charge_success(self):
+        body = json.dumps({
+            "event": "charge.success",
+            "data": {
+                "id": uuid.uuid4().int >> 80,
+                "reference": f"BENCH-WH-{uuid.uuid4().hex[:16].upper()}",
+                "amount": random.randrange(100_000, 50_000_000, 100),
+                "currency": "NGN",
+                "status": "success",
+                "channel": "card",
+            },
+        }).encode()
+        signature = hmac.new(PAYSTACK_SECRET_KEY.encode(), body, hashlib.sha512).hexdigest()
+        self.client.post(
+            "/api/payments/webhooks/paystack/",
+            data=body,
+            headers={"Content-Type": "application/json", "x-paystack-signature": signature},
+            name="paystack webhook",
+        )
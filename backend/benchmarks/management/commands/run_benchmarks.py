@@ -0,0 +1,94 @@
+# backend/benchmarks/management/commands/run_benchmarks.py
+import json
+import platform
+import subprocess
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from benchmarks import scenarios
+from config.celery import app as celery_app
+
+COMPARED = ("p50_ms", "p95_ms", "p99_ms", "throughput_rps", "queries_mean")
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return None
+
+
+class Command(BaseCommand):
+    help = "Run the in-process benchmark scenarios against the synthetic dataset and report latency percentiles."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "scenarios", nargs="*", default=list(scenarios.SCENARIOS),
+            help=f"Scenarios to run (default: all of {', '.join(scenarios.SCENARIOS)})",
+        )
+        parser.add_argument("--iterations", type=int, default=200)
+        parser.add_argument("--warmup", type=int, default=10)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--output", help="Write results as JSON to this path")
+        parser.add_argument("--compare", help="Earlier --output file to print deltas against")
+
+    def handle(self, *args, **options):
+        unknown = set(options["scenarios"]) - set(scenarios.SCENARIOS)
+        if unknown:
+            raise CommandError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+        baseline = None
+        if options["compare"]:
+            with open(options["compare"]) as f:
+                baseline = {r["scenario"]: r for r in json.load(f)["results"]}
+
+        # Tasks queued by the views (webhook processing, notifications) run inline,
+        # so their cost is part of the measurement and no broker is needed
+        celery_app.conf.task_always_eager = True
+        overrides = {
+            "ALLOWED_HOSTS": ["*"],
+            "QUERY_BUDGET_ENFORCE": False,
+            "PAYSTACK_SECRET_KEY": settings.PAYSTACK_SECRET_KEY or scenarios.BENCH_WEBHOOK_SECRET,
+        }
+        results = []
+        with override_settings(**overrides):
+            for scenario in scenarios.build(options["scenarios"], options["seed"]):
+                self.stdout.write(f"{scenario.name}: {scenario.description}")
+                try:
+                    result = scenarios.run(scenario, options["iterations"], options["warmup"])
+                except RuntimeError as e:
+                    raise CommandError(str(e))
+                results.append(result)
+                self.stdout.write(self._format(result, baseline))
+
+        if options["output"]:
+            report = {
+                "revision": git_revision(),
+                "ran_at": timezone.now().isoformat(),
+                "python": platform.python_version(),
+                "iterations": options["iterations"],
+                "warmup": options["warmup"],
+                "seed": options["seed"],
+                "results": results,
+            }
+            with open(options["output"], "w") as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Wrote {options['output']}")
+
+    def _format(self, result, baseline):
+        line = (
+            f"  p50 {result['p50_ms']}ms  p95 {result['p95_ms']}ms  p99 {result['p99_ms']}ms  "
+            f"{result['throughput_rps']} req/s  {result['queries_mean']} queries/req  "
+            f"{result['errors']}/{result['requests']} errors"
+        )
+        previous = (baseline or {}).get(result["scenario"])
+        if previous:
+            deltas = []
+            for key in COMPARED:
+                if previous.get(key):
+                    change = (result[key] - previous[key]) / previous[key] * 100
+                    deltas.append(f"{key} {change:+.1f}%")
+            line += "\n  vs baseline: " + ", ".join(deltas)
+        return line
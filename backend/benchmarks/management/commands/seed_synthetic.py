@@ -0,0 +1,25 @@
+# backend/benchmarks/management/commands/seed_synthetic.py
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks import synthetic
+
+
+class Command(BaseCommand):
+    help = "Generate a deterministic synthetic dataset (users, properties, listings, rents, wallets) for benchmarks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", type=int, default=1, help="Multiplier on the base dataset size")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--reset", action="store_true", help="Delete existing synthetic data first")
+        parser.add_argument("--force", action="store_true", help="Allow running with DEBUG off")
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options["force"]:
+            raise CommandError("Refusing to seed synthetic data with DEBUG off; pass --force if you mean it.")
+        if options["reset"]:
+            self.stdout.write(f"Deleted {synthetic.reset()} synthetic rows")
+
+        self.stdout.write(f"Seeding scale={options['scale']} seed={options['seed']}")
+        counts = synthetic.SyntheticDataset(options["scale"], options["seed"], stdout=self.stdout).generate()
+        self.stdout.write(self.style.SUCCESS(f"Created {sum(counts.values())} rows"))
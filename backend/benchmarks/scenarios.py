@@ -0,0 +1,195 @@
+# backend/benchmarks/scenarios.py
+"""
+In-process benchmark scenarios.
+
+Each scenario drives the real URL conf, middleware and views through
+django.test.Client against the synthetic dataset (see benchmarks.synthetic),
+authenticated with a SimpleJWT access token like the mobile/web clients.
+run() times every request and counts its SQL queries (config.profiling.Sample),
+and summarize() turns the timings into p50/p95/p99, mean and throughput.
+
+Results are plain dicts, written as JSON by the run_benchmarks command so two
+runs can be diffed with --compare.
+"""
+import hashlib
+import hmac
+import json
+import random
+import statistics
+import time
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client
+from rest_framework_simplejwt.tokens import AccessToken
+
+from config.profiling import Sample
+
+from .synthetic import AREAS, EMAIL_DOMAIN, KINDS, LAT_RANGE, LNG_RANGE
+
+BENCH_WEBHOOK_SECRET = "bench-webhook-secret"
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(1, round(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(name, timings, queries, errors, wall_seconds):
+    ms = [t * 1000 for t in timings]
+    return {
+        "scenario": name,
+        "requests": len(timings),
+        "errors": errors,
+        "p50_ms": round(percentile(ms, 50), 2),
+        "p95_ms": round(percentile(ms, 95), 2),
+        "p99_ms": round(percentile(ms, 99), 2),
+        "mean_ms": round(statistics.fmean(ms), 2),
+        "max_ms": round(max(ms), 2),
+        "throughput_rps": round(len(timings) / wall_seconds, 2) if wall_seconds else None,
+        "queries_mean": round(statistics.fmean(queries), 2),
+        "queries_max": max(queries),
+    }
+
+
+class Scenario:
+    """One endpoint workload. Subclasses build the next request in request()."""
+
+    name = ""
+    description = ""
+
+    def __init__(self, rng):
+        self.rng = rng
+        self.client = Client()
+
+    def setup(self):
+        pass
+
+    def request(self):
+        """Return the response for one request."""
+        raise NotImplementedError
+
+    @staticmethod
+    def auth_header(user):
+        return {"HTTP_AUTHORIZATION": f"Bearer {AccessToken.for_user(user)}"}
+
+    @staticmethod
+    def bench_users(role):
+        users = list(
+            get_user_model().objects.filter(email__endswith=f"@{EMAIL_DOMAIN}", role=role).order_by("email")
+        )
+        if not users:
+            raise RuntimeError(f"No synthetic {role} users; run `manage.py seed_synthetic` first.")
+        return users
+
+
+class ListingSearch(Scenario):
+    name = "listing_search"
+    description = "GET /api/properties/listings/ with full-text, radius and price filters"
+
+    def setup(self):
+        self.headers = self.auth_header(self.bench_users("tenant")[0])
+
+    def request(self):
+        params = {}
+        roll = self.rng.random()
+        if roll < 0.5:
+            params["q"] = f"{self.rng.choice(KINDS)} {self.rng.choice(AREAS)}"
+        if roll > 0.3:
+            params["lat"] = f"{self.rng.uniform(*LAT_RANGE):.5f}"
+            params["lng"] = f"{self.rng.uniform(*LNG_RANGE):.5f}"
+            params["radius"] = self.rng.choice(["2", "5", "10"])
+        if self.rng.random() < 0.3:
+            params["max_price"] = str(self.rng.randrange(1_000_000, 10_000_000, 500_000))
+        return self.client.get("/api/properties/listings/", params, **self.headers)
+
+
+class WalletTransfer(Scenario):
+    name = "wallet_transfer"
+    description = "POST /api/wallet/wallets/transfer/ between random synthetic tenants"
+
+    def setup(self):
+        from wallet.models import Wallet
+
+        tenants = self.bench_users("tenant")
+        wallets = dict(Wallet.objects.filter(user__in=tenants).values_list("user_id", "uid"))
+        self.pairs = [(self.auth_header(u), wallets[u.pk]) for u in tenants if u.pk in wallets]
+        if len(self.pairs) < 2:
+            raise RuntimeError("Need at least two synthetic tenant wallets.")
+
+    def request(self):
+        (headers, _), (_, recipient) = self.rng.sample(self.pairs, 2)
+        return self.client.post(
+            "/api/wallet/wallets/transfer/",
+            {"recipient": recipient, "amount": f"{self.rng.randint(1, 500)}.00"},
+            content_type="application/json",
+            **headers,
+        )
+
+
+class WebhookIngestion(Scenario):
+    name = "webhook_ingestion"
+    description = "POST /api/payments/webhooks/paystack/ with signed charge.success events"
+
+    def request(self):
+        body = json.dumps({
+            "event": "charge.success",
+            "data": {
+                "id": uuid.uuid4().int >> 80,
+                "reference": f"BENCH-WH-{uuid.uuid4().hex[:16].upper()}",
+                "amount": self.rng.randrange(100_000, 50_000_000, 100),
+                "currency": "NGN",
+                "status": "success",
+                "channel": "card",
+            },
+        }).encode()
+        signature = hmac.new(settings.PAYSTACK_SECRET_KEY.encode(), body, hashlib.sha512).hexdigest()
+        return self.client.post(
+            "/api/payments/webhooks/paystack/", body, content_type="application/json",
+            HTTP_X_PAYSTACK_SIGNATURE=signature,
+        )
+
+
+class CollectionReports(Scenario):
+    name = "collection_reports"
+    description = "GET the rents collection summary and the payments summary report as staff"
+
+    def setup(self):
+        self.headers = self.auth_header(self.bench_users("staff")[0])
+
+    def request(self):
+        if self.rng.random() < 0.5:
+            return self.client.get("/api/rents/reports/collection-summary/", **self.headers)
+        return self.client.get("/api/payments/reports/summary/", **self.headers)
+
+
+SCENARIOS = {cls.name: cls for cls in (ListingSearch, WalletTransfer, WebhookIngestion, CollectionReports)}
+
+
+def run(scenario, iterations, warmup=5):
+    """Time `iterations` requests after `warmup` untimed ones. Returns summarize() output."""
+    scenario.setup()
+    for _ in range(warmup):
+        scenario.request()
+
+    timings, queries, errors = [], [], 0
+    started = time.perf_counter()
+    for _ in range(iterations):
+        sample = Sample()
+        start = time.perf_counter()
+        with connection.execute_wrapper(sample):
+            response = scenario.request()
+        timings.append(time.perf_counter() - start)
+        queries.append(sample.queries)
+        if response.status_code >= 400:
+            errors += 1
+    return summarize(scenario.name, timings, queries, errors, time.perf_counter() - started)
+
+
+def build(names, seed):
+    rng = random.Random(seed)
+    return [SCENARIOS[name](rng) for name in names]
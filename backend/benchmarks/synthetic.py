@@ -0,0 +1,316 @@
+# backend/benchmarks/synthetic.py
+"""
+Deterministic synthetic dataset for benchmarks and load tests.
+
+Everything is created with bulk_create in batches, and every user gets an
+@bench.example email, so a dataset can be removed again with reset(). The
+same (scale, seed) always produces the same rows apart from ids/uids, which
+keeps benchmark runs comparable.
+
+Scale 1 is roughly: 5 managers, 5 agents, 40 tenants, 10 properties with 60
+apartments, 50 listings (150 media rows), 40 tenancies with 12 months of
+invoices and payments, and one wallet per user with 20 transactions each.
+"""
+import random
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.gis.geos import Point
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+from django.utils.text import slugify
+
+EMAIL_DOMAIN = "bench.example"
+PASSWORD = "bench-password"
+BATCH_SIZE = 2000
+
+# Lagos, roughly: listings are scattered over this box
+LAT_RANGE = (6.40, 6.70)
+LNG_RANGE = (3.20, 3.60)
+
+AREAS = ["Lekki", "Ikoyi", "Yaba", "Surulere", "Ikeja", "Ajah", "Victoria Island", "Gbagada", "Magodo", "Festac"]
+KINDS = ["apartment", "duplex", "studio", "bungalow", "terrace", "penthouse", "mini flat", "self contain"]
+ADJECTIVES = ["spacious", "serviced", "newly built", "furnished", "quiet", "luxury", "affordable", "modern"]
+FACILITIES = ["parking", "pool", "gym", "security", "generator", "water", "wifi", "elevator", "garden"]
+
+PER_SCALE = {
+    "managers": 5,
+    "agents": 5,
+    "tenants": 40,
+    "properties": 10,
+    "apartments_per_property": 6,
+    "listings": 50,
+    "media_per_listing": 3,
+    "months_of_invoices": 12,
+    "transactions_per_wallet": 20,
+}
+
+
+def reset():
+    """Delete every synthetic user; their rows go with them (CASCADE)."""
+    deleted, _ = get_user_model().objects.filter(email__endswith=f"@{EMAIL_DOMAIN}").delete()
+    return deleted
+
+
+class SyntheticDataset:
+    def __init__(self, scale=1, seed=42, stdout=None):
+        self.scale = max(1, int(scale))
+        self.rng = random.Random(seed)
+        self.seed = seed
+        self.stdout = stdout
+        self.counts = {}
+        self.first_day = None  # earliest created_at day, for the rollup rebuild
+
+    def n(self, key):
+        return PER_SCALE[key] * self.scale
+
+    def log(self, message):
+        if self.stdout is not None:
+            self.stdout.write(message)
+
+    def _bulk(self, model, rows):
+        created = model.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+        self.counts[model.__name__] = self.counts.get(model.__name__, 0) + len(created)
+        self.log(f"  {model.__name__}: {len(created)}")
+        return created
+
+    @transaction.atomic
+    def generate(self):
+        users = self.create_users()
+        _, apartments = self.create_properties(users["property_manager"])
+        self.create_listings(users["property_owner"] + users["property_manager"], users["agent"])
+        self.create_tenancies(users["tenant"], apartments)
+        self.create_wallets(users)
+        self.rebuild_rollups()
+        return self.counts
+
+    # --- users ---
+    def create_users(self):
+        User = get_user_model()
+        password = make_password(PASSWORD)
+        plan = [
+            ("property_manager", self.n("managers")),
+            ("property_owner", self.n("managers")),
+            ("agent", self.n("agents")),
+            ("tenant", self.n("tenants")),
+        ]
+        rows = []
+        for role, count in plan:
+            for i in range(count):
+                rows.append(User(
+                    email=f"{role}.{self.seed}.{i}@{EMAIL_DOMAIN}",
+                    uid=f"BENCH-{self.seed}-{role}-{i}",
+                    first_name=role.split("_")[-1].title(),
+                    last_name=f"{i:05d}",
+                    role=role,
+                    password=password,
+                ))
+        rows.append(User(
+            email=f"staff.{self.seed}@{EMAIL_DOMAIN}", uid=f"BENCH-{self.seed}-staff",
+            first_name="Bench", last_name="Staff", role="staff", is_staff=True, password=password,
+        ))
+        created = self._bulk(User, rows)
+        by_role = {}
+        for user in created:
+            by_role.setdefault(user.role, []).append(user)
+        return by_role
+
+    # --- properties, apartments ---
+    def create_properties(self, managers):
+        from properties.models import Apartment, Property
+
+        properties = self._bulk(Property, [
+            Property(
+                manager=managers[i % len(managers)],
+                name=f"{self.rng.choice(AREAS)} Court {i}",
+                address=f"{self.rng.randint(1, 200)} {self.rng.choice(AREAS)} Road, Lagos",
+            )
+            for i in range(self.n("properties"))
+        ])
+        apartments = self._bulk(Apartment, [
+            Apartment(
+                property=prop,
+                name=f"Flat {chr(65 + j // 4)}{j % 4 + 1}",
+                floor=str(j // 4),
+                bedrooms=self.rng.randint(1, 4),
+                bathrooms=self.rng.randint(1, 3),
+                rent_amount=Decimal(self.rng.randrange(150_000, 1_500_000, 10_000)),
+                is_available=False,
+            )
+            for prop in properties
+            for j in range(PER_SCALE["apartments_per_property"])
+        ])
+        return properties, apartments
+
+    # --- listings, media ---
+    def create_listings(self, owners, agents):
+        from properties.models.listings import PropertyListing, listing_search_vector
+        from properties.models.media import PropertyMedia
+
+        now = timezone.now()
+        rows = []
+        for i in range(self.n("listings")):
+            area = self.rng.choice(AREAS)
+            kind = self.rng.choice(KINDS)
+            bedrooms = self.rng.randint(0, 5)
+            title = f"{self.rng.choice(ADJECTIVES).title()} {bedrooms} bedroom {kind} in {area}"
+            rows.append(PropertyListing(
+                owner=owners[i % len(owners)],
+                agent=self.rng.choice(agents) if self.rng.random() < 0.6 else None,
+                listing_type=self.rng.choice(["RENT", "RENT", "RENT", "LEASE", "SALE", "SERVICE_APARTMENT"]),
+                title=title,
+                slug=slugify(title)[:50],
+                short_description=f"{kind.title()} close to {self.rng.choice(AREAS)}",
+                description=" ".join(self.rng.choice(ADJECTIVES + KINDS + AREAS) for _ in range(40)),
+                price=Decimal(self.rng.randrange(200_000, 20_000_000, 50_000)),
+                service_charge=Decimal(self.rng.randrange(0, 500_000, 10_000)),
+                bedrooms=bedrooms,
+                bathrooms=max(1, bedrooms),
+                toilets=max(1, bedrooms + 1),
+                facilities=self.rng.sample(FACILITIES, self.rng.randint(0, 5)),
+                location=Point(self.rng.uniform(*LNG_RANGE), self.rng.uniform(*LAT_RANGE), srid=4326),
+                address=f"{self.rng.randint(1, 300)} {area} Street, Lagos",
+                is_published=self.rng.random() < 0.9,
+                ranking_score=round(self.rng.uniform(0, 100), 2),
+            ))
+        listings = self._bulk(PropertyListing, rows)
+        # bulk_create skips save(), which maintains the search document
+        PropertyListing.objects.filter(pk__in=[l.pk for l in listings]).update(search_vector=listing_search_vector())
+
+        created_at = [now - timedelta(days=self.rng.randint(0, 365)) for _ in listings]
+        for listing, at in zip(listings, created_at):
+            listing.created_at = at
+        PropertyListing.objects.bulk_update(listings, ["created_at"], batch_size=BATCH_SIZE)
+
+        self._bulk(PropertyMedia, [
+            PropertyMedia(
+                listing=listing,
+                file=f"properties/media/bench/{listing.pk}-{k}.jpg",
+                is_cover=k == 0,
+                order=k,
+            )
+            for listing in listings
+            for k in range(PER_SCALE["media_per_listing"])
+        ])
+        return listings
+
+    # --- tenancies, invoices, payments ---
+    def create_tenancies(self, tenants, apartments):
+        from rents.models import RentInvoice, RentPayment, Tenancy
+
+        months = PER_SCALE["months_of_invoices"]
+        today = timezone.localdate()
+        start = date(today.year, today.month, 1) - timedelta(days=31 * months)
+        start = date(start.year, start.month, 1)
+
+        tenancies = self._bulk(Tenancy, [
+            Tenancy(
+                tenant=tenant,
+                apartment=apartments[i % len(apartments)],
+                start_date=start,
+                monthly_rent=apartments[i % len(apartments)].rent_amount,
+            )
+            for i, tenant in enumerate(tenants)
+        ])
+
+        invoices = []
+        for tenancy in tenancies:
+            due = start
+            for _ in range(months):
+                invoices.append(RentInvoice(
+                    tenancy=tenancy,
+                    due_date=due,
+                    amount=tenancy.monthly_rent,
+                    outstanding=tenancy.monthly_rent,  # bulk_create skips save()
+                ))
+                due = date(due.year + due.month // 12, due.month % 12 + 1, 1)
+        invoices = self._bulk(RentInvoice, invoices)
+
+        payments = []
+        settled = []
+        for inv in invoices:
+            roll = self.rng.random()
+            if inv.due_date > today or roll < 0.1:
+                continue  # unpaid
+            paid = inv.amount if roll > 0.25 else (inv.amount / 2).quantize(Decimal("0.01"))
+            payments.append(RentPayment(
+                invoice=inv,
+                payer=inv.tenancy.tenant,
+                amount=paid,
+                method=self.rng.choice(["wallet", "card", "bank"]),
+                reference=f"BENCH-RPAY-{self.seed}-{len(payments)}",
+                status="success",
+            ))
+            inv.outstanding = inv.amount - paid
+            inv.status = "paid" if inv.outstanding == 0 else "partially_paid"
+            settled.append(inv)
+        payments = self._bulk(RentPayment, payments)
+        RentInvoice.objects.bulk_update(settled, ["outstanding", "status"], batch_size=BATCH_SIZE)
+
+        # created_at is auto_now_add: move invoices to a few days before their due
+        # date and payments to a few days after, so the rows span the invoice months
+        now = timezone.now()
+        for inv in invoices:
+            inv.created_at = min(now, self._at(inv.due_date - timedelta(days=self.rng.randint(3, 10))))
+        for payment in payments:
+            payment.created_at = min(now, self._at(payment.invoice.due_date + timedelta(days=self.rng.randint(0, 14))))
+        RentInvoice.objects.bulk_update(invoices, ["created_at"], batch_size=BATCH_SIZE)
+        RentPayment.objects.bulk_update(payments, ["created_at"], batch_size=BATCH_SIZE)
+        self.first_day = start - timedelta(days=10)
+
+    def _at(self, day):
+        return timezone.make_aware(datetime.combine(day, time(self.rng.randint(8, 18), self.rng.randint(0, 59))))
+
+    # --- collection rollups ---
+    def rebuild_rollups(self):
+        """bulk_create skips the signals that keep rollups current: recompute the covered days."""
+        from payments import rollups
+
+        if self.first_day is None:
+            return
+        written = rollups.rebuild(self.first_day, timezone.localdate())
+        self.counts["CollectionRollup"] = written
+        self.log(f"  CollectionRollup: {written}")
+
+    # --- wallets, transactions ---
+    def create_wallets(self, users):
+        from wallet import ledger
+        from wallet.models import Wallet, WalletTransaction
+
+        wallet_type = {"property_manager": "property_manager", "agent": "agent"}
+        owners = [u for role_users in users.values() for u in role_users]
+        wallets = self._bulk(Wallet, [
+            Wallet(user=user, wallet_type=wallet_type.get(user.role, "personal"))
+            for user in owners
+        ])
+
+        txns = []
+        for wallet in wallets:
+            txns.append(WalletTransaction(
+                wallet=wallet, txn_type="fund", amount=Decimal("5000000.00"),
+                reference=f"BENCH-FUND-{wallet.uid}", description="Synthetic opening balance", status="success",
+            ))
+            for k in range(PER_SCALE["transactions_per_wallet"] - 1):
+                txn_type = self.rng.choice(["fund", "debit", "credit", "auto_deduct"])
+                txns.append(WalletTransaction(
+                    wallet=wallet, txn_type=txn_type,
+                    amount=Decimal(self.rng.randrange(1_000, 100_000, 500)),
+                    reference=f"BENCH-{wallet.uid}-{k}",
+                    description=f"Synthetic {txn_type}",
+                    status="success" if self.rng.random() < 0.95 else "failed",
+                ))
+        self._bulk(WalletTransaction, txns)
+
+        # Balances must agree with the ledger
+        balances = dict(
+            WalletTransaction.objects.filter(wallet__in=wallets, status="success")
+            .values("wallet_id")
+            .annotate(total=Sum(ledger.signed_amount_expression()))
+            .values_list("wallet_id", "total")
+        )
+        for wallet in wallets:
+            wallet.balance = wallet.ledger_balance = balances.get(wallet.pk) or Decimal("0.00")
+        Wallet.objects.bulk_update(wallets, ["balance", "ledger_balance"], batch_size=BATCH_SIZE)
@@ -0,0 +1,8 @@
+# backend/bills/permissions.py
+"""Ownership role paths for bills (see config.permissions)."""
+
+INVOICE_ROLES = {
+    "is_tenant": "tenant_apartment__tenant_bond__tenant",
+    "is_manager": "tenant_apartment__apartment__property__manager",
+}
+BILL_ITEM_ROLES = {flag: f"invoice__{path}" for flag, path in INVOICE_ROLES.items()}
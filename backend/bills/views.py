@@ -9,11 +9,18 @@ from payments.models import PaymentRecord
 from rest_framework.decorators import action
 from django.db import transaction
 from django.shortcuts import get_object_or_404
+from config.permissions import owner_id_of, ownership_q
+from .permissions import BILL_ITEM_ROLES, INVOICE_ROLES
 
 class IsPropertyManagerOrStaff(permissions.BasePermission):
     def has_permission(self, request, view):
         return request.user and request.user.is_authenticated and (request.user.is_staff or getattr(request.user, "role", None) == "property_manager")
 
+def _check_manages(user, tenant_apartment):
+    if tenant_apartment is None or owner_id_of(tenant_apartment, "apartment__property__manager") != user.pk:
+        raise permissions.PermissionDenied("You do not manage that property / tenant.")
+
+
 class InvoiceViewSet(viewsets.ModelViewSet):
     queryset = Invoice.objects.all().prefetch_related("items", "payments")
     serializer_class = InvoiceSerializer
@@ -24,10 +31,10 @@ class InvoiceViewSet(viewsets.ModelViewSet):
         qs = super().get_queryset()
         # tenant sees own invoices
         if getattr(user, "role", None) == "tenant":
-            return qs.filter(tenant_apartment__tenant=user)
+            return qs.filter(ownership_q(user, INVOICE_ROLES, "is_tenant"))
         # property_manager sees invoices for properties they manage/own
         if getattr(user, "role", None) == "property_manager" and not user.is_staff:
-            return qs.filter(tenant_apartment__apartment__property__manager=user)
+            return qs.filter(ownership_q(user, INVOICE_ROLES, "is_manager"))
         # staff see all
         if user.is_staff:
             return qs
@@ -39,9 +46,7 @@ class InvoiceViewSet(viewsets.ModelViewSet):
         user = self.request.user
         # If not staff, ensure property manager manages/owns
         if not user.is_staff:
-            prop = getattr(getattr(tenant_apartment, "apartment", None), "property", None)
-            if prop is None or getattr(prop, "manager", None) != user:
-                raise permissions.PermissionDenied("You do not manage that property / tenant.")
+            _check_manages(user, tenant_apartment)
         serializer.save()
 
     def perform_update(self, serializer):
@@ -49,9 +54,7 @@ class InvoiceViewSet(viewsets.ModelViewSet):
         tenant_apartment = serializer.validated_data.get("tenant_apartment", None)
         user = self.request.user
         if tenant_apartment and not user.is_staff:
-            prop = getattr(getattr(tenant_apartment, "apartment", None), "property", None)
-            if prop is None or getattr(prop, "manager", None) != user:
-                raise permissions.PermissionDenied("You do not manage that property / tenant.")
+            _check_manages(user, tenant_apartment)
         serializer.save()
 
 class BillItemViewSet(viewsets.ModelViewSet):
@@ -63,9 +66,9 @@ class BillItemViewSet(viewsets.ModelViewSet):
         user = self.request.user
         qs = super().get_queryset()
         if getattr(user, "role", None) == "tenant":
-            return qs.filter(invoice__tenant_apartment__tenant=user)
+            return qs.filter(ownership_q(user, BILL_ITEM_ROLES, "is_tenant"))
         if getattr(user, "role", None) == "property_manager" and not user.is_staff:
-            return qs.filter(invoice__tenant_apartment__apartment__property__manager=user)
+            return qs.filter(ownership_q(user, BILL_ITEM_ROLES, "is_manager"))
         if user.is_staff:
             return qs
         return BillItem.objects.none()
@@ -1,14 +1,28 @@
 import os
+
 from django.core.asgi import get_asgi_application
-from channels.routing import ProtocolTypeRouter, URLRouter
-from channels.auth import AuthMiddlewareStack
-import disputes.routing
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django_asgi_app = get_asgi_application()
+
+from django.urls import path, re_path  # noqa: E402
+from channels.routing import ProtocolTypeRouter, URLRouter  # noqa: E402
+from channels.auth import AuthMiddlewareStack  # noqa: E402
+
+import disputes.routing  # noqa: E402
+import properties.routing  # noqa: E402
+from config.channels_auth import JWTAuthMiddleware  # noqa: E402
+from disputes.consumers import DisputeEventStreamConsumer  # noqa: E402
 
 application = ProtocolTypeRouter({
-    "http": get_asgi_application(),
+    "http": URLRouter([
+        # Long-lived SSE stream: an awaiting coroutine per client, not a worker thread
+        path("api/disputes/sse/", DisputeEventStreamConsumer.as_asgi()),
+        re_path(r"", django_asgi_app),
+    ]),
     "websocket": AuthMiddlewareStack(
-        URLRouter(disputes.routing.websocket_urlpatterns)
+        JWTAuthMiddleware(
+            URLRouter(disputes.routing.websocket_urlpatterns + properties.routing.websocket_urlpatterns)
+        )
     ),
 })
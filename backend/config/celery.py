@@ -16,6 +16,10 @@ app.conf.beat_schedule = {
         "task": "wallet.tasks.refund_tasks.process_auto_refunds",
         "schedule": crontab(hour=3, minute=0),  # runs daily at 3 AM
     },
+    "wallet-snapshot-balances-daily": {
+        "task": "wallet.tasks.snapshot_wallet_balances",
+        "schedule": crontab(hour=0, minute=15),
+    },
 }
 
 
@@ -31,6 +35,10 @@ app.conf.beat_schedule.update({
         "task": "rents.tasks.apply_late_fees",
         "schedule": crontab(hour=1, minute=0),  # 1am daily
     },
+    "rents-generate-billing-cycle-invoices-daily": {
+        "task": "rents.tasks.generate_billing_cycle_invoices",
+        "schedule": crontab(hour=0, minute=45),  # before late fees
+    },
 })
 
 
@@ -46,4 +54,28 @@ app.conf.beat_schedule.update({
         "task": "properties.tasks.expire_free_posts",
         "schedule": crontab(hour=3, minute=0),
     },
+    "payments-rebuild-collection-rollups-nightly": {
+        "task": "payments.tasks.rebuild_collection_rollups",
+        "schedule": crontab(hour=0, minute=30),
+    },
+    "payments-reconcile-paystack-daily": {
+        "task": "payments.tasks.reconcile_paystack_transactions",
+        "schedule": crontab(hour=2, minute=30),
+    },
+    "payments-dispatch-webhook-events": {
+        "task": "payments.tasks.dispatch_due_webhook_events",
+        "schedule": crontab(),  # every minute
+    },
+    "notifications-flush-outbox": {
+        "task": "notifications.tasks.flush_outbox",
+        "schedule": crontab(),  # every minute; bursts are also flushed after outbox.WINDOW_SECONDS
+    },
+    "properties-persist-thread-messages": {
+        "task": "properties.tasks.persist_thread_messages",
+        "schedule": crontab(),  # sweep; bursts are persisted about a second after they start
+    },
+    "properties-flush-engagement": {
+        "task": "properties.tasks.flush_listing_engagement",
+        "schedule": crontab(),  # every minute
+    },
 })
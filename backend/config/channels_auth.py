@@ -0,0 +1,53 @@
+# backend/config/channels_auth.py
+"""
+SimpleJWT authentication for Channels consumers.
+
+Browsers cannot set headers on WebSocket/EventSource requests, so the access
+token comes from the `token` query parameter (or an "Authorization: Bearer"
+header for non-browser clients). JWTAuthMiddleware sets scope["user"] when
+the token is valid and leaves whatever the session stack set otherwise.
+"""
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+
+
+def token_from_scope(scope):
+    query = parse_qs(scope.get("query_string", b"").decode())
+    token = (query.get("token") or [None])[0]
+    if token:
+        return token
+    for name, value in scope.get("headers") or []:
+        if name == b"authorization":
+            kind, _, value = value.decode().partition(" ")
+            if kind.lower() == "bearer":
+                return value.strip()
+    return None
+
+
+@database_sync_to_async
+def user_for_token(token):
+    """The active user a JWT access token belongs to, or None."""
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from rest_framework_simplejwt.backends import TokenBackend
+
+    try:
+        token_backend = TokenBackend(algorithm=settings.SIMPLE_JWT["ALGORITHM"], signing_key=settings.SIMPLE_JWT["SIGNING_KEY"])
+        data = token_backend.decode(token, verify=True)
+    except Exception:
+        return None
+    if data.get("token_type", "access") != "access":
+        return None
+    return get_user_model().objects.filter(id=data.get("user_id"), is_active=True).first()
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    async def __call__(self, scope, receive, send):
+        token = token_from_scope(scope)
+        if token:
+            user = await user_for_token(token)
+            if user is not None:
+                scope = dict(scope, user=user)
+        return await super().__call__(scope, receive, send)
@@ -0,0 +1,21 @@
+# backend/config/pagination.py
+"""
+Pagination for high-volume, time-ordered list endpoints.
+
+CreatedAtCursorPagination pages on (created_at, id) with an opaque ?cursor=
+token: each page is an indexed range scan (WHERE created_at < ... ORDER BY
+... LIMIT n), so page 1000 costs the same as page 1 and no COUNT(*) is run.
+Responses carry next/previous links but no count. The ordering is fixed:
+?ordering= is ignored on these endpoints.
+"""
+from rest_framework.pagination import CursorPagination
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    ordering = ("-created_at", "-id")
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+    def get_ordering(self, request, queryset, view):
+        return self.ordering
@@ -0,0 +1,129 @@
+# backend/config/permissions.py
+"""
+Ownership checks that compare foreign-key ids instead of loaded User rows.
+
+A view declares its ownership roles as flag -> relation path:
+
+    ownership = {"is_owner": "listing__owner", "is_agent": "listing__agent"}
+
+OwnershipQuerysetMixin annotates each flag onto the view's detail queryset
+as a boolean computed in SQL (listing.owner_id = <user id>), so object-level
+checks on fetched objects run no queries at all. Objects that did not come
+through the view's queryset (a listing in validated_data, a freshly created
+row) fall back to owner_id_of(), which follows relations already loaded
+(select_related / prefetched) and otherwise reads the id with one values()
+query. Neither path loads a User row.
+
+OwnershipPermission / OwnershipOrReadOnly are the DRF permission classes on top;
+ownership_q() is the matching queryset filter for "rows this user holds a role on".
+"""
+from django.db.models import BooleanField, ExpressionWrapper, Q, Value
+from django.db.models.functions import Coalesce
+from rest_framework import permissions
+
+
+def _user_pk(user):
+    return user.pk if user is not None and user.is_authenticated else None
+
+
+def ownership_annotations(user, roles):
+    """{flag: boolean expression} for queryset.annotate()."""
+    pk = _user_pk(user)
+    if pk is None:
+        # Never compare against NULL: agent_id = NULL would match unassigned rows
+        return {flag: Value(False, output_field=BooleanField()) for flag in roles}
+    # Coalesce: `agent_id = <pk>` is NULL (not False) when the FK is empty, and
+    # holds_role() reads None as "not annotated" and would fall back to a query
+    return {
+        flag: Coalesce(
+            ExpressionWrapper(Q(**{f"{path}_id": pk}), output_field=BooleanField()),
+            Value(False),
+            output_field=BooleanField(),
+        )
+        for flag, path in roles.items()
+    }
+
+
+def annotate_ownership(queryset, user, roles):
+    return queryset.annotate(**ownership_annotations(user, roles)) if roles else queryset
+
+
+def ownership_q(user, roles, *flags):
+    """Q matching rows where `user` holds any of `flags` (default: every role)."""
+    pk = _user_pk(user)
+    q = Q(pk__in=[])
+    if pk is None:
+        return q
+    for flag in flags or roles:
+        q |= Q(**{f"{roles[flag]}_id": pk})
+    return q
+
+
+def owner_id_of(obj, path):
+    """
+    The id at the end of `path` ("owner", "tenancy__apartment__property__manager").
+    Loaded relations are followed for free; the first one that is not loaded is
+    resolved, together with the rest of the path, in a single values() query.
+    """
+    hops = path.split("__")
+    current = obj
+    for i, hop in enumerate(hops[:-1]):
+        field = current._meta.get_field(hop)
+        if not field.is_cached(current):
+            rest = "__".join(hops[i:])
+            return type(current)._default_manager.filter(pk=current.pk).values_list(f"{rest}_id", flat=True).first()
+        current = getattr(current, hop)
+        if current is None:
+            return None
+    return getattr(current, f"{hops[-1]}_id")
+
+
+def holds_role(obj, user, roles, *flags):
+    """True if `user` holds any of `flags` (default: every role) on `obj`."""
+    pk = _user_pk(user)
+    if pk is None:
+        return False
+    for flag in flags or roles:
+        annotated = getattr(obj, flag, None)
+        if annotated is None:
+            annotated = owner_id_of(obj, roles[flag]) == pk
+        if annotated:
+            return True
+    return False
+
+
+class OwnershipQuerysetMixin:
+    """
+    Annotates view.ownership flags onto get_queryset() for detail routes (where
+    object permissions run); list routes skip the extra columns and joins.
+    Views call super().get_queryset() first.
+    """
+
+    ownership = {}
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        if getattr(self, "detail", True) is False:
+            return qs
+        return annotate_ownership(qs, self.request.user, self.ownership)
+
+    def holds_role(self, obj, *flags):
+        return holds_role(obj, self.request.user, self.ownership, *flags)
+
+
+class OwnershipPermission(permissions.BasePermission):
+    """Object access for users holding any of the view's ownership roles (and staff, unless staff_allowed is off)."""
+
+    safe_methods_allowed = False
+    staff_allowed = True
+
+    def has_object_permission(self, request, view, obj):
+        if self.safe_methods_allowed and request.method in permissions.SAFE_METHODS:
+            return True
+        if self.staff_allowed and request.user.is_staff:
+            return True
+        return holds_role(obj, request.user, getattr(view, "ownership", {}))
+
+
+class OwnershipOrReadOnly(OwnershipPermission):
+    safe_methods_allowed = True
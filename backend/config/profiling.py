@@ -0,0 +1,281 @@
+# backend/config/profiling.py
+"""
+Per-endpoint request profiling.
+
+RequestProfilingMiddleware records, for every request, the SQL query count
+and time (via connection.execute_wrapper), time spent producing serializer
+.data, and total latency, labelled by the resolved URL name
+("wallet-txn-list", "listing-detail", ...) and HTTP method.
+
+Samples are aggregated in process and merged into a Redis hash every
+PROFILING_FLUSH_SECONDS, so /metrics (metrics_view, Prometheus text format)
+reports totals across all workers.
+
+Query budgets: settings.QUERY_BUDGETS maps URL names to the most queries one
+request may run. An over-budget request is logged and counted; with
+QUERY_BUDGET_ENFORCE = True (set it in test settings) it raises
+QueryBudgetExceeded instead, so the test that made the request fails.
+assert_max_queries() does the same for a block of code.
+"""
+import contextvars
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponse, HttpResponseForbidden
+
+logger = logging.getLogger(__name__)
+
+METRICS_KEY = "profiling:metrics"
+LATENCY_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+_current = contextvars.ContextVar("profiling_sample", default=None)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class Sample:
+    """Measurements for one request (or one assert_max_queries block)."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.serializer_seconds = 0.0
+        self.serializer_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper hook
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_seconds += time.perf_counter() - start
+
+
+def _install_serializer_timer():
+    """Time BaseSerializer.data (outermost call only) into the current sample."""
+    from rest_framework.serializers import BaseSerializer
+
+    if getattr(BaseSerializer, "_profiling_installed", False):
+        return
+    original = BaseSerializer.data
+
+    def data(self):
+        sample = _current.get()
+        if sample is None:
+            return original.fget(self)
+        sample.serializer_depth += 1
+        start = time.perf_counter()
+        try:
+            return original.fget(self)
+        finally:
+            sample.serializer_depth -= 1
+            if sample.serializer_depth == 0:
+                sample.serializer_seconds += time.perf_counter() - start
+
+    BaseSerializer.data = property(data)
+    BaseSerializer._profiling_installed = True
+
+
+def _observe_histogram(values, name, labels, amount, buckets):
+    values[f"{name}_sum|{labels}"] += amount
+    values[f"{name}_count|{labels}"] += 1
+    for bound in buckets:
+        if amount <= bound:
+            values[f"{name}_bucket|{labels}|{bound}"] += 1
+    values[f"{name}_bucket|{labels}|+Inf"] += 1
+
+
+class MetricsRegistry:
+    """In-process counters, flushed into a shared Redis hash."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = defaultdict(float)
+        self.last_flush = time.monotonic()
+
+    def observe(self, view, method, status, sample, total_seconds, over_budget=False):
+        labels = f"{view}|{method}"
+        with self.lock:
+            v = self.values
+            v[f"requests_total|{labels}|{status // 100}xx"] += 1
+            v[f"db_seconds_total|{labels}"] += sample.db_seconds
+            v[f"serializer_seconds_total|{labels}"] += sample.serializer_seconds
+            _observe_histogram(v, "latency_seconds", labels, total_seconds, LATENCY_BUCKETS)
+            _observe_histogram(v, "queries", labels, sample.queries, QUERY_BUCKETS)
+            if over_budget:
+                v[f"query_budget_exceeded_total|{labels}"] += 1
+
+    def take(self):
+        with self.lock:
+            values, self.values = self.values, defaultdict(float)
+            self.last_flush = time.monotonic()
+        return values
+
+    def flush(self, client=None):
+        values = self.take()
+        if not values:
+            return 0
+        try:
+            if client is None:
+                from config.redis import get_redis
+                client = get_redis()
+            pipe = client.pipeline(transaction=False)
+            for key, amount in values.items():
+                pipe.hincrbyfloat(METRICS_KEY, key, amount)
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Failed to flush request metrics: {e}")
+            with self.lock:
+                for key, amount in values.items():
+                    self.values[key] += amount
+            return 0
+        return len(values)
+
+    def maybe_flush(self):
+        if time.monotonic() - self.last_flush >= getattr(settings, "PROFILING_FLUSH_SECONDS", 10):
+            self.flush()
+
+    def snapshot(self):
+        """Shared totals plus what this process has not flushed yet."""
+        totals = defaultdict(float)
+        try:
+            from config.redis import get_redis
+            for key, amount in get_redis().hgetall(METRICS_KEY).items():
+                key = key.decode() if isinstance(key, bytes) else key
+                totals[key] += float(amount)
+        except Exception as e:
+            logger.error(f"Failed to read shared request metrics: {e}")
+        with self.lock:
+            for key, amount in self.values.items():
+                totals[key] += amount
+        return totals
+
+
+registry = MetricsRegistry()
+
+# family -> (type, help); histograms are stored as <family>_bucket/_sum/_count
+FAMILIES = {
+    "requests_total": ("counter", "Requests by endpoint, method and status class."),
+    "db_seconds_total": ("counter", "Time spent in SQL by endpoint."),
+    "serializer_seconds_total": ("counter", "Time spent building serializer data by endpoint."),
+    "latency_seconds": ("histogram", "Request latency by endpoint."),
+    "queries": ("histogram", "SQL queries per request by endpoint."),
+    "query_budget_exceeded_total": ("counter", "Requests that ran more queries than their budget."),
+}
+
+
+def _bucket_order(key):
+    bound = key.rsplit("|", 1)[-1]
+    return key.rsplit("|", 1)[0], float("inf") if bound == "+Inf" else float(bound)
+
+
+def render_prometheus(values):
+    """Prometheus text exposition of registry values."""
+    lines = []
+    for family, (kind, help_text) in FAMILIES.items():
+        series = [f"{family}_bucket", f"{family}_sum", f"{family}_count"] if kind == "histogram" else [family]
+        keys = {metric: sorted((k for k in values if k.split("|", 1)[0] == metric),
+                               key=_bucket_order if metric.endswith("_bucket") else None)
+                for metric in series}
+        if not any(keys.values()):
+            continue
+        lines.append(f"# HELP http_{family} {help_text}")
+        lines.append(f"# TYPE http_{family} {kind}")
+        for metric in series:
+            for key in keys[metric]:
+                parts = key.split("|")
+                labels = f'view="{parts[1]}",method="{parts[2]}"'
+                if metric == "requests_total":
+                    labels += f',status="{parts[3]}"'
+                elif metric.endswith("_bucket"):
+                    labels += f',le="{parts[3]}"'
+                lines.append(f"http_{metric}{{{labels}}} {values[key]:g}")
+    return "\n".join(lines) + "\n"
+
+
+def _view_name(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unresolved"
+    return match.view_name or match.route or "unnamed"
+
+
+def check_budget(view, sample):
+    """True if within budget (or no budget declared); raises when budgets are enforced."""
+    budget = getattr(settings, "QUERY_BUDGETS", {}).get(view)
+    if budget is None or sample.queries <= budget:
+        return True
+    message = f"{view} ran {sample.queries} queries (budget {budget})"
+    if getattr(settings, "QUERY_BUDGET_ENFORCE", False):
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
+    return False
+
+
+class RequestProfilingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, "PROFILING_ENABLED", True)
+        if self.enabled:
+            _install_serializer_timer()
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+
+        sample = Sample()
+        token = _current.set(sample)
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(sample):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total = time.perf_counter() - start
+
+        view = _view_name(request)
+        over_budget = False
+        try:
+            over_budget = not check_budget(view, sample)
+        finally:
+            registry.observe(view, request.method, response.status_code, sample, total, over_budget)
+            registry.maybe_flush()
+
+        if settings.DEBUG:
+            response["X-Query-Count"] = str(sample.queries)
+            response["Server-Timing"] = (
+                f"db;dur={sample.db_seconds * 1000:.1f}, "
+                f"serializer;dur={sample.serializer_seconds * 1000:.1f}, "
+                f"total;dur={total * 1000:.1f}"
+            )
+        return response
+
+
+@contextmanager
+def assert_max_queries(limit, label="block"):
+    """Fail (QueryBudgetExceeded) if the block runs more than `limit` queries."""
+    sample = Sample()
+    with connection.execute_wrapper(sample):
+        yield sample
+    if sample.queries > limit:
+        raise QueryBudgetExceeded(f"{label} ran {sample.queries} queries (budget {limit})")
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint. Staff session or `Authorization: Bearer <METRICS_TOKEN>`."""
+    token = getattr(settings, "METRICS_TOKEN", "")
+    auth = request.headers.get("Authorization", "")
+    allowed = (token and auth == f"Bearer {token}") or (request.user.is_authenticated and request.user.is_staff)
+    if not allowed:
+        return HttpResponseForbidden("forbidden")
+    registry.flush()
+    return HttpResponse(render_prometheus(registry.snapshot()), content_type="text/plain; version=0.0.4")
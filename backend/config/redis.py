@@ -0,0 +1,30 @@
+# backend/config/redis.py
+"""
+Shared Redis connections for buffers, counters and replay logs.
+Uses settings.REDIS_URL; connections are pooled and created lazily per process.
+"""
+import redis
+from django.conf import settings
+
+_client = None
+
+
+def get_redis():
+    """Return the process-wide Redis client."""
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(settings.REDIS_URL)
+    return _client
+
+
+_async_client = None
+
+
+def get_async_redis():
+    """Process-wide asyncio Redis client, for ASGI consumers (one event loop per process)."""
+    global _async_client
+    if _async_client is None:
+        import redis.asyncio
+
+        _async_client = redis.asyncio.Redis.from_url(settings.REDIS_URL)
+    return _async_client
@@ -0,0 +1,29 @@
+# backend/config/serializers.py
+
+
+class SparseFieldsetMixin:
+    """
+    Opt-in sparse fieldsets for ModelSerializers: ?fields=uid,amount,created_at
+    returns only those fields (unknown names are ignored; without the parameter
+    every field is returned). Applies to top-level serializers on GET requests,
+    so nested serializers and writes keep their full field set.
+    """
+
+    fields_query_param = "fields"
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop("fields", None)
+        super().__init__(*args, **kwargs)
+        if fields is None:
+            request = self.context.get("request")
+            if request is None or request.method != "GET":
+                return
+            fields = request.query_params.get(self.fields_query_param)
+            if not fields:
+                return
+            fields = fields.split(",")
+        wanted = {name.strip() for name in fields if name.strip()}
+        if not wanted & set(self.fields):
+            return
+        for name in set(self.fields) - wanted:
+            self.fields.pop(name)
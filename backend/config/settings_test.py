@@ -0,0 +1,21 @@
+# backend/config/settings_test.py
+"""Settings for the test suite (pytest.ini points pytest-django here)."""
+from .settings import *  # noqa: F401,F403
+from .settings import env
+
+DEBUG = False
+SECRET_KEY = "test-secret-key"
+PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
+
+# Over-budget requests raise QueryBudgetExceeded, failing the test that made them
+QUERY_BUDGET_ENFORCE = True
+PROFILING_FLUSH_SECONDS = 10 ** 9  # keep request metrics in process
+
+REDIS_URL = env("REDIS_URL", default="redis://localhost:6379/0")
+CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+ENGAGEMENT_BUFFER_BACKEND = "local"
+CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+
+CELERY_TASK_ALWAYS_EAGER = True
+CELERY_TASK_EAGER_PROPAGATES = True
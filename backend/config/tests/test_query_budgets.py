@@ -0,0 +1,154 @@
+# backend/config/tests/test_query_budgets.py
+"""
+Every endpoint in settings.QUERY_BUDGETS is requested against a populated
+dataset; the test settings enforce budgets, so a request over budget raises
+QueryBudgetExceeded (an N+1 shows up as soon as there are several rows).
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from benchmarks.synthetic import SyntheticDataset
+from config.permissions import annotate_ownership, holds_role
+from config.profiling import QueryBudgetExceeded, check_budget, Sample
+
+
+class QueryBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        from django.contrib.auth import get_user_model
+        from payments.models import PaymentRecord
+        from properties.models.listings import PropertyListing
+        from properties.models.messaging import Message, MessageThread, ThreadParticipant
+        from properties.models.units import ApartmentUnit
+        from rents.models import RentInvoice
+        from wallet.models import Wallet
+
+        SyntheticDataset(scale=1, seed=7).generate()
+        User = get_user_model()
+        cls.tenant = User.objects.filter(role="tenant").order_by("email").first()
+        cls.staff = User.objects.filter(role="staff").first()
+        cls.listing = PropertyListing.objects.select_related("owner").order_by("created_at").first()
+        cls.owner = cls.listing.owner
+
+        ApartmentUnit.objects.bulk_create([
+            ApartmentUnit(listing=cls.listing, apartment_type="FLAT", name=f"Unit {i}", rent_amount=Decimal("500000.00"))
+            for i in range(5)
+        ])
+        cls.wallet = Wallet.objects.filter(user=cls.tenant).first()
+        cls.invoice = RentInvoice.objects.filter(tenancy__tenant=cls.tenant).first()
+
+        for i in range(3):
+            thread = MessageThread.objects.create(created_by=cls.tenant, listing=cls.listing, subject=f"Enquiry {i}")
+            ThreadParticipant.objects.bulk_create([
+                ThreadParticipant(thread=thread, user=cls.tenant),
+                ThreadParticipant(thread=thread, user=cls.owner),
+            ])
+            for k in range(3):
+                Message.objects.create(thread=thread, sender=cls.owner if k % 2 else cls.tenant, body=f"Message {k}")
+
+        PaymentRecord.objects.bulk_create([
+            PaymentRecord(tenant=cls.tenant, amount=Decimal("25000.00"), method="card", status="success")
+            for _ in range(5)
+        ])
+
+    def get(self, user, name, *args):
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.get(reverse(name, args=args))
+        self.assertEqual(response.status_code, 200, f"{name}: {response.status_code}")
+        return response
+
+    def test_listings(self):
+        self.get(self.owner, "listing-list")
+        self.get(self.owner, "listing-detail", self.listing.pk)
+
+    def test_units(self):
+        self.get(self.owner, "unit-list")
+
+    def test_message_threads(self):
+        self.get(self.tenant, "message-thread-list")
+
+    def test_wallets(self):
+        self.get(self.tenant, "wallet-list")
+        self.get(self.tenant, "wallet-detail", self.wallet.pk)
+        self.get(self.tenant, "wallet-statement", self.wallet.pk)
+        self.get(self.tenant, "wallet-txn-list")
+
+    def test_rents(self):
+        self.get(self.tenant, "rentinvoice-list")
+        self.get(self.tenant, "rentinvoice-detail", self.invoice.pk)
+        self.get(self.tenant, "tenancy-list")
+        self.get(self.staff, "rentinvoice-list")
+
+    def test_payments(self):
+        self.get(self.tenant, "payment-list")
+
+    def test_every_budget_is_requested(self):
+        requested = {
+            "listing-list", "listing-detail", "unit-list", "message-thread-list",
+            "wallet-list", "wallet-detail", "wallet-statement", "wallet-txn-list",
+            "rentinvoice-list", "rentinvoice-detail", "tenancy-list", "payment-list",
+        }
+        self.assertEqual(set(settings.QUERY_BUDGETS), requested)
+
+    def test_budgets_are_enforced(self):
+        sample = Sample()
+        sample.queries = settings.QUERY_BUDGETS["wallet-list"] + 1
+        with self.assertRaises(QueryBudgetExceeded):
+            check_budget("wallet-list", sample)
+
+
+class OwnershipQueryTests(TestCase):
+    """Object permission checks on rows from the view's queryset read annotations only."""
+
+    @classmethod
+    def setUpTestData(cls):
+        from django.contrib.auth import get_user_model
+        from properties.models.listings import PropertyListing
+
+        SyntheticDataset(scale=1, seed=11).generate()
+        User = get_user_model()
+        cls.roles = {"is_owner": "owner", "is_agent": "agent"}  # properties.views.LISTING_ROLES
+        cls.listing = PropertyListing.objects.select_related("owner").order_by("created_at").first()
+        cls.owner = cls.listing.owner
+        cls.agent = User.objects.filter(role="agent").first()
+        cls.stranger = User.objects.filter(role="tenant").first()
+        cls.Listing = PropertyListing
+
+    def fetch(self, user):
+        return annotate_ownership(self.Listing.objects.all(), user, self.roles).get(pk=self.listing.pk)
+
+    def test_unassigned_agent_costs_no_query(self):
+        self.Listing.objects.filter(pk=self.listing.pk).update(agent=None)
+        listing = self.fetch(self.stranger)
+        with self.assertNumQueries(0):
+            self.assertFalse(holds_role(listing, self.stranger, self.roles))
+            self.assertFalse(holds_role(listing, self.stranger, self.roles, "is_agent"))
+        listing = self.fetch(self.owner)
+        with self.assertNumQueries(0):
+            self.assertTrue(holds_role(listing, self.owner, self.roles))
+
+    def test_assigned_agent_costs_no_query(self):
+        self.Listing.objects.filter(pk=self.listing.pk).update(agent=self.agent)
+        listing = self.fetch(self.agent)
+        with self.assertNumQueries(0):
+            self.assertTrue(holds_role(listing, self.agent, self.roles, "is_agent"))
+
+    def test_detail_request_does_not_depend_on_agent(self):
+        client = APIClient()
+        client.force_authenticate(self.owner)
+        url = reverse("listing-detail", args=[self.listing.pk])
+        client.get(url)  # warm per-process caches before counting
+        counts = []
+        for agent in (self.agent, None):
+            self.Listing.objects.filter(pk=self.listing.pk).update(agent=agent)
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(client.get(url).status_code, 200)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
@@ -3,8 +3,11 @@ from django.contrib import admin
 from django.urls import path, include
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
 
+from config.profiling import metrics_view
+
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("metrics", metrics_view, name="metrics"),
     path("api/platform-admin/", include("platform_admin.urls")),
     path("api/users/", include("users.urls")),
     path("api/properties/", include("properties.urls")),  # ✅ FIX 3: Added trailing slash
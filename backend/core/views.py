@@ -6,7 +6,8 @@ from datetime import timedelta
 
 from .models import PropertyListing
 from core.models import PlatformSettings
-from wallet.models import WalletTransaction, Wallet
+from wallet import ledger
+from wallet.models import Wallet
 
 class PropertyListingViewSet(viewsets.ModelViewSet):
     queryset = PropertyListing.objects.all()
@@ -24,20 +25,17 @@ class PropertyListingViewSet(viewsets.ModelViewSet):
 
         wallet = Wallet.objects.get(user=request.user)
 
-        if wallet.balance < cost:
-            return Response({"detail": "Insufficient wallet balance"}, status=status.HTTP_400_BAD_REQUEST)
-
         # Deduct balance
-        WalletTransaction.objects.create(
-            wallet=wallet,
-            amount=cost,
-            type="debit",
-            description=f"Boost listing {listing.id} for {days} days",
-            reference=f"boost-{listing.id}-{timezone.now().timestamp()}",
-            status="success",
-        )
-        wallet.balance -= cost
-        wallet.save()
+        try:
+            ledger.post(
+                wallet,
+                cost,
+                "debit",
+                reference=f"boost-{listing.id}-{timezone.now().timestamp()}",
+                description=f"Boost listing {listing.id} for {days} days",
+            )
+        except ledger.InsufficientFunds:
+            return Response({"detail": "Insufficient wallet balance"}, status=status.HTTP_400_BAD_REQUEST)
 
         listing.mark_as_boosted(days)
 
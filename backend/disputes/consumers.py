@@ -1,14 +1,100 @@
+import asyncio
 import json
+from urllib.parse import parse_qs
+
+from channels.generic.http import AsyncHttpConsumer
 from channels.generic.websocket import AsyncWebsocketConsumer
 
+from config.channels_auth import user_for_token
+from config.redis import get_async_redis
+
+from . import events
+
+
 class DisputeConsumer(AsyncWebsocketConsumer):
     async def connect(self):
-        await self.channel_layer.group_add("disputes", self.channel_name)
+        await self.channel_layer.group_add(events.GROUP, self.channel_name)
         await self.accept()
 
     async def disconnect(self, close_code):
-        await self.channel_layer.group_discard("disputes", self.channel_name)
+        await self.channel_layer.group_discard(events.GROUP, self.channel_name)
 
     async def dispute_created(self, event):
         # Push new dispute event to frontend
         await self.send(text_data=json.dumps(event))
+
+
+class DisputeEventStreamConsumer(AsyncHttpConsumer):
+    """
+    Server-Sent Events for admin clients (event: 'new_dispute', JSON data).
+    Auth: ?token=<access_token> (EventSource cannot send headers).
+
+    Joins the "disputes" channel-layer group, so it sees events from every
+    process, and replays from the Redis log after Last-Event-ID (header, or
+    ?last_event_id=) on reconnect. Between events the connection is just an
+    awaiting coroutine: no thread, no polling; a comment line is sent every
+    HEARTBEAT_SECONDS to keep proxies from closing it.
+    """
+
+    HEARTBEAT_SECONDS = 25
+
+    async def handle(self, body):
+        query = parse_qs(self.scope.get("query_string", b"").decode())
+        token = (query.get("token") or [None])[0]
+        if not token:
+            await self.send_response(403, b"token required", headers=[(b"Content-Type", b"text/plain")])
+            return
+        user = await user_for_token(token)
+        if user is None or not user.is_staff:
+            await self.send_response(403, b"only admins allowed", headers=[(b"Content-Type", b"text/plain")])
+            return
+
+        headers = dict(self.scope.get("headers") or [])
+        last_event_id = (headers.get(b"last-event-id") or b"").decode() or (query.get("last_event_id") or [None])[0]
+
+        self.last_sent = None
+        await self.channel_layer.group_add(events.GROUP, self.channel_name)
+        self.joined = True
+        await self.send_headers(headers=[
+            (b"Content-Type", b"text/event-stream"),
+            (b"Cache-Control", b"no-cache"),
+            (b"X-Accel-Buffering", b"no"),  # for nginx: disable buffering
+        ])
+        await self.send_body(b"retry: 10000\n\n", more_body=True)
+
+        # Live events queue on our channel while we replay; ids already sent are skipped
+        try:
+            backlog = await events.replay_since(get_async_redis(), last_event_id)
+        except Exception:
+            backlog = []
+        for event_id, event_type, payload in backlog:
+            await self._emit(event_id, event_type, payload)
+
+        self.heartbeat = asyncio.ensure_future(self._heartbeat())
+
+    async def _emit(self, event_id, event_type, payload):
+        if event_id and self.last_sent and events.stream_id_key(event_id) <= events.stream_id_key(self.last_sent):
+            return
+        name = events.SSE_EVENT_NAMES.get(event_type, event_type)
+        lines = f"event: {name}\n"
+        if event_id:
+            lines += f"id: {event_id}\n"
+            self.last_sent = event_id
+        lines += f"data: {json.dumps(payload)}\n\n"
+        await self.send_body(lines.encode("utf-8"), more_body=True)
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(self.HEARTBEAT_SECONDS)
+            await self.send_body(b": keep-alive\n\n", more_body=True)
+
+    async def dispute_created(self, message):
+        payload = {k: v for k, v in message.items() if k not in ("type", "event_id")}
+        await self._emit(message.get("event_id"), "dispute_created", payload)
+
+    async def disconnect(self):
+        heartbeat = getattr(self, "heartbeat", None)
+        if heartbeat:
+            heartbeat.cancel()
+        if getattr(self, "joined", False):
+            await self.channel_layer.group_discard(events.GROUP, self.channel_name)
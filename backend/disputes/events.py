@@ -0,0 +1,97 @@
+# backend/disputes/events.py
+"""
+Dispute event fan-out.
+
+publish() appends the event to a bounded Redis stream (the replay log, whose
+entry ids are the SSE event ids) and sends it to the "disputes" channel-layer
+group, which both the WebSocket consumer and the SSE consumer join. A
+reconnecting SSE client sends Last-Event-ID and gets everything after it from
+the stream before live events resume.
+"""
+import json
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+
+from config.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+GROUP = "disputes"
+REPLAY_STREAM = "disputes:events"
+REPLAY_MAXLEN = 1000
+REPLAY_LIMIT = 200  # max events sent on reconnect
+SNAPSHOT_SIZE = 20  # recent events sent to a fresh connection
+
+# channel-layer type -> SSE event name clients listen for
+SSE_EVENT_NAMES = {
+    "dispute_created": "new_dispute",
+}
+
+
+def dispute_to_event(dispute):
+    return {
+        "uid": dispute.uid,
+        "id": dispute.id,
+        "user_email": dispute.user.email,
+        "user": dispute.user.username,
+        "status": dispute.status,
+        "transaction_reference": dispute.transaction_reference,
+        "amount": str(dispute.amount) if dispute.amount is not None else None,
+        "reason": dispute.reason,
+        "created_at": dispute.created_at.isoformat(),
+    }
+
+
+def publish(event_type, payload):
+    """Log the event for replay and broadcast it to connected clients. Returns the event id."""
+    event_id = None
+    try:
+        event_id = get_redis().xadd(
+            REPLAY_STREAM,
+            {"event": event_type, "data": json.dumps(payload)},
+            maxlen=REPLAY_MAXLEN,
+            approximate=True,
+        )
+        event_id = event_id.decode() if isinstance(event_id, bytes) else event_id
+    except Exception as e:
+        logger.error(f"Failed to append dispute event to replay log: {e}")
+
+    try:
+        async_to_sync(get_channel_layer().group_send)(
+            GROUP,
+            {"type": event_type.replace("-", "_"), "event_id": event_id, **payload},
+        )
+    except Exception as e:
+        logger.error(f"Failed to broadcast dispute event: {e}")
+    return event_id
+
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+async def replay_since(redis_client, last_event_id, limit=REPLAY_LIMIT):
+    """
+    [(event_id, event_type, payload)] after `last_event_id` (exclusive), oldest
+    first. With no id, the most recent SNAPSHOT_SIZE events.
+    """
+    if last_event_id:
+        entries = await redis_client.xrange(REPLAY_STREAM, min=f"({last_event_id}", max="+", count=limit)
+    else:
+        entries = list(reversed(await redis_client.xrevrange(REPLAY_STREAM, count=SNAPSHOT_SIZE)))
+    events = []
+    for entry_id, fields in entries:
+        fields = {_decode(k): _decode(v) for k, v in fields.items()}
+        events.append((_decode(entry_id), fields.get("event"), json.loads(fields.get("data") or "{}")))
+    return events
+
+
+def stream_id_key(event_id):
+    """Sortable key for a Redis stream id ("ms-seq")."""
+    try:
+        ms, seq = event_id.split("-")
+        return int(ms), int(seq)
+    except (AttributeError, ValueError):
+        return (0, 0)
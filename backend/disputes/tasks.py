@@ -1,32 +1,37 @@
-import requests
-from django.core.mail import send_mail
 from django.conf import settings
 from celery import shared_task
+from notifications import outbox
 from .models import Dispute
 
 SLACK_WEBHOOK_URL = settings.SLACK_WEBHOOK_URL
 
 @shared_task
 def notify_admins_of_dispute(dispute_id):
+    # Queued with the same dedup key as the post_save alert, so a new dispute is announced once
     try:
         dispute = Dispute.objects.get(id=dispute_id)
+    except Dispute.DoesNotExist:
+        return
+    dedup_key = f"dispute-created:{dispute.uid}"
 
-        # Slack alert
-        if SLACK_WEBHOOK_URL:
-            payload = {
-                "text": f":rotating_light: New Dispute #{dispute.id}\n"
-                        f"User: {dispute.user.username}\n"
-                        f"Transaction: {dispute.transaction.reference}\n"
-                        f"Status: {dispute.status}"
-            }
-            requests.post(SLACK_WEBHOOK_URL, json=payload)
+    # Slack alert
+    if SLACK_WEBHOOK_URL:
+        outbox.enqueue(
+            "slack",
+            f":rotating_light: New Dispute #{dispute.id}",
+            f"User: {dispute.user.username}\n"
+            f"Transaction: {dispute.transaction_reference}\n"
+            f"Status: {dispute.status}",
+            dedup_key=dedup_key,
+        )
 
-        # Email alert
-        send_mail(
-            subject=f"New Dispute #{dispute.id}",
-            message=f"A new dispute has been raised by {dispute.user.username}.",
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[admin[1] for admin in settings.ADMINS],
+    # Email alert
+    recipients = [admin[1] for admin in settings.ADMINS]
+    if recipients:
+        outbox.enqueue(
+            "email",
+            f"New Dispute #{dispute.id}",
+            f"A new dispute has been raised by {dispute.user.username}.",
+            recipients=recipients,
+            dedup_key=dedup_key,
         )
-    except Dispute.DoesNotExist:
-        pass
@@ -1,12 +1,12 @@
 # backend/disputes/urls.py
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import DisputeViewSet, disputes_sse
+from .views import DisputeViewSet
 
 router = DefaultRouter()
 router.register(r"disputes", DisputeViewSet, basename="dispute")
 
 urlpatterns = [
     path("", include(router.urls)),
-    path("sse/", disputes_sse, name="disputes-sse"),
+    # sse/ is served by the ASGI app (config/asgi.py, DisputeEventStreamConsumer)
 ]
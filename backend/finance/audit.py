@@ -0,0 +1,144 @@
+# backend/finance/audit.py
+"""
+Batched TransactionAudit writer.
+
+Signals and bulk jobs only enqueue audit intents here. Inside a transaction the
+intents are held until it commits and then written with one bulk_create
+(transaction.on_commit); a rolled-back transaction drops them. Outside a
+transaction they are written immediately, unless a request-level batch()
+(see finance.middleware.AuditBatchMiddleware) is open, in which case they are
+written when it closes.
+
+A flush prices every row from the in-process fee schedule (finance.fees), resolves wallet/invoice/tenant
+uids with one query per source model, and relies on the unique
+wallet_transaction_id / payment_record_id constraints (ignore_conflicts) for
+idempotency instead of an exists() check per row.
+"""
+import logging
+import threading
+from contextlib import contextmanager
+
+from django.db import transaction
+
+from .models import TransactionAudit
+from .services import active_fee_configs, build_audit_for_payment_record, build_audit_for_wallet_tx
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+class AuditBatch:
+    def __init__(self):
+        self.wallet_txs = {}
+        self.payment_records = {}
+        self.audits = []
+
+    def __len__(self):
+        return len(self.wallet_txs) + len(self.payment_records) + len(self.audits)
+
+    def flush(self):
+        """Write the batch. Returns the number of audit rows sent to the database."""
+        if getattr(_local, "txn_batch", None) is self:
+            _local.txn_batch = None
+        if not len(self):
+            return 0
+        from payments.models import PaymentRecord
+        from wallet.models import WalletTransaction
+
+        fee_configs = active_fee_configs()
+        audits = list(self.audits)
+
+        # One query per source model; rows missing here were rolled back with a savepoint
+        if self.wallet_txs:
+            wallet_uids = dict(
+                WalletTransaction.objects.filter(pk__in=list(self.wallet_txs)).values_list("pk", "wallet__uid")
+            )
+            audits += [
+                build_audit_for_wallet_tx(tx, fee_configs, wallet_uid=wallet_uids[pk])
+                for pk, tx in self.wallet_txs.items()
+                if pk in wallet_uids
+            ]
+        if self.payment_records:
+            uids = {
+                pk: (invoice_uid, tenant_uid)
+                for pk, invoice_uid, tenant_uid in PaymentRecord.objects.filter(
+                    pk__in=list(self.payment_records)
+                ).values_list("pk", "invoice__uid", "tenant__uid")
+            }
+            audits += [
+                build_audit_for_payment_record(pay, fee_configs, invoice_uid=uids[pk][0], tenant_uid=uids[pk][1])
+                for pk, pay in self.payment_records.items()
+                if pk in uids
+            ]
+
+        try:
+            TransactionAudit.objects.bulk_create(audits, batch_size=500, ignore_conflicts=True)
+        except Exception as e:
+            # The money movement has already committed; never fail it over its audit
+            logger.error(f"Failed to write {len(audits)} transaction audits: {e}")
+            return 0
+        finally:
+            self.wallet_txs, self.payment_records, self.audits = {}, {}, []
+        return len(audits)
+
+
+def _scheduled(batch):
+    connection = transaction.get_connection()
+    return any(hook[1] == batch.flush for hook in connection.run_on_commit)
+
+
+def _current():
+    """The batch intents should join right now, or None to write immediately."""
+    connection = transaction.get_connection()
+    if connection.in_atomic_block:
+        batch = getattr(_local, "txn_batch", None)
+        # A batch whose hook is gone belonged to a transaction that rolled back
+        if batch is None or not _scheduled(batch):
+            batch = _local.txn_batch = AuditBatch()
+            transaction.on_commit(batch.flush)
+        return batch
+    return getattr(_local, "request_batch", None)
+
+
+def _add(kind, key, item):
+    batch = _current()
+    if batch is None:
+        batch = AuditBatch()
+        getattr(batch, kind)[key] = item
+        batch.flush()
+        return
+    getattr(batch, kind)[key] = item
+
+
+def enqueue_wallet_tx(tx):
+    _add("wallet_txs", tx.pk, tx)
+
+
+def enqueue_payment_record(pay):
+    _add("payment_records", pay.pk, pay)
+
+
+def enqueue(audits):
+    """Queue prebuilt (unsaved) TransactionAudit rows, e.g. from a bulk job."""
+    batch = _current()
+    if batch is None:
+        batch = AuditBatch()
+        batch.audits.extend(audits)
+        batch.flush()
+        return
+    batch.audits.extend(audits)
+
+
+@contextmanager
+def batch():
+    """Collect autocommit-mode intents until the block exits, then write them together."""
+    if getattr(_local, "request_batch", None) is not None:
+        yield _local.request_batch
+        return
+    _local.request_batch = AuditBatch()
+    try:
+        yield _local.request_batch
+    finally:
+        pending, _local.request_batch = _local.request_batch, None
+        pending.flush()
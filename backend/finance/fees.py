@@ -0,0 +1,102 @@
+# backend/finance/fees.py
+"""
+In-process fee schedule.
+
+All active FeeConfig rows (a handful of channels) are loaded once per process
+and kept in memory. Changes invalidate it two ways:
+  - FeeConfig post_save/post_delete (finance.signals) drop this process's copy
+    and bump a version key in the cache backend
+  - other processes compare that version at most every VERSION_CHECK_SECONDS
+    and reload when it moved
+
+So pricing a transaction costs no database round trip, and at most one cache
+read every few seconds.
+"""
+import logging
+import threading
+import time
+from collections import namedtuple
+from decimal import Decimal, ROUND_DOWN
+
+from django.core.cache import cache
+
+from .models import FeeConfig
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = "finance:fee_schedule:version"
+VERSION_CHECK_SECONDS = 5
+
+CENTS = Decimal("0.01")
+ZERO = Decimal("0.00")
+
+FeeRate = namedtuple("FeeRate", ["channel", "percent", "fixed"])
+
+
+class FeeSchedule:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rates = None
+        self._version = None
+        self._checked_at = 0.0
+
+    def _remote_version(self):
+        try:
+            return cache.get(VERSION_KEY, 0)
+        except Exception as e:
+            logger.warning(f"Fee schedule version check failed: {e}")
+            return self._version
+
+    def _load(self):
+        version = self._remote_version()
+        rates = {
+            fee.channel: FeeRate(fee.channel, fee.percent, fee.fixed)
+            for fee in FeeConfig.objects.filter(active=True)
+        }
+        self._rates, self._version, self._checked_at = rates, version, time.monotonic()
+        return rates
+
+    def rates(self):
+        """{channel: FeeRate} for active channels."""
+        rates = self._rates
+        if rates is not None and time.monotonic() - self._checked_at < VERSION_CHECK_SECONDS:
+            return rates
+        with self._lock:
+            if self._rates is None or self._remote_version() != self._version:
+                return self._load()
+            self._checked_at = time.monotonic()
+            return self._rates
+
+    def get(self, channel):
+        return self.rates().get(channel)
+
+    def invalidate(self):
+        """Drop this process's copy and tell other processes to reload."""
+        with self._lock:
+            self._rates = None
+        try:
+            cache.add(VERSION_KEY, 0, timeout=None)
+            cache.incr(VERSION_KEY)
+        except Exception as e:
+            logger.warning(f"Fee schedule version bump failed: {e}")
+
+
+schedule = FeeSchedule()
+
+
+def apply_rate(rate, gross_amount):
+    """(fee_amount, net_amount) for one amount under `rate` (a FeeRate/FeeConfig or None)."""
+    if not rate:
+        return ZERO, gross_amount.quantize(CENTS)
+    percent_fee = gross_amount * (rate.percent / Decimal("100.0"))
+    fee_amount = (percent_fee + rate.fixed).quantize(CENTS, rounding=ROUND_DOWN)
+    net = (gross_amount - fee_amount).quantize(CENTS, rounding=ROUND_DOWN)
+    if net < 0:
+        net = ZERO
+    return fee_amount, net
+
+
+def compute_fees(channel, amounts):
+    """[(fee_amount, net_amount), ...] for many amounts on one channel, one schedule lookup."""
+    rate = schedule.get(channel)
+    return [apply_rate(rate, Decimal(amount)) for amount in amounts]
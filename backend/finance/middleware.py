@@ -0,0 +1,17 @@
+# backend/finance/middleware.py
+from . import audit
+
+
+class AuditBatchMiddleware:
+    """
+    Collect transaction audits raised during a request and write them in one batch
+    when the response is ready. Audits raised inside a transaction are still
+    written when that transaction commits.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with audit.batch():
+            return self.get_response(request)
@@ -43,7 +43,7 @@ class FeeConfig(models.Model):
 class TransactionAudit(models.Model):
     """
     Canonical audit record for every money movement in the system.
-    It is created by signals when WalletTransaction or PaymentRecord is created.
+    It is created (in batches, see finance.audit) when a WalletTransaction or PaymentRecord is created.
     """
     STATUS_CHOICES = [("pending", "Pending"), ("success", "Success"), ("failed", "Failed")]
 
@@ -75,6 +75,21 @@ class TransactionAudit(models.Model):
             models.Index(fields=["uid"]),
             models.Index(fields=["reference"]),
             models.Index(fields=["channel"]),
+            models.Index(fields=["tenant_id", "-created_at", "-id"]),  # cursor-paged list
+            models.Index(fields=["-created_at", "-id"]),
+        ]
+        constraints = [
+            # One audit per source row; also the lookup index for these columns
+            models.UniqueConstraint(
+                fields=["wallet_transaction_id"],
+                condition=models.Q(wallet_transaction_id__isnull=False),
+                name="uniq_audit_wallet_transaction",
+            ),
+            models.UniqueConstraint(
+                fields=["payment_record_id"],
+                condition=models.Q(payment_record_id__isnull=False),
+                name="uniq_audit_payment_record",
+            ),
         ]
 
     def mark_success(self):
@@ -1,5 +1,6 @@
 # backend/finance/serializers.py
 from rest_framework import serializers
+from config.serializers import SparseFieldsetMixin
 from .models import FeeConfig, TransactionAudit, Dispute
 
 
@@ -10,7 +11,7 @@ class FeeConfigSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "created_at"]
 
 
-class TransactionAuditSerializer(serializers.ModelSerializer):
+class TransactionAuditSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = TransactionAudit
         fields = [
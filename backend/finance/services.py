@@ -1,29 +1,62 @@
 # backend/finance/services.py
-from decimal import Decimal, ROUND_DOWN
+from decimal import Decimal
 from django.db import transaction
-from .models import FeeConfig, TransactionAudit
+from . import fees
+from .models import TransactionAudit
 
 DEFAULT_CURRENCY = "NGN"
 
 
-def compute_fee(channel: str, gross_amount: Decimal) -> (Decimal, Decimal):
+_UNSET = object()
+
+
+def active_fee_configs():
+    """{channel: FeeRate} for all active channels (in-process schedule, see finance.fees)."""
+    return fees.schedule.rates()
+
+
+def compute_fee(channel: str, gross_amount: Decimal, fee=_UNSET) -> (Decimal, Decimal):
     """
     Returns (fee_amount, net_amount)
+    Pass `fee` (a FeeRate/FeeConfig or None) to skip the schedule lookup.
     """
-    try:
-        fee = FeeConfig.objects.filter(channel=channel, active=True).first()
-    except Exception:
-        fee = None
+    if fee is _UNSET:
+        try:
+            fee = fees.schedule.get(channel)
+        except Exception:
+            fee = None
+    return fees.apply_rate(fee, gross_amount)
 
-    if not fee:
-        return Decimal("0.00"), gross_amount.quantize(Decimal("0.01"))
 
-    percent_fee = (gross_amount * (fee.percent / Decimal("100.0")))
-    fee_amount = (percent_fee + fee.fixed).quantize(Decimal("0.01"), rounding=ROUND_DOWN)
-    net = (gross_amount - fee_amount).quantize(Decimal("0.01"), rounding=ROUND_DOWN)
-    if net < 0:
-        net = Decimal("0.00")
-    return fee_amount, net
+def wallet_tx_channel(tx):
+    return "wallet_transfer" if tx.txn_type in ("transfer", "debit", "fund", "auto_deduct") else "platform"
+
+
+def build_audit_for_wallet_tx(tx, fee_configs=None, wallet_uid=None):
+    """
+    Unsaved TransactionAudit for a WalletTransaction.
+    With `fee_configs` (see active_fee_configs) and `wallet_uid`, makes no queries,
+    so batches can bulk_create the result.
+    """
+    gross = Decimal(tx.amount or 0)
+    channel = wallet_tx_channel(tx)
+    if fee_configs is None:
+        fee_amount, net = compute_fee(channel, gross)
+    else:
+        fee_amount, net = compute_fee(channel, gross, fee_configs.get(channel))
+    return TransactionAudit(
+        wallet_transaction_id=getattr(tx, "uid", str(getattr(tx, "id", ""))),
+        source_wallet_uid=wallet_uid if wallet_uid is not None else getattr(tx.wallet, "uid", None),
+        destination_wallet_uid=None,
+        channel=channel,
+        gross_amount=gross,
+        fee_amount=fee_amount,
+        net_amount=net,
+        currency=DEFAULT_CURRENCY,
+        reference=tx.reference,
+        status="success" if tx.status == "success" else "pending",
+        meta={"txn_type": tx.txn_type, "description": tx.description},
+    )
 
 
 def create_audit_from_wallet_tx(tx):
@@ -31,56 +64,59 @@ def create_audit_from_wallet_tx(tx):
     tx : instance of wallet.models.WalletTransaction
     Creates TransactionAudit representing that wallet txn.
     """
-    gross = Decimal(tx.amount or 0)
-    channel = "wallet_transfer" if tx.txn_type in ("transfer", "debit", "fund", "auto_deduct") else "platform"
-    fee_amount, net = compute_fee(channel, gross)
     with transaction.atomic():
-        audit = TransactionAudit.objects.create(
-            wallet_transaction_id=getattr(tx, "uid", str(getattr(tx, "id", ""))),
-            source_wallet_uid=getattr(tx.wallet, "uid", None),
-            destination_wallet_uid=None,
-            channel=channel,
-            gross_amount=gross,
-            fee_amount=fee_amount,
-            net_amount=net,
-            currency=DEFAULT_CURRENCY,
-            reference=tx.reference,
-            status="success" if tx.status == "success" else "pending",
-            meta={"txn_type": tx.txn_type, "description": tx.description},
-        )
+        audit = build_audit_for_wallet_tx(tx)
+        audit.save()
     return audit
 
 
-def create_audit_from_payment_record(pay):
-    """
-    pay: instance of payments.models.PaymentRecord
-    """
-    gross = Decimal(pay.amount or 0)
-    # determine channel
+def payment_record_channel(pay):
     if pay.method in ("wallet_manual", "wallet_auto"):
-        channel = "wallet_transfer"
+        return "wallet_transfer"
     elif pay.method in ("bank", "card", "external_gateway"):
-        channel = "paystack"
+        return "paystack"
     elif pay.method == "cash":
-        channel = "platform"
+        return "platform"
+    return "platform"
+
+
+def build_audit_for_payment_record(pay, fee_configs=None, invoice_uid=_UNSET, tenant_uid=_UNSET):
+    """
+    Unsaved TransactionAudit for a PaymentRecord.
+    With `fee_configs`, `invoice_uid` and `tenant_uid` supplied, makes no queries.
+    """
+    gross = Decimal(pay.amount or 0)
+    channel = payment_record_channel(pay)
+    if fee_configs is None:
+        fee_amount, net = compute_fee(channel, gross)
     else:
-        channel = "platform"
+        fee_amount, net = compute_fee(channel, gross, fee_configs.get(channel))
+    if invoice_uid is _UNSET:
+        invoice_uid = getattr(pay.invoice, "uid", None) if getattr(pay, "invoice", None) else None
+    if tenant_uid is _UNSET:
+        tenant_uid = getattr(pay.tenant, "uid", None) if getattr(pay, "tenant", None) else None
+    return TransactionAudit(
+        payment_record_id=getattr(pay, "uid", str(getattr(pay, "id", ""))),
+        source_wallet_uid=None,
+        destination_wallet_uid=None,
+        invoice_uid=invoice_uid,
+        tenant_id=tenant_uid,
+        channel=channel,
+        gross_amount=gross,
+        fee_amount=fee_amount,
+        net_amount=net,
+        currency=DEFAULT_CURRENCY,
+        reference=getattr(pay, "reference", None),
+        status="success" if pay.status == "success" else "pending",
+        meta={"payment_method": pay.method},
+    )
+
 
-    fee_amount, net = compute_fee(channel, gross)
+def create_audit_from_payment_record(pay):
+    """
+    pay: instance of payments.models.PaymentRecord
+    """
     with transaction.atomic():
-        audit = TransactionAudit.objects.create(
-            payment_record_id=getattr(pay, "uid", str(getattr(pay, "id", ""))),
-            source_wallet_uid=None,
-            destination_wallet_uid=None,
-            invoice_uid=getattr(pay.invoice, "uid", None) if getattr(pay, "invoice", None) else None,
-            tenant_id=getattr(pay.tenant, "uid", None) if getattr(pay, "tenant", None) else None,
-            channel=channel,
-            gross_amount=gross,
-            fee_amount=fee_amount,
-            net_amount=net,
-            currency=DEFAULT_CURRENCY,
-            reference=getattr(pay, "reference", None),
-            status="success" if pay.status == "success" else "pending",
-            meta={"payment_method": pay.method},
-        )
+        audit = build_audit_for_payment_record(pay)
+        audit.save()
     return audit
@@ -6,6 +6,8 @@ from django.shortcuts import get_object_or_404
 from django.db import transaction
 from django.utils.timezone import now
 
+from config.pagination import CreatedAtCursorPagination
+
 from .models import FeeConfig, TransactionAudit, Dispute
 from .serializers import FeeConfigSerializer, TransactionAuditSerializer, DisputeSerializer
 
@@ -28,6 +30,7 @@ class TransactionAuditViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = TransactionAudit.objects.all().order_by("-created_at")
     serializer_class = TransactionAuditSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CreatedAtCursorPagination
 
     def get_queryset(self):
         user = self.request.user
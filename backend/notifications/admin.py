@@ -0,0 +1,12 @@
+# backend/notifications/admin.py
+from django.contrib import admin
+
+from .models import OutboxMessage
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ("subject", "channel", "status", "attempts", "created_at", "sent_at")
+    search_fields = ("subject", "dedup_key")
+    list_filter = ("channel", "status")
+    readonly_fields = ("created_at", "sent_at")
@@ -0,0 +1,49 @@
+# backend/notifications/models.py
+from django.db import models
+from django.utils import timezone
+
+
+class OutboxMessage(models.Model):
+    """
+    A queued admin notification. Rows are written by notifications.outbox.enqueue
+    and sent (coalesced into digests) by notifications.tasks.flush_outbox.
+    """
+    CHANNELS = [
+        ("slack", "Slack"),
+        ("email", "Email"),
+    ]
+    STATUS = [
+        ("pending", "Pending"),
+        ("sending", "Sending"),  # claimed by a flush; lease until next_attempt_at
+        ("sent", "Sent"),
+        ("failed", "Failed"),  # gave up after MAX_ATTEMPTS
+    ]
+
+    channel = models.CharField(max_length=10, choices=CHANNELS)
+    recipients = models.JSONField(default=list, blank=True)  # email addresses; empty for slack
+    subject = models.CharField(max_length=255)
+    body = models.TextField(blank=True)
+    # Same key while pending (or being sent) -> stored once
+    dedup_key = models.CharField(max_length=255, blank=True, default="")
+    status = models.CharField(max_length=10, choices=STATUS, default="pending")
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["created_at"]
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"]),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["channel", "dedup_key"],
+                condition=models.Q(status__in=("pending", "sending")) & ~models.Q(dedup_key=""),
+                name="uniq_pending_outbox_dedup_key",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.channel}: {self.subject} ({self.status})"
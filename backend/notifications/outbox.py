@@ -0,0 +1,181 @@
+# backend/notifications/outbox.py
+"""
+Notification outbox.
+
+Callers enqueue() instead of talking to Slack/SMTP: the message is a row
+written in the caller's transaction (so a rolled-back request notifies nobody),
+deduplicated by dedup_key while pending. A flush is scheduled WINDOW_SECONDS
+after the first message of a burst (plus a per-minute beat sweep), and flush()
+coalesces everything due into one digest per channel and recipient list, sent
+over a single SMTP connection / pooled HTTP session. Messages are claimed
+("sending", with a lease) in a short transaction and sent after it commits,
+so a slow SMTP server or Slack never holds row locks or an open transaction.
+"""
+import logging
+from datetime import timedelta
+from itertools import groupby
+
+import requests
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+
+from .models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+WINDOW_SECONDS = 30
+FLUSH_LIMIT = 500
+DIGEST_MAX = 50  # messages per digest
+MAX_ATTEMPTS = 5
+SEND_LEASE_SECONDS = 15 * 60  # a flush that died mid-send releases its messages after this
+SLACK_TIMEOUT = (3.05, 10)
+FLUSH_SCHEDULED_KEY = "notifications:flush_scheduled"
+
+_session = None
+
+
+def _slack_session():
+    global _session
+    if _session is None:
+        _session = requests.Session()
+    return _session
+
+
+def enqueue(channel, subject, body="", recipients=None, dedup_key=""):
+    """Queue one message for `channel` ("slack" or "email"). A duplicate dedup_key still pending or being sent is dropped."""
+    OutboxMessage.objects.bulk_create(
+        [OutboxMessage(channel=channel, subject=subject[:255], body=body, recipients=list(recipients or []),
+                       dedup_key=dedup_key)],
+        ignore_conflicts=True,
+    )
+    transaction.on_commit(_schedule_flush)
+
+
+def _schedule_flush():
+    """One delayed flush per window; messages arriving meanwhile ride along."""
+    from config.redis import get_redis
+
+    from .tasks import flush_outbox
+
+    try:
+        if get_redis().set(FLUSH_SCHEDULED_KEY, 1, nx=True, ex=WINDOW_SECONDS):
+            flush_outbox.apply_async(countdown=WINDOW_SECONDS)
+    except Exception as e:
+        # The beat sweep picks the message up
+        logger.error(f"Failed to schedule notification flush: {e}")
+
+
+def _digest(messages):
+    if len(messages) == 1:
+        return messages[0].subject, messages[0].body
+    subject = f"[{len(messages)} notifications] {messages[0].subject}"
+    body = "\n\n---\n\n".join(f"{m.subject}\n{m.body}".strip() for m in messages)
+    return subject[:255], body
+
+
+def _send_slack(messages):
+    url = getattr(settings, "SLACK_WEBHOOK_URL", None)
+    if not url:
+        return
+    subject, body = _digest(messages)
+    resp = _slack_session().post(url, json={"text": f"*{subject}*\n{body}"}, timeout=SLACK_TIMEOUT)
+    resp.raise_for_status()
+
+
+def _send_email(connection, messages):
+    recipients = messages[0].recipients
+    if not recipients:
+        return
+    subject, body = _digest(messages)
+    EmailMessage(subject, body, settings.DEFAULT_FROM_EMAIL, recipients, connection=connection).send()
+
+
+def _group_key(message):
+    return message.channel, tuple(sorted(message.recipients or []))
+
+
+def _claim(limit, now):
+    """
+    Lease up to `limit` due messages (pending, or "sending" with an expired lease from a
+    worker that died) in one short transaction, so no lock is held while sending.
+    """
+    with transaction.atomic():
+        due = list(
+            OutboxMessage.objects.select_for_update(skip_locked=True)
+            .filter(status__in=("pending", "sending"), next_attempt_at__lte=now)
+            .order_by("channel", "created_at")[:limit]
+        )
+        lease_until = now + timedelta(seconds=SEND_LEASE_SECONDS)
+        OutboxMessage.objects.filter(pk__in=[m.pk for m in due]).update(status="sending", next_attempt_at=lease_until)
+    for m in due:
+        m.status, m.next_attempt_at = "sending", lease_until
+    return due
+
+
+def flush(limit=FLUSH_LIMIT):
+    """Send due messages as digests. Returns {"sent": n, "failed": n} (counted in messages)."""
+    now = timezone.now()
+    sent = failed = 0
+    connection = None
+    due = _claim(limit, now)
+    groups = [list(g) for _, g in groupby(sorted(due, key=_group_key), key=_group_key)]
+    try:
+        for group in groups:
+            for start in range(0, len(group), DIGEST_MAX):
+                chunk = group[start:start + DIGEST_MAX]
+                try:
+                    if chunk[0].channel == "email":
+                        if connection is None:
+                            connection = get_connection()
+                            connection.open()
+                        _send_email(connection, chunk)
+                    else:
+                        _send_slack(chunk)
+                except Exception as e:
+                    logger.error(f"Notification digest ({chunk[0].channel}, {len(chunk)} messages) failed: {e}")
+                    _mark_failed(chunk, e, now)
+                    failed += len(chunk)
+                else:
+                    OutboxMessage.objects.filter(pk__in=[m.pk for m in chunk]).update(
+                        status="sent", sent_at=timezone.now()
+                    )
+                    sent += len(chunk)
+    finally:
+        if connection is not None:
+            connection.close()
+    return {"sent": sent, "failed": failed}
+
+
+def _mark_failed(messages, error, now):
+    for m in messages:
+        m.attempts += 1
+        m.last_error = str(error)[:2000]
+        if m.attempts >= MAX_ATTEMPTS:
+            m.status = "failed"
+        else:
+            m.status = "pending"
+            m.next_attempt_at = now + timedelta(seconds=WINDOW_SECONDS * 2 ** m.attempts)
+    OutboxMessage.objects.bulk_update(messages, ["attempts", "last_error", "status", "next_attempt_at"])
+
+
+def metrics():
+    """Queue depth per channel, age of the oldest pending message, and recent throughput."""
+    now = timezone.now()
+    pending = OutboxMessage.objects.filter(status__in=("pending", "sending"))
+    depth = {row["channel"]: row["n"] for row in pending.values("channel").annotate(n=Count("id"))}
+    oldest = pending.aggregate(oldest=Min("created_at"))["oldest"]
+    last_hour = OutboxMessage.objects.filter(created_at__gte=now - timedelta(hours=1)).aggregate(
+        queued=Count("id"),
+        sent=Count("id", filter=Q(status="sent")),
+    )
+    return {
+        "pending": sum(depth.values()),
+        "pending_by_channel": depth,
+        "retrying": pending.filter(attempts__gt=0).count(),
+        "failed": OutboxMessage.objects.filter(status="failed").count(),
+        "oldest_pending_age_seconds": (now - oldest).total_seconds() if oldest else None,
+        "last_hour": last_hour,
+    }
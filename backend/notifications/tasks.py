@@ -0,0 +1,10 @@
+# backend/notifications/tasks.py
+from celery import shared_task
+
+
+@shared_task
+def flush_outbox():
+    """Send everything due in the notification outbox, one digest per channel and recipient list."""
+    from . import outbox
+
+    return outbox.flush()
@@ -0,0 +1,8 @@
+# backend/notifications/urls.py
+from django.urls import path
+
+from .views import OutboxMetricsView
+
+urlpatterns = [
+    path("outbox/metrics/", OutboxMetricsView.as_view(), name="notifications-outbox-metrics"),
+]
@@ -1,30 +1,18 @@
-import requests
-from django.core.mail import send_mail
 from django.conf import settings
 
-def notify_admins(subject, message):
+from . import outbox
+
+
+def notify_admins(subject, message, dedup_key=""):
     """
-    Send Slack + Email notifications to admins.
+    Queue Slack + Email notifications to admins (sent in digests by notifications.tasks.flush_outbox).
     """
 
     # Slack Notification
-    slack_url = getattr(settings, "SLACK_WEBHOOK_URL", None)
-    if slack_url:
-        try:
-            requests.post(slack_url, json={"text": f"*{subject}*\n{message}"}, timeout=5)
-        except Exception:
-            pass
+    if getattr(settings, "SLACK_WEBHOOK_URL", None):
+        outbox.enqueue("slack", subject, message, dedup_key=dedup_key)
 
     # Email Notification
     admin_emails = getattr(settings, "ADMIN_EMAILS", [])
     if admin_emails:
-        try:
-            send_mail(
-                subject,
-                message,
-                settings.DEFAULT_FROM_EMAIL,
-                admin_emails,
-                fail_silently=True,
-            )
-        except Exception:
-            pass
+        outbox.enqueue("email", subject, message, recipients=admin_emails, dedup_key=dedup_key)
@@ -0,0 +1,13 @@
+# backend/notifications/views.py
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from . import outbox
+
+
+class OutboxMetricsView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(outbox.metrics())
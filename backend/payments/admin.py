@@ -1,5 +1,14 @@
 from django.contrib import admin
-from .models import PaymentRecord, Prepayment, PaymentAllocation
+from .models import (
+    PaymentAllocation,
+    PaymentRecord,
+    Prepayment,
+    ReconciliationDiscrepancy,
+    ReconciliationRun,
+    WebhookDeadLetter,
+    WebhookEvent,
+)
+from . import webhooks
 
 @admin.register(PaymentRecord)
 class PaymentRecordAdmin(admin.ModelAdmin):
@@ -23,3 +32,38 @@ class PaymentAllocationAdmin(admin.ModelAdmin):
     search_fields = ("uid", "prepayment__uid", "invoice__uid")
     list_filter = ("allocated_at",)
     readonly_fields = ("uid", "allocated_at")
+
+
+@admin.register(WebhookEvent)
+class WebhookEventAdmin(admin.ModelAdmin):
+    list_display = ("event_id", "provider", "event_type", "reference", "status", "attempts", "received_at", "processed_at")
+    search_fields = ("event_id", "reference")
+    list_filter = ("provider", "status", "event_type")
+    readonly_fields = ("received_at", "processed_at")
+
+
+@admin.register(WebhookDeadLetter)
+class WebhookDeadLetterAdmin(admin.ModelAdmin):
+    list_display = ("event", "event_type", "reference", "attempts", "created_at", "resolved_at")
+    search_fields = ("event__event_id", "reference")
+    list_filter = ("event_type", "resolved_at")
+    actions = ["replay"]
+
+    @admin.action(description="Replay selected events")
+    def replay(self, request, queryset):
+        for dead_letter in queryset.filter(resolved_at__isnull=True):
+            webhooks.replay_dead_letter(dead_letter)
+
+
+@admin.register(ReconciliationRun)
+class ReconciliationRunAdmin(admin.ModelAdmin):
+    list_display = ("uid", "source", "period_start", "period_end", "status", "fetched", "matched", "discrepancies", "started_at")
+    list_filter = ("source", "status")
+    readonly_fields = ("uid", "started_at", "finished_at")
+
+
+@admin.register(ReconciliationDiscrepancy)
+class ReconciliationDiscrepancyAdmin(admin.ModelAdmin):
+    list_display = ("reference", "kind", "internal_model", "gateway_amount", "internal_amount", "gateway_status", "internal_status", "resolved_at")
+    search_fields = ("reference", "internal_uid")
+    list_filter = ("kind", "internal_model")
@@ -0,0 +1,33 @@
+# backend/payments/management/commands/backfill_collection_rollups.py
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from payments import rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild CollectionRollup from the raw payment and invoice tables, from the oldest row "
+        "(or --start) through yesterday. Run once after deploying rollups; safe to re-run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", help="First day (YYYY-MM-DD), defaults to the oldest payment/invoice")
+        parser.add_argument("--end", help="Last day (YYYY-MM-DD), defaults to yesterday")
+
+    def handle(self, *args, **options):
+        try:
+            start = date.fromisoformat(options["start"]) if options["start"] else rollups.earliest_day()
+            end = date.fromisoformat(options["end"]) if options["end"] else timezone.localdate() - timedelta(days=1)
+        except ValueError as e:
+            raise CommandError(f"Invalid date: {e}")
+        if start is None:
+            self.stdout.write("No payments or invoices yet; nothing to rebuild.")
+            return
+        if start > end:
+            raise CommandError(f"--start {start} is after --end {end}")
+
+        written = rollups.rebuild(start, end)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {(end - start).days + 1} days ({start} to {end}): {written} buckets"))
@@ -0,0 +1,38 @@
+# backend/payments/management/commands/reconcile_settlement.py
+import os
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from payments import reconciliation
+
+
+class Command(BaseCommand):
+    help = "Reconcile a Paystack settlement CSV (reference, amount, status) against internal references."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Settlement CSV export")
+        parser.add_argument("--start", required=True, help="Period start (YYYY-MM-DD)")
+        parser.add_argument("--end", help="Period end (YYYY-MM-DD), defaults to --start")
+        parser.add_argument("--page-size", type=int, default=reconciliation.PAGE_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            start = date.fromisoformat(options["start"])
+            end = date.fromisoformat(options["end"]) if options["end"] else start
+        except ValueError as e:
+            raise CommandError(f"Invalid date: {e}")
+        path = options["path"]
+        if not os.path.exists(path):
+            raise CommandError(f"No such file: {path}")
+
+        with open(path, "rb") as fileobj:
+            run = reconciliation.reconcile_settlement_csv(
+                fileobj, start, end, source_name=os.path.basename(path), page_size=options["page_size"]
+            )
+        self.stdout.write(
+            f"{run.uid} {run.status}: {run.fetched} rows, {run.matched} matched, "
+            f"{run.discrepancies} discrepancies"
+        )
+        if run.status == "failed":
+            raise CommandError(run.error)
@@ -4,6 +4,7 @@ from django.db import models, transaction
 from django.conf import settings
 from django.utils import timezone
 from django.db.models import Sum
+from .rollups import RollupStatusMixin
 
 def generate_uid(prefix: str) -> str:
     return f"{prefix}-{uuid.uuid4().hex[:10].upper()}"
@@ -61,7 +62,7 @@ class Prepayment(models.Model):
         return to_apply
 
 
-class PaymentRecord(models.Model):
+class PaymentRecord(RollupStatusMixin, models.Model):
     """
     Canonical Payment record used by the whole system.
     """
@@ -105,6 +106,8 @@ class PaymentRecord(models.Model):
             models.Index(fields=["uid"]),
             models.Index(fields=["invoice"]),
             models.Index(fields=["tenant"]),
+            models.Index(fields=["reference"]),
+            models.Index(fields=["tenant", "-created_at", "-id"]),  # cursor-paged list
         ]
 
     def __str__(self):
@@ -191,3 +194,170 @@ class PaymentAllocation(models.Model):
 
     def __str__(self):
         return f"Alloc {self.uid} - {self.prepayment.uid} -> {self.invoice.uid} : {self.amount}"
+
+
+class CollectionRollup(models.Model):
+    """
+    Daily collection ledger: one row per (day, source, property, manager, method, currency).
+    Maintained incrementally by payments.rollups on payment/invoice saves and rebuilt
+    nightly from the raw tables. Reports read closed days from here.
+    """
+    SOURCE_CHOICES = [
+        ("rent", "Rent (rents.RentPayment / RentInvoice)"),
+        ("bills", "Bills (payments.PaymentRecord / bills.Invoice)"),
+    ]
+
+    # Natural key of the bucket; see payments.rollups.bucket_key (nullable parts make a
+    # plain unique_together unusable)
+    key = models.CharField(max_length=160, unique=True)
+    day = models.DateField()
+    source = models.CharField(max_length=10, choices=SOURCE_CHOICES)
+    property = models.ForeignKey("properties.Property", on_delete=models.CASCADE, null=True, blank=True, related_name="collection_rollups")
+    manager = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="collection_rollups")
+    method = models.CharField(max_length=30, blank=True)  # blank for invoice-only buckets
+    currency = models.CharField(max_length=8, default="NGN")
+    collected = models.DecimalField(max_digits=18, decimal_places=2, default=Decimal("0.00"))
+    payments_count = models.PositiveIntegerField(default=0)
+    invoiced = models.DecimalField(max_digits=18, decimal_places=2, default=Decimal("0.00"))
+    invoices_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-day"]
+        indexes = [
+            models.Index(fields=["source", "day"]),
+            models.Index(fields=["property", "day"]),
+            models.Index(fields=["manager", "day"]),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.source} {self.property_id or '-'} {self.method or '-'}: {self.collected}"
+
+
+class WebhookEvent(models.Model):
+    """
+    Raw gateway webhook, stored durably before any processing.
+    event_id is unique, so a redelivered webhook is recorded once. Processing
+    happens in payments.tasks (see payments.webhooks), in order per reference.
+    """
+    EVENT_STATUS = [
+        ("pending", "Pending"),
+        ("processing", "Processing"),
+        ("processed", "Processed"),
+        ("failed", "Failed"),  # will be retried
+        ("dead", "Dead"),  # gave up, see WebhookDeadLetter
+    ]
+
+    provider = models.CharField(max_length=30, default="paystack")
+    event_id = models.CharField(max_length=255, unique=True)
+    event_type = models.CharField(max_length=100)
+    reference = models.CharField(max_length=255, blank=True, default="")
+    payload = models.JSONField()
+    status = models.CharField(max_length=20, choices=EVENT_STATUS, default="pending")
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    received_at = models.DateTimeField(default=timezone.now)
+    next_attempt_at = models.DateTimeField(null=True, blank=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["received_at"]
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"]),
+            models.Index(fields=["reference", "id"]),
+            models.Index(fields=["received_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.provider} {self.event_type} {self.event_id} ({self.status})"
+
+    def mark_processed(self, success=True):
+        self.status = "processed" if success else "failed"
+        self.processed_at = timezone.now()
+        self.save(update_fields=["status", "processed_at"])
+
+
+class WebhookDeadLetter(models.Model):
+    """A webhook event that exhausted its retries; kept for inspection and manual replay."""
+    event = models.OneToOneField(WebhookEvent, on_delete=models.CASCADE, related_name="dead_letter")
+    event_type = models.CharField(max_length=100)
+    reference = models.CharField(max_length=255, blank=True, default="")
+    payload = models.JSONField()
+    error = models.TextField(blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    resolved_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"Dead webhook {self.event.event_id}: {self.error[:60]}"
+
+
+class ReconciliationRun(models.Model):
+    """
+    One reconciliation pass of gateway transactions (Paystack API pages or a
+    settlement CSV) for a period against our references. `cursor` is the last
+    page/row committed, so an interrupted run resumes where it stopped.
+    """
+    SOURCE_CHOICES = [("paystack_api", "Paystack API"), ("settlement_csv", "Settlement CSV")]
+    STATUS_CHOICES = [("running", "Running"), ("completed", "Completed"), ("failed", "Failed")]
+
+    uid = models.CharField(max_length=40, unique=True, default=lambda: generate_uid("REC"))
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES)
+    period_start = models.DateField()
+    period_end = models.DateField()
+    source_name = models.CharField(max_length=255, blank=True, help_text="CSV file name, if any")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="running")
+    cursor = models.PositiveIntegerField(default=0)
+    fetched = models.PositiveIntegerField(default=0)
+    matched = models.PositiveIntegerField(default=0)
+    discrepancies = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-started_at"]
+        indexes = [
+            models.Index(fields=["source", "period_start", "period_end"]),
+        ]
+
+    def __str__(self):
+        return f"Reconciliation {self.uid} {self.source} {self.period_start}..{self.period_end} ({self.status})"
+
+
+class ReconciliationDiscrepancy(models.Model):
+    KIND_CHOICES = [
+        ("missing_internal", "No matching internal record"),
+        ("amount_mismatch", "Amount differs"),
+        ("status_mismatch", "Status differs"),
+    ]
+
+    run = models.ForeignKey(ReconciliationRun, on_delete=models.CASCADE, related_name="discrepancy_rows")
+    reference = models.CharField(max_length=255)
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    internal_model = models.CharField(max_length=50, blank=True)  # e.g. "payments.PaymentRecord"
+    internal_uid = models.CharField(max_length=64, blank=True)
+    gateway_amount = models.DecimalField(max_digits=18, decimal_places=2, null=True, blank=True)
+    internal_amount = models.DecimalField(max_digits=18, decimal_places=2, null=True, blank=True)
+    gateway_status = models.CharField(max_length=30, blank=True)
+    internal_status = models.CharField(max_length=30, blank=True)
+    raw = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    resolved_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        constraints = [
+            # Re-processing a page after a crash cannot duplicate rows
+            models.UniqueConstraint(fields=["run", "reference", "kind"], name="uniq_reconciliation_discrepancy"),
+        ]
+        indexes = [
+            models.Index(fields=["reference"]),
+            models.Index(fields=["kind", "resolved_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.reference} ({self.run.uid})"
@@ -0,0 +1,252 @@
+# backend/payments/reconciliation.py
+"""
+Gateway reconciliation.
+
+A ReconciliationRun walks gateway transactions for a period page by page, from
+the Paystack API (list_transactions) or a settlement CSV export, and matches
+each page in bulk:
+
+  - one `reference__in` query per internal table (WalletTransaction,
+    PaymentRecord, BoostPurchase), loaded into a dict keyed by reference
+  - amounts and statuses compared in memory
+  - discrepancies written with one bulk_create per page (unique per run,
+    reference and kind, so a re-processed page adds nothing)
+  - the run's cursor and counters advance in the same transaction as the page,
+    so a crashed run resumes at the next unprocessed page
+
+One summary alert per run replaces per-event admin notifications.
+"""
+import csv
+import io
+import logging
+from datetime import datetime, time
+from decimal import Decimal, InvalidOperation
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ReconciliationDiscrepancy, ReconciliationRun
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 200
+CENTS = Decimal("0.01")
+
+# (model label, amount field, status field), searched in this order for a reference
+INTERNAL_SOURCES = [
+    ("payments.PaymentRecord", "amount", "status"),
+    ("wallet.WalletTransaction", "amount", "status"),
+    ("properties.BoostPurchase", "amount", "status"),
+]
+
+# Paystack status -> the internal status it should correspond to
+STATUS_MAP = {
+    "success": "success",
+    "failed": "failed",
+    "abandoned": "failed",
+    "reversed": "failed",
+}
+
+
+def normalize_gateway_row(row):
+    """Paystack API transaction -> {reference, amount (naira), status, raw}."""
+    return {
+        "reference": str(row.get("reference") or ""),
+        "amount": (Decimal(row.get("amount") or 0) / 100).quantize(CENTS),
+        "status": (row.get("status") or "").lower(),
+        "raw": {k: row.get(k) for k in ("id", "reference", "amount", "status", "currency", "paid_at", "channel")},
+    }
+
+
+def normalize_csv_row(row):
+    """
+    Settlement CSV row -> same shape. Expects reference, amount (naira) and status
+    columns (case-insensitive); amount_kobo is accepted instead of amount.
+    """
+    row = {(k or "").strip().lower(): (v or "").strip() for k, v in row.items()}
+    try:
+        if row.get("amount_kobo"):
+            amount = Decimal(row["amount_kobo"]) / 100
+        else:
+            amount = Decimal(row.get("amount") or "0")
+    except InvalidOperation:
+        amount = Decimal("0")
+    return {
+        "reference": row.get("reference") or row.get("transaction_reference") or "",
+        "amount": amount.quantize(CENTS),
+        "status": (row.get("status") or "success").lower(),
+        "raw": row,
+    }
+
+
+def internal_index(references):
+    """{reference: (label, uid, amount, status)} for all internal rows with these references."""
+    index = {}
+    refs = list(references)
+    for label, amount_field, status_field in INTERNAL_SOURCES:
+        model = apps.get_model(label)
+        rows = model.objects.filter(reference__in=refs).values_list("reference", "uid", amount_field, status_field)
+        for reference, uid, amount, status in rows:
+            current = index.get(reference)
+            # Prefer a successful row when a reference has several attempts
+            if current is None or (current[3] != "success" and status == "success"):
+                index[reference] = (label, uid, amount, status)
+    return index
+
+
+def match_page(run, rows):
+    """Match one page of normalized gateway rows. Returns (matched, discrepancies) objects."""
+    rows = [r for r in rows if r["reference"]]
+    index = internal_index({r["reference"] for r in rows})
+    matched = 0
+    discrepancies = []
+    for row in rows:
+        found = index.get(row["reference"])
+        if found is None:
+            # Only money we actually received matters when nothing internal refers to it
+            if row["status"] == "success":
+                discrepancies.append(ReconciliationDiscrepancy(
+                    run=run, reference=row["reference"], kind="missing_internal",
+                    gateway_amount=row["amount"], gateway_status=row["status"], raw=row["raw"],
+                ))
+            continue
+        label, uid, amount, status = found
+        base = dict(
+            run=run, reference=row["reference"], internal_model=label, internal_uid=uid,
+            gateway_amount=row["amount"], internal_amount=amount,
+            gateway_status=row["status"], internal_status=status, raw=row["raw"],
+        )
+        ok = True
+        if amount is not None and Decimal(amount).quantize(CENTS) != row["amount"]:
+            discrepancies.append(ReconciliationDiscrepancy(kind="amount_mismatch", **base))
+            ok = False
+        expected = STATUS_MAP.get(row["status"])
+        if expected and status != expected:
+            discrepancies.append(ReconciliationDiscrepancy(kind="status_mismatch", **base))
+            ok = False
+        matched += ok
+    return matched, discrepancies
+
+
+def commit_page(run, cursor, fetched, matched, discrepancies):
+    """Write a page's discrepancies and advance the run cursor atomically."""
+    with transaction.atomic():
+        ReconciliationDiscrepancy.objects.bulk_create(discrepancies, ignore_conflicts=True)
+        ReconciliationRun.objects.filter(pk=run.pk).update(
+            cursor=cursor,
+            fetched=F("fetched") + fetched,
+            matched=F("matched") + matched,
+            discrepancies=F("discrepancies") + len(discrepancies),
+        )
+
+
+def start_run(source, period_start, period_end, source_name=""):
+    """The unfinished (running or failed) run for this source/period, to resume, or a new one."""
+    run = (
+        ReconciliationRun.objects.filter(
+            source=source, period_start=period_start, period_end=period_end,
+            source_name=source_name, status__in=("running", "failed"),
+        )
+        .order_by("-started_at")
+        .first()
+    )
+    if run is not None:
+        if run.status == "failed":
+            ReconciliationRun.objects.filter(pk=run.pk).update(status="running", error="")
+            run.status, run.error = "running", ""
+        return run
+    return ReconciliationRun.objects.create(
+        source=source, period_start=period_start, period_end=period_end, source_name=source_name
+    )
+
+
+def _finish(run, error=None):
+    if error:
+        ReconciliationRun.objects.filter(pk=run.pk).update(status="failed", error=str(error)[:2000])
+    else:
+        ReconciliationRun.objects.filter(pk=run.pk).update(status="completed", finished_at=timezone.now())
+    run.refresh_from_db()
+    logger.info(
+        f"Reconciliation {run.uid} {run.status}: fetched={run.fetched} matched={run.matched} "
+        f"discrepancies={run.discrepancies} cursor={run.cursor}"
+    )
+    if run.status == "completed" and run.discrepancies:
+        _alert(run)
+    return run
+
+
+def _alert(run):
+    try:
+        from notifications.utils import notify_admins
+
+        notify_admins(
+            subject="Reconciliation discrepancies",
+            message=f"Run {run.uid} ({run.period_start}..{run.period_end}, {run.source}) found "
+                    f"{run.discrepancies} discrepancies in {run.fetched} gateway transactions.",
+            dedup_key=f"reconciliation:{run.uid}",
+        )
+    except Exception as e:
+        logger.error(f"Reconciliation alert failed for {run.uid}: {e}")
+
+
+def reconcile_paystack(period_start, period_end=None, page_size=PAGE_SIZE, client=None):
+    """Reconcile Paystack API transactions for [period_start, period_end]; resumes an unfinished run."""
+    from wallet.services.paystack import get_client
+
+    period_end = period_end or period_start
+    client = client or get_client()
+    run = start_run("paystack_api", period_start, period_end)
+    # Paystack reads a bare date as midnight: send the last second of period_end,
+    # otherwise a one-day run (from == to) asks for an empty window
+    date_to = datetime.combine(period_end, time(23, 59, 59))
+    page = run.cursor + 1
+    try:
+        while True:
+            rows, meta = client.list_transactions(
+                page=page, per_page=page_size, date_from=period_start, date_to=date_to
+            )
+            if not rows:
+                break
+            matched, discrepancies = match_page(run, [normalize_gateway_row(r) for r in rows])
+            commit_page(run, page, len(rows), matched, discrepancies)
+            page_count = meta.get("pageCount")
+            if page_count is not None and page >= int(page_count):
+                break
+            page += 1
+    except Exception as e:
+        logger.error(f"Reconciliation {run.uid} stopped at page {page}: {e}")
+        return _finish(run, e)
+    return _finish(run)
+
+
+def reconcile_settlement_csv(fileobj, period_start, period_end=None, source_name="", page_size=PAGE_SIZE):
+    """
+    Reconcile a settlement CSV export. `fileobj` may be text or bytes. Re-running
+    with the same source_name resumes after the last committed row.
+    """
+    period_end = period_end or period_start
+    run = start_run("settlement_csv", period_start, period_end, source_name=source_name)
+    content = fileobj.read()
+    if isinstance(content, bytes):
+        content = content.decode("utf-8-sig")
+    reader = csv.DictReader(io.StringIO(content))
+    done = run.cursor
+    try:
+        batch = []
+        for position, row in enumerate(reader, start=1):
+            if position <= done:
+                continue
+            batch.append(normalize_csv_row(row))
+            if len(batch) >= page_size:
+                matched, discrepancies = match_page(run, batch)
+                commit_page(run, position, len(batch), matched, discrepancies)
+                batch = []
+        if batch:
+            matched, discrepancies = match_page(run, batch)
+            commit_page(run, position, len(batch), matched, discrepancies)
+    except Exception as e:
+        logger.error(f"Reconciliation {run.uid} ({source_name}) stopped: {e}")
+        return _finish(run, e)
+    return _finish(run)
@@ -8,6 +8,7 @@ from django.utils.dateparse import parse_date
 
 from bills.models import Invoice
 from .models import PaymentRecord, Prepayment
+from . import rollups
 from django.db.models.functions import TruncDay
 
 
@@ -25,20 +26,13 @@ class SummaryReportView(APIView):
         """
         start = request.query_params.get("start")
         end = request.query_params.get("end")
-        qs_payments = PaymentRecord.objects.filter(status="success")
-        qs_invoices = Invoice.objects.all()
-
-        if start:
-            sdate = parse_date(start)
-            qs_payments = qs_payments.filter(created_at__date__gte=sdate)
-            qs_invoices = qs_invoices.filter(issued_at__date__gte=sdate)
-        if end:
-            edate = parse_date(end)
-            qs_payments = qs_payments.filter(created_at__date__lte=edate)
-            qs_invoices = qs_invoices.filter(issued_at__date__lte=edate)
-
-        total_collected = qs_payments.aggregate(total=Sum("amount"))["total"] or Decimal("0.00")
-        total_invoiced = qs_invoices.aggregate(total=Sum("total_amount"))["total"] or Decimal("0.00")
+        sdate = parse_date(start) if start else None
+        edate = parse_date(end) if end else None
+
+        # Closed days from the daily rollup; only today is read from raw tables
+        totals = rollups.aggregate("bills", start=sdate, end=edate)[0]
+        total_collected = totals["collected"] or Decimal("0.00")
+        total_invoiced = totals["invoiced"] or Decimal("0.00")
         total_outstanding = (total_invoiced - total_collected) if total_invoiced and total_collected else (total_invoiced or Decimal("0.00"))
 
         prepayment_balance = Prepayment.objects.aggregate(total=Sum("remaining"))["total"] or Decimal("0.00")
@@ -55,8 +49,8 @@ class MethodBreakdownView(APIView):
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrStaff]
 
     def get(self, request):
-        qs = PaymentRecord.objects.filter(status="success").values("method").annotate(total=Sum("amount")).order_by("-total")
-        data = [{"method": row["method"], "total": str(row["total"])} for row in qs]
+        rows = sorted(rollups.aggregate("bills", dims=("method",)), key=lambda r: r["collected"], reverse=True)
+        data = [{"method": row["method"], "total": str(row["collected"])} for row in rows if row["method"]]
         return Response({"breakdown": data})
 
 
@@ -0,0 +1,372 @@
+# backend/payments/rollups.py
+"""
+Daily collection rollups (payments.models.CollectionRollup).
+
+Writes:
+  - record_* helpers add one payment/invoice to its day bucket with an atomic
+    F() upsert. They are called from post_save signals (RentPayment, PaymentRecord,
+    RentInvoice, bills.Invoice); the row's property/manager comes from set_scope()
+    or already-loaded relations where possible.
+  - rebuild(start, end) recomputes whole days from the raw tables and replaces
+    those buckets: nightly for the last closed days, and for all history via
+    `manage.py backfill_collection_rollups` (run once after deploy, before the
+    reports that read rollups are relied on).
+
+Reads:
+  - aggregate(source, dims, start, end, **scope) serves closed days (< today) from
+    the rollup and only the partial current day from the raw tables.
+
+Dimensions: "day", "property", "manager", "method". Scope filters: property_id,
+manager_id, method.
+"""
+import logging
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.apps import apps
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DecimalField, F, IntegerField, Min, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+ZERO = Decimal("0.00")
+DEFAULT_CURRENCY = getattr(settings, "DEFAULT_CURRENCY", "NGN")
+
+# Raw-table layout per source: where the amount, date and property live
+SOURCES = {
+    "rent": {
+        "payments": {
+            "model": "rents.RentPayment",
+            "filter": {"status": "success"},
+            "date": "created_at",
+            "property": "invoice__tenancy__apartment__property",
+            "amount": "amount",
+        },
+        "invoices": {
+            "model": "rents.RentInvoice",
+            "filter": {},
+            "date": "created_at",
+            "property": "tenancy__apartment__property",
+            "amount": "amount",
+        },
+    },
+    "bills": {
+        "payments": {
+            "model": "payments.PaymentRecord",
+            "filter": {"status": "success"},
+            "date": "created_at",
+            "property": "invoice__tenant_apartment__apartment__property",
+            "amount": "amount",
+        },
+        "invoices": {
+            "model": "bills.Invoice",
+            "filter": {},
+            "date": "issued_at",
+            "property": "tenant_apartment__apartment__property",
+            "amount": "total_amount",
+        },
+    },
+}
+
+MEASURES = ("collected", "payments_count", "invoiced", "invoices_count")
+
+
+def bucket_key(day, source, property_id, manager_id, method, currency):
+    return f"{day.isoformat()}|{source}|{property_id or '-'}|{manager_id or '-'}|{method or '-'}|{currency}"
+
+
+def bump(day, source, property_id=None, manager_id=None, method="", currency=DEFAULT_CURRENCY,
+         collected=ZERO, payments_count=0, invoiced=ZERO, invoices_count=0):
+    """Atomically add to one day bucket, creating it on first use."""
+    CollectionRollup = apps.get_model("payments", "CollectionRollup")
+    key = bucket_key(day, source, property_id, manager_id, method, currency)
+    deltas = {
+        "collected": F("collected") + collected,
+        "payments_count": F("payments_count") + payments_count,
+        "invoiced": F("invoiced") + invoiced,
+        "invoices_count": F("invoices_count") + invoices_count,
+        "updated_at": timezone.now(),
+    }
+    if CollectionRollup.objects.filter(key=key).update(**deltas):
+        return
+    try:
+        with transaction.atomic():
+            CollectionRollup.objects.create(
+                key=key, day=day, source=source, property_id=property_id, manager_id=manager_id,
+                method=method or "", currency=currency, collected=collected,
+                payments_count=payments_count, invoiced=invoiced, invoices_count=invoices_count,
+            )
+    except IntegrityError:
+        # Another writer created the bucket first
+        CollectionRollup.objects.filter(key=key).update(**deltas)
+
+
+class RollupStatusMixin:
+    """
+    Remembers the status a payment row was loaded with (the post_save receivers
+    update it after each save), so a save can tell whether it is the one that
+    made the payment "success". Set in from_db() rather than a post_init
+    receiver, so constructing instances for list/report querysets stays free.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if "status" in instance.__dict__:
+            instance._rollup_status = instance.status
+        return instance
+
+
+def set_scope(instance, property_id, manager_id):
+    """Tell the rollup receivers the (property, manager) of a row about to be saved."""
+    instance._rollup_scope = (property_id, manager_id)
+    return instance
+
+
+def _scope_of(source, kind, instance):
+    """
+    (property_id, manager_id) for one raw row. Uses set_scope() if the caller
+    gave it, else relations already loaded on the instance (select_related or
+    assigned objects); only a missing hop costs a query.
+    """
+    scope = getattr(instance, "_rollup_scope", None)
+    if scope is not None:
+        return scope
+    spec = SOURCES[source][kind]
+    current = instance
+    for hop in spec["property"].split("__"):
+        field = current._meta.get_field(hop)
+        if getattr(current, field.attname) is None:
+            return None, None
+        if not field.is_cached(current):
+            break
+        current = getattr(current, hop)
+        if current is None:
+            return None, None
+    else:
+        return current.pk, current.manager_id
+
+    model = apps.get_model(spec["model"])
+    row = (
+        model.objects.filter(pk=instance.pk)
+        .values(property_id=F(f"{spec['property']}_id"), manager_id=F(f"{spec['property']}__manager_id"))
+        .first()
+    )
+    return (row["property_id"], row["manager_id"]) if row else (None, None)
+
+
+def _record(source, kind, instance, **measures):
+    try:
+        property_id, manager_id = _scope_of(source, kind, instance)
+        created = getattr(instance, SOURCES[source][kind]["date"]) or timezone.now()
+        bump(
+            timezone.localdate(created), source, property_id, manager_id,
+            method=getattr(instance, "method", "") if kind == "payments" else "",
+            **measures,
+        )
+    except Exception as e:
+        # The nightly rebuild repairs anything missed here
+        logger.error(f"Error updating collection rollup for {source} {kind} {instance.pk}: {e}")
+
+
+def record_rent_payment(payment):
+    _record("rent", "payments", payment, collected=payment.amount, payments_count=1)
+
+
+def record_payment_record(record):
+    _record("bills", "payments", record, collected=record.amount, payments_count=1)
+
+
+def record_rent_invoice(invoice):
+    _record("rent", "invoices", invoice, invoiced=invoice.amount, invoices_count=1)
+
+
+def record_bills_invoice(invoice):
+    _record("bills", "invoices", invoice, invoiced=invoice.total_amount or ZERO, invoices_count=1)
+
+
+def _dim_paths(spec, kind):
+    paths = {
+        "day": TruncDate(spec["date"]),
+        "property": F(f"{spec['property']}_id"),
+        "manager": F(f"{spec['property']}__manager_id"),
+    }
+    if kind == "payments":
+        paths["method"] = F("method")
+    return paths
+
+
+def _raw_grouped(source, kind, dims, start, end, scope):
+    """GROUP BY over one raw table, yielding rows keyed like the rollup."""
+    spec = SOURCES[source][kind]
+    model = apps.get_model(spec["model"])
+    qs = model.objects.filter(**spec["filter"])
+    if start:
+        qs = qs.filter(**{f"{spec['date']}__date__gte": start})
+    if end:
+        qs = qs.filter(**{f"{spec['date']}__date__lte": end})
+    if scope.get("property_id"):
+        qs = qs.filter(**{f"{spec['property']}_id": scope["property_id"]})
+    if scope.get("manager_id"):
+        qs = qs.filter(**{f"{spec['property']}__manager_id": scope["manager_id"]})
+    if scope.get("method"):
+        if kind != "payments":
+            return
+        qs = qs.filter(method=scope["method"])
+
+    paths = _dim_paths(spec, kind)
+    group = {f"g_{dim}": paths[dim] for dim in dims if dim in paths}
+    amount, count = ("collected", "payments_count") if kind == "payments" else ("invoiced", "invoices_count")
+    rows = (
+        qs.order_by()
+        .annotate(**group)
+        .values(*group.keys())
+        .annotate(amount=Sum(spec["amount"]), n=Count("pk"))
+    )
+    for row in rows:
+        out = {dim: row.get(f"g_{dim}", "" if dim == "method" else None) for dim in dims}
+        out[amount] = row["amount"] or ZERO
+        out[count] = row["n"]
+        yield out
+
+
+def _merge(target, dims, row):
+    key = tuple(row.get(dim) for dim in dims)
+    bucket = target.setdefault(key, dict({dim: row.get(dim) for dim in dims}, collected=ZERO,
+                                         payments_count=0, invoiced=ZERO, invoices_count=0))
+    for measure in MEASURES:
+        if row.get(measure):
+            bucket[measure] += row[measure]
+
+
+def aggregate(source, dims=(), start=None, end=None, **scope):
+    """
+    Collection measures for `source` grouped by `dims`, over [start, end] (dates, inclusive).
+    Closed days come from CollectionRollup; today (if in range) from the raw tables.
+    Returns a list of dicts (dims + collected, payments_count, invoiced, invoices_count).
+    """
+    CollectionRollup = apps.get_model("payments", "CollectionRollup")
+    dims = tuple(dims)
+    today = timezone.localdate()
+    merged = {}
+
+    rollup = CollectionRollup.objects.filter(source=source, day__lt=today)
+    if start:
+        rollup = rollup.filter(day__gte=start)
+    if end:
+        rollup = rollup.filter(day__lte=end)
+    if scope.get("property_id"):
+        rollup = rollup.filter(property_id=scope["property_id"])
+    if scope.get("manager_id"):
+        rollup = rollup.filter(manager_id=scope["manager_id"])
+    if scope.get("method"):
+        rollup = rollup.filter(method=scope["method"])
+    group = {f"g_{dim}": F(f"{dim}_id" if dim in ("property", "manager") else dim) for dim in dims}
+    rows = (
+        rollup.order_by()
+        .annotate(**group)
+        .values(*group.keys())
+        .annotate(**{measure: Sum(measure) for measure in MEASURES})
+    )
+    for row in rows:
+        _merge(merged, dims, dict({dim: row[f"g_{dim}"] for dim in dims}, **{m: row[m] for m in MEASURES}))
+
+    if (start is None or str(start) <= today.isoformat()) and (end is None or str(end) >= today.isoformat()):
+        for kind in ("payments", "invoices"):
+            for row in _raw_grouped(source, kind, dims, today, today, scope):
+                _merge(merged, dims, row)
+
+    if not dims:
+        return [merged.get((), dict(collected=ZERO, payments_count=0, invoiced=ZERO, invoices_count=0))]
+    return list(merged.values())
+
+
+def property_measures(source, start=None, end=None, manager_id=None):
+    """
+    {"collected", "invoices_count"} as correlated subqueries on OuterRef("pk"), for
+    annotating a Property queryset with the same split as aggregate(): closed days
+    from CollectionRollup, today (if in range) from the raw tables.
+    """
+    CollectionRollup = apps.get_model("payments", "CollectionRollup")
+    today = timezone.localdate()
+
+    def total(qs, group, expression, zero):
+        # grouped on the correlated column, so the subquery returns one row per property
+        subquery = qs.order_by().values(group).annotate(t=expression).values("t")[:1]
+        return Coalesce(Subquery(subquery), Value(zero), output_field=DecimalField() if zero == ZERO else IntegerField())
+
+    rollup = CollectionRollup.objects.filter(source=source, day__lt=today, property_id=OuterRef("pk"))
+    if start:
+        rollup = rollup.filter(day__gte=start)
+    if end:
+        rollup = rollup.filter(day__lte=end)
+    if manager_id:
+        rollup = rollup.filter(manager_id=manager_id)
+    measures = {
+        "collected": total(rollup, "property_id", Sum("collected"), ZERO),
+        "invoices_count": total(rollup, "property_id", Sum("invoices_count"), 0),
+    }
+
+    if (start is None or str(start) <= today.isoformat()) and (end is None or str(end) >= today.isoformat()):
+        for kind, measure in (("payments", "collected"), ("invoices", "invoices_count")):
+            spec = SOURCES[source][kind]
+            raw = apps.get_model(spec["model"]).objects.filter(
+                **spec["filter"], **{f"{spec['date']}__date": today, f"{spec['property']}_id": OuterRef("pk")}
+            )
+            if manager_id:
+                raw = raw.filter(**{f"{spec['property']}__manager_id": manager_id})
+            group = f"{spec['property']}_id"
+            if kind == "payments":
+                measures[measure] = measures[measure] + total(raw, group, Sum(spec["amount"]), ZERO)
+            else:
+                measures[measure] = measures[measure] + total(raw, group, Count("pk"), 0)
+    return measures
+
+
+def earliest_day():
+    """Local date of the oldest payment or invoice in any source, or None when there are none."""
+    days = []
+    for source in SOURCES.values():
+        for spec in source.values():
+            model = apps.get_model(spec["model"])
+            first = model.objects.filter(**spec["filter"]).aggregate(first=Min(spec["date"]))["first"]
+            if first is not None:
+                days.append(timezone.localtime(first).date() if isinstance(first, datetime) else first)
+    return min(days, default=None)
+
+
+def rebuild(start, end=None):
+    """
+    Recompute buckets for every day in [start, end] from the raw tables and replace them.
+    Returns the number of buckets written.
+    """
+    CollectionRollup = apps.get_model("payments", "CollectionRollup")
+    end = end or start
+    dims = ("day", "property", "manager", "method")
+    written = 0
+    day = start
+    while day <= end:
+        buckets = {}
+        for source in SOURCES:
+            for kind in ("payments", "invoices"):
+                for row in _raw_grouped(source, kind, dims, day, day, {}):
+                    _merge(buckets, ("source",) + dims, dict(row, source=source))
+        objs = [
+            CollectionRollup(
+                key=bucket_key(day, b["source"], b["property"], b["manager"], b["method"], DEFAULT_CURRENCY),
+                day=day, source=b["source"], property_id=b["property"], manager_id=b["manager"],
+                method=b["method"] or "", currency=DEFAULT_CURRENCY,
+                collected=b["collected"], payments_count=b["payments_count"],
+                invoiced=b["invoiced"], invoices_count=b["invoices_count"],
+            )
+            for b in buckets.values()
+        ]
+        with transaction.atomic():
+            CollectionRollup.objects.filter(day=day).delete()
+            CollectionRollup.objects.bulk_create(objs, batch_size=1000)
+        written += len(objs)
+        day += timedelta(days=1)
+    return written
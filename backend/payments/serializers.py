@@ -1,10 +1,11 @@
 from rest_framework import serializers
+from config.serializers import SparseFieldsetMixin
 from .models import PaymentRecord, Prepayment, PaymentAllocation
 from bills.models import Invoice
 from django.utils import timezone
 from decimal import Decimal
 
-class PaymentRecordSerializer(serializers.ModelSerializer):
+class PaymentRecordSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     tenant = serializers.PrimaryKeyRelatedField(read_only=True)
     invoice = serializers.PrimaryKeyRelatedField(queryset=Invoice.objects.all(), allow_null=True, required=False)
 
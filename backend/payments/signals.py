@@ -4,7 +4,9 @@ from django.db import transaction
 from django.dispatch import receiver
 from django.db.models.signals import post_save
 from bills.models import Invoice
+from rents.models import RentInvoice, RentPayment
 from .models import Prepayment, PaymentRecord, PaymentAllocation
+from . import rollups
 from django.utils import timezone
 from django.conf import settings
 
@@ -58,3 +60,40 @@ def auto_apply_prepayments_on_invoice_creation(sender, instance: Invoice, create
         if paid_sum >= invoice.total_amount:
             invoice.is_paid = True
             invoice.save(update_fields=["is_paid"])
+
+
+# --- Collection rollups -------------------------------------------------------
+# Payments count once, on the save that first makes them "success" (created as
+# success, or finalize_success / confirm flipping the status). The status a row
+# was loaded with comes from RollupStatusMixin.from_db(); an instance that was
+# neither loaded nor saved here is assumed already counted (the nightly rebuild
+# repairs it otherwise).
+
+def _became_success(instance, created):
+    return instance.status == "success" and (created or getattr(instance, "_rollup_status", "success") != "success")
+
+
+@receiver(post_save, sender=RentPayment)
+def rollup_rent_payment(sender, instance, created, **kwargs):
+    if _became_success(instance, created):
+        rollups.record_rent_payment(instance)
+    instance._rollup_status = instance.status
+
+
+@receiver(post_save, sender=PaymentRecord)
+def rollup_payment_record(sender, instance, created, **kwargs):
+    if _became_success(instance, created):
+        rollups.record_payment_record(instance)
+    instance._rollup_status = instance.status
+
+
+@receiver(post_save, sender=RentInvoice)
+def rollup_rent_invoice(sender, instance, created, **kwargs):
+    if created:
+        rollups.record_rent_invoice(instance)
+
+
+@receiver(post_save, sender=Invoice)
+def rollup_bills_invoice(sender, instance, created, **kwargs):
+    if created:
+        rollups.record_bills_invoice(instance)
@@ -0,0 +1,46 @@
+# backend/payments/tasks.py
+from datetime import timedelta
+
+from celery import shared_task
+from django.utils import timezone
+
+from . import rollups
+
+
+@shared_task
+def rebuild_collection_rollups(days=2):
+    """
+    Nightly reconciliation: recompute the last `days` closed days of
+    CollectionRollup from the raw payment/invoice tables.
+    """
+    today = timezone.localdate()
+    return rollups.rebuild(today - timedelta(days=days), today - timedelta(days=1))
+
+
+@shared_task(acks_late=True)
+def process_webhook_event(event_pk):
+    """Apply one stored webhook event; retries and ordering waits are re-dispatched by the sweep."""
+    from . import webhooks
+
+    return webhooks.process(event_pk)
+
+
+@shared_task
+def dispatch_due_webhook_events(limit=500):
+    """Periodic sweep, the only retry path: dispatch events whose next_attempt_at is due and lost dispatches."""
+    from . import webhooks
+
+    ids = webhooks.due_for_dispatch(limit)
+    for event_pk in ids:
+        process_webhook_event.delay(event_pk)
+    return len(ids)
+
+
+@shared_task
+def reconcile_paystack_transactions(days_back=1):
+    """Daily: reconcile the previous day's Paystack transactions (resumes an unfinished run)."""
+    from . import reconciliation
+
+    day = timezone.localdate() - timedelta(days=days_back)
+    run = reconciliation.reconcile_paystack(day)
+    return {"run": run.uid, "status": run.status, "fetched": run.fetched, "discrepancies": run.discrepancies}
@@ -4,7 +4,7 @@ from rest_framework.routers import DefaultRouter
 from django.urls import path, include
 from .views import PaymentRecordViewSet
 from . import reports
-from payments.views.webhook import PaystackWebhookView
+from .webhooks import PaystackWebhookView, WebhookMetricsView
 
 
 router = DefaultRouter()
@@ -16,6 +16,7 @@ urlpatterns = [
     path("reports/method-breakdown/", reports.MethodBreakdownView.as_view(), name="payments-reports-method"),
     path("reports/portfolio/", reports.PortfolioOutstandingView.as_view(), name="payments-reports-portfolio"),
     path("webhooks/paystack/", PaystackWebhookView.as_view(), name="paystack-webhook"),
+    path("webhooks/metrics/", WebhookMetricsView.as_view(), name="webhook-metrics"),
 ]
 
 
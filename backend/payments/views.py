@@ -6,10 +6,15 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.db.models import Sum, Q
 
+from config.pagination import CreatedAtCursorPagination
+
 from .models import PaymentRecord, Prepayment, PaymentAllocation
 from .serializers import PaymentRecordSerializer, ApplyPrepaymentSerializer, PrepaymentSerializer, PaymentAllocationSerializer
 from bills.models import Invoice
-from wallet.models import Wallet, WalletTransaction
+from bills.permissions import INVOICE_ROLES
+from config.permissions import holds_role, owner_id_of, ownership_q
+from wallet import ledger
+from wallet.models import Wallet
 
 
 class IsPropertyManager(permissions.BasePermission):
@@ -17,6 +22,14 @@ class IsPropertyManager(permissions.BasePermission):
         return getattr(request.user, "role", None) == "property_manager" or request.user.is_staff
 
 
+PAYMENT_RECORD_ROLES = {
+    "is_tenant": "tenant",
+    "is_manager": f"invoice__{INVOICE_ROLES['is_manager']}",
+}
+# Loaded with the invoice so the collection rollup reads property/manager without a query
+ROLLUP_SCOPE = "tenant_apartment__apartment__property"
+
+
 class PaymentRecordViewSet(viewsets.ModelViewSet):
     """
     Manage PaymentRecords with enhanced prepayment system.
@@ -24,15 +37,16 @@ class PaymentRecordViewSet(viewsets.ModelViewSet):
     queryset = PaymentRecord.objects.all().select_related("invoice", "tenant", "confirmed_by")
     serializer_class = PaymentRecordSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CreatedAtCursorPagination
 
     def get_queryset(self):
         user = self.request.user
         role = getattr(user, "role", None)
         
         if role == "tenant":
-            return self.queryset.filter(tenant=user)
+            return self.queryset.filter(ownership_q(user, PAYMENT_RECORD_ROLES, "is_tenant"))
         if role == "property_manager":
-            return self.queryset.filter(invoice__tenant_apartment__apartment__property__owner=user)
+            return self.queryset.filter(ownership_q(user, PAYMENT_RECORD_ROLES, "is_manager"))
         if user.is_staff or user.is_superuser:
             return self.queryset
         return self.queryset.none()
@@ -97,7 +111,7 @@ class PaymentRecordViewSet(viewsets.ModelViewSet):
             return Response({"error": "Prepayment not found."}, status=status.HTTP_404_NOT_FOUND)
 
         try:
-            invoice = Invoice.objects.get(pk=invoice_id)
+            invoice = Invoice.objects.select_related(ROLLUP_SCOPE).get(pk=invoice_id)
         except Invoice.DoesNotExist:
             return Response({"error": "Invoice not found."}, status=status.HTTP_404_NOT_FOUND)
 
@@ -141,7 +155,7 @@ class PaymentRecordViewSet(viewsets.ModelViewSet):
         """
         user = request.user
         try:
-            invoice = Invoice.objects.get(pk=pk)
+            invoice = Invoice.objects.select_related(ROLLUP_SCOPE).get(pk=pk)
         except Invoice.DoesNotExist:
             return Response({"error": "Invoice not found."}, status=status.HTTP_404_NOT_FOUND)
 
@@ -153,33 +167,31 @@ class PaymentRecordViewSet(viewsets.ModelViewSet):
             return Response({"error": "No active wallet found for user."}, status=status.HTTP_400_BAD_REQUEST)
 
         total = Decimal(invoice.total_amount)
-        if Decimal(wallet.balance) < total:
+        if total <= 0:
+            return Response({"error": "Invoice has nothing to pay."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            with transaction.atomic():
+                ledger.post(
+                    wallet,
+                    total,
+                    "debit",
+                    reference=f"bill:{invoice.uid}",
+                    description=f"Wallet payment for Invoice {invoice.uid}",
+                )
+
+                payment = PaymentRecord.objects.create(
+                    invoice=invoice,
+                    tenant=user,
+                    amount=total,
+                    method="wallet_manual",
+                    status="success",
+                    confirmed_by=user,
+                    confirmed_at=now(),
+                )
+                payment.mark_invoice_paid_if_fully_settled()
+        except ledger.InsufficientFunds:
             return Response({"error": "Insufficient wallet balance."}, status=status.HTTP_400_BAD_REQUEST)
 
-        with transaction.atomic():
-            wallet.balance = Decimal(wallet.balance) - total
-            wallet.save(update_fields=["balance"])
-
-            WalletTransaction.objects.create(
-                wallet=wallet,
-                txn_type="debit",
-                amount=total,
-                reference=None,
-                description=f"Wallet payment for Invoice {invoice.uid}",
-                status="success",
-            )
-
-            payment = PaymentRecord.objects.create(
-                invoice=invoice,
-                tenant=user,
-                amount=total,
-                method="wallet_manual",
-                status="success",
-                confirmed_by=user,
-                confirmed_at=now(),
-            )
-            payment.mark_invoice_paid_if_fully_settled()
-
         return Response(PaymentRecordSerializer(payment).data, status=status.HTTP_201_CREATED)
 
     @action(detail=True, methods=["post"], permission_classes=[permissions.IsAuthenticated, IsPropertyManager])
@@ -191,17 +203,20 @@ class PaymentRecordViewSet(viewsets.ModelViewSet):
         """
         user = request.user
         try:
-            invoice = Invoice.objects.get(pk=pk)
+            invoice = Invoice.objects.select_related(ROLLUP_SCOPE).get(pk=pk)
         except Invoice.DoesNotExist:
             return Response({"error": "Invoice not found."}, status=status.HTTP_404_NOT_FOUND)
 
+        if not user.is_staff and not holds_role(invoice, user, INVOICE_ROLES, "is_manager"):
+            return Response({"error": "You do not manage this invoice."}, status=status.HTTP_403_FORBIDDEN)
+
         if invoice.is_paid:
             return Response({"error": "Invoice already paid."}, status=status.HTTP_400_BAD_REQUEST)
 
         amount = invoice.total_amount
         payment = PaymentRecord.objects.create(
             invoice=invoice,
-            tenant=invoice.tenant_apartment.tenant,
+            tenant_id=owner_id_of(invoice, INVOICE_ROLES["is_tenant"]),
             amount=amount,
             method="cash",
             status="success",
@@ -227,7 +242,7 @@ class PaymentRecordViewSet(viewsets.ModelViewSet):
             return Response({"error": "invoice_id, reference and amount are required"}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            invoice = Invoice.objects.get(pk=invoice_id)
+            invoice = Invoice.objects.select_related(ROLLUP_SCOPE).get(pk=invoice_id)
         except Invoice.DoesNotExist:
             return Response({"error": "Invoice not found."}, status=status.HTTP_404_NOT_FOUND)
 
@@ -241,7 +256,7 @@ class PaymentRecordViewSet(viewsets.ModelViewSet):
 
         payment = PaymentRecord.objects.create(
             invoice=invoice,
-            tenant=invoice.tenant_apartment.tenant,
+            tenant_id=owner_id_of(invoice, INVOICE_ROLES["is_tenant"]),
             amount=Decimal(amount),
             method=method,
             reference=reference,
@@ -275,7 +290,7 @@ class PaymentRecordViewSet(viewsets.ModelViewSet):
             target_tenant = user
 
         # Gather invoices for this tenant
-        invoices = Invoice.objects.filter(tenant_apartment__tenant=target_tenant).order_by("-issued_at")
+        invoices = Invoice.objects.filter(ownership_q(target_tenant, INVOICE_ROLES, "is_tenant")).order_by("-issued_at")
         prepayments = Prepayment.objects.filter(tenant=target_tenant, is_active=True)
         
         statement = []
@@ -324,8 +339,8 @@ class PaymentRecordViewSet(viewsets.ModelViewSet):
         """
         user = request.user
         prepayments = Prepayment.objects.filter(
-            tenant__tenant_apartment__apartment__property__owner=user
-        ).select_related("tenant").order_by("-created_at")
+            ownership_q(user, {"is_manager": "tenant__tenant_bonds__property_manager"})
+        ).distinct().select_related("tenant").order_by("-created_at")
         
         serializer = PrepaymentSerializer(prepayments, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
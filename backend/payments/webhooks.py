@@ -0,0 +1,243 @@
+# backend/payments/webhooks.py
+"""
+Gateway webhook ingestion.
+
+The HTTP endpoint only verifies the signature, stores the raw body as a
+WebhookEvent (unique event_id, so redeliveries are dropped) and returns 200.
+A Celery task (payments.tasks.process_webhook_event) applies the event via the
+provider's handler:
+
+  - ordering: events sharing a reference are applied in arrival order; an event
+    waits while an earlier one for the same reference is unfinished
+  - retries: a failing event is retried with exponential backoff up to
+    MAX_ATTEMPTS, then marked dead and copied to WebhookDeadLetter
+
+Every re-run goes through next_attempt_at and the per-minute sweep
+(dispatch_due_webhook_events): a failed or waiting event records when it is
+next due, and the task never reschedules itself, so there is exactly one retry
+path. A task that arrives early (redelivery with acks_late, or the sweep
+racing ingest's dispatch) finds the event not yet due, or leased by the
+worker running it, and returns without touching it.
+"""
+import hashlib
+import json
+import logging
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Avg, Count, F, Max, Min, Q
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.utils.module_loading import import_string
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from wallet.services.paystack import verify_webhook_signature
+from .models import WebhookDeadLetter, WebhookEvent
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {
+    "paystack": "wallet.services.paystack_events.handle",
+}
+
+MAX_ATTEMPTS = 8
+BACKOFF_BASE_SECONDS = 30
+BACKOFF_MAX_SECONDS = 60 * 60
+ORDER_WAIT_SECONDS = 10  # at least; the sweep runs once a minute
+STALE_PENDING_SECONDS = 120
+PROCESSING_LEASE_SECONDS = 300  # a worker that died mid-event releases it after this
+
+UNFINISHED = ("pending", "processing", "failed")
+
+
+def paystack_event_id(data):
+    """event + Paystack's id for the object; falls back to a hash of the body."""
+    payload = data.get("data", {}) or {}
+    key = payload.get("id") or payload.get("reference")
+    if not key:
+        key = hashlib.sha256(json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest()
+    return f"{data.get('event', '')}-{key}"
+
+
+def ingest(provider, event_id, event_type, reference, data):
+    """Store one event and dispatch it after commit. Returns (event, created)."""
+    from .tasks import process_webhook_event
+
+    try:
+        with transaction.atomic():
+            event = WebhookEvent.objects.create(
+                provider=provider,
+                event_id=event_id,
+                event_type=event_type,
+                reference=reference or "",
+                payload=data,
+            )
+            transaction.on_commit(lambda: process_webhook_event.delay(event.pk))
+    except IntegrityError:
+        return WebhookEvent.objects.get(event_id=event_id), False
+    return event, True
+
+
+def _backoff(attempts):
+    return timedelta(seconds=min(BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), BACKOFF_MAX_SECONDS))
+
+
+def process(event_pk):
+    """Apply one stored event if it is due. Returns a short status string."""
+    with transaction.atomic():
+        event = WebhookEvent.objects.select_for_update(skip_locked=True).filter(pk=event_pk).first()
+        if event is None:
+            return "locked"
+        if event.status in ("processed", "dead"):
+            return event.status
+        now = timezone.now()
+        if event.status == "processing" and event.next_attempt_at and event.next_attempt_at > now:
+            return "processing"  # another worker holds the lease
+        if event.status == "failed" and event.next_attempt_at and event.next_attempt_at > now:
+            return "scheduled"  # backing off
+
+        if event.reference:
+            earlier = WebhookEvent.objects.filter(
+                provider=event.provider, reference=event.reference, id__lt=event.pk, status__in=UNFINISHED
+            ).exists()
+            if earlier:
+                event.next_attempt_at = now + timedelta(seconds=ORDER_WAIT_SECONDS)
+                event.save(update_fields=["next_attempt_at"])
+                return "waiting"
+
+        event.status = "processing"
+        event.attempts += 1
+        event.next_attempt_at = now + timedelta(seconds=PROCESSING_LEASE_SECONDS)
+        event.save(update_fields=["status", "attempts", "next_attempt_at"])
+
+    handler = import_string(HANDLERS[event.provider])
+    try:
+        with transaction.atomic():
+            result = handler(event.event_type, event.payload)
+            WebhookEvent.objects.filter(pk=event.pk).update(
+                status="processed", processed_at=timezone.now(), next_attempt_at=None, last_error=""
+            )
+        logger.info(f"Webhook {event.event_id} processed: {result}")
+        return "processed"
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        if event.attempts >= MAX_ATTEMPTS:
+            with transaction.atomic():
+                WebhookEvent.objects.filter(pk=event.pk).update(status="dead", last_error=error, next_attempt_at=None)
+                WebhookDeadLetter.objects.get_or_create(
+                    event=event,
+                    defaults={
+                        "event_type": event.event_type,
+                        "reference": event.reference,
+                        "payload": event.payload,
+                        "error": error,
+                        "attempts": event.attempts,
+                    },
+                )
+            logger.error(f"Webhook {event.event_id} dead after {event.attempts} attempts: {error}")
+            return "dead"
+        delay = _backoff(event.attempts)
+        WebhookEvent.objects.filter(pk=event.pk).update(
+            status="failed", last_error=error, next_attempt_at=timezone.now() + delay
+        )
+        logger.warning(f"Webhook {event.event_id} attempt {event.attempts} failed, retrying in {delay}: {error}")
+        return "failed"
+
+
+def due_for_dispatch(limit=500):
+    """
+    Ids of due retries, expired processing leases, waiting events whose wait is
+    over, and pending events whose first dispatch seems lost.
+    """
+    now = timezone.now()
+    return list(
+        WebhookEvent.objects.filter(
+            Q(status__in=("pending", "failed", "processing"), next_attempt_at__lte=now)
+            | Q(
+                status="pending",
+                next_attempt_at__isnull=True,
+                received_at__lte=now - timedelta(seconds=STALE_PENDING_SECONDS),
+            )
+        )
+        .order_by("id")
+        .values_list("id", flat=True)[:limit]
+    )
+
+
+def replay_dead_letter(dead_letter):
+    """Put a dead event back in the queue with a fresh attempt budget."""
+    from .tasks import process_webhook_event
+
+    WebhookEvent.objects.filter(pk=dead_letter.event_id).update(status="pending", attempts=0, next_attempt_at=None)
+    WebhookDeadLetter.objects.filter(pk=dead_letter.pk).update(resolved_at=timezone.now())
+    transaction.on_commit(lambda: process_webhook_event.delay(dead_letter.event_id))
+
+
+def metrics(window_minutes=60):
+    """Throughput, lag and backlog for the last `window_minutes`."""
+    now = timezone.now()
+    since = now - timedelta(minutes=window_minutes)
+    recent = WebhookEvent.objects.filter(received_at__gte=since)
+    counts = recent.aggregate(
+        received=Count("id"),
+        processed=Count("id", filter=Q(status="processed")),
+        failed=Count("id", filter=Q(status="failed")),
+        dead=Count("id", filter=Q(status="dead")),
+    )
+    lag = recent.filter(status="processed", processed_at__isnull=False).aggregate(
+        avg=Avg(F("processed_at") - F("received_at")),
+        max=Max(F("processed_at") - F("received_at")),
+    )
+    backlog = WebhookEvent.objects.filter(status__in=UNFINISHED).aggregate(size=Count("id"), oldest=Min("received_at"))
+    return {
+        "window_minutes": window_minutes,
+        **counts,
+        "throughput_per_minute": round(counts["processed"] / window_minutes, 2),
+        "avg_lag_seconds": lag["avg"].total_seconds() if lag["avg"] else None,
+        "max_lag_seconds": lag["max"].total_seconds() if lag["max"] else None,
+        "backlog": backlog["size"],
+        "oldest_unfinished_age_seconds": (now - backlog["oldest"]).total_seconds() if backlog["oldest"] else None,
+        "dead_letters_open": WebhookDeadLetter.objects.filter(resolved_at__isnull=True).count(),
+    }
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class PaystackWebhookView(APIView):
+    """Verify, store and acknowledge. All processing happens in payments.tasks."""
+    authentication_classes = []
+    permission_classes = []
+
+    def post(self, request, *args, **kwargs):
+        raw_body = request.body or b""
+        signature = request.headers.get("x-paystack-signature")
+        if not verify_webhook_signature(raw_body, signature):
+            return Response({"detail": "Invalid signature"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            data = json.loads(raw_body.decode("utf-8"))
+        except ValueError:
+            return Response({"detail": "Invalid payload"}, status=status.HTTP_400_BAD_REQUEST)
+
+        payload = data.get("data", {}) or {}
+        event, created = ingest(
+            "paystack",
+            paystack_event_id(data),
+            data.get("event", ""),
+            payload.get("reference") or "",
+            data,
+        )
+        return Response({"status": "ok", "duplicate": not created}, status=status.HTTP_200_OK)
+
+
+class WebhookMetricsView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        try:
+            window = max(1, min(int(request.query_params.get("window", 60)), 24 * 60))
+        except ValueError:
+            window = 60
+        return Response(metrics(window))
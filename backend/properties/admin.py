@@ -208,7 +208,7 @@ class MessageThreadAdmin(admin.ModelAdmin):
     actions = ['archive_threads', 'activate_threads']
 
     def message_count(self, obj):
-        return obj.messages.count()
+        return obj.last_message_seq
     message_count.short_description = "Messages"
 
     def archive_threads(self, request, queryset):
@@ -1,4 +1,5 @@
 from django.apps import AppConfig
+from django.db.models.signals import pre_migrate
 
 
 class PropertiesConfig(AppConfig):
@@ -7,3 +8,6 @@ class PropertiesConfig(AppConfig):
 
     def ready(self):
         import properties.signals
+        from properties.services.thread_backfill import guard_legacy_drop
+
+        pre_migrate.connect(guard_legacy_drop, sender=self)
@@ -0,0 +1,99 @@
+# backend/properties/consumers.py
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from config.redis import get_async_redis
+
+from .services import messaging
+
+
+class ThreadConsumer(AsyncJsonWebsocketConsumer):
+    """
+    ws/threads/<thread_id>/?token=<access_token>
+
+    Client -> server:
+      {"type": "message", "body": "..."}   fanned out at once, persisted in batches
+      {"type": "typing", "is_typing": true}
+      {"type": "read"}                     advance the read cursor to the latest message
+      {"type": "ping"}                     keeps presence fresh (send every ~30s)
+
+    Server -> client: "presence", "message", "message_persisted" (id -> seq),
+    "typing", "read" and "pong" events.
+    """
+
+    async def connect(self):
+        self.user = self.scope.get("user")
+        self.thread_id = str(self.scope["url_route"]["kwargs"]["thread_id"])
+        if not self.user or not self.user.is_authenticated:
+            await self.close(code=4401)
+            return
+        if not await database_sync_to_async(messaging.is_participant)(self.thread_id, self.user.id):
+            await self.close(code=4403)
+            return
+
+        self.group = messaging.group_name(self.thread_id)
+        self.redis = get_async_redis()
+        await self.channel_layer.group_add(self.group, self.channel_name)
+        await self.accept()
+        await messaging.presence_touch(self.redis, self.thread_id, self.user.id, self.channel_name)
+        await self._broadcast_presence()
+
+    async def disconnect(self, close_code):
+        group = getattr(self, "group", None)
+        if not group:
+            return
+        await self.channel_layer.group_discard(group, self.channel_name)
+        try:
+            await messaging.presence_leave(self.redis, self.thread_id, self.user.id, self.channel_name)
+            await self._broadcast_presence()
+        except Exception:
+            pass
+
+    async def receive_json(self, content, **kwargs):
+        kind = content.get("type")
+        if kind == "message":
+            body = (content.get("body") or "").strip()
+            if not body:
+                return
+            message = messaging.draft(self.thread_id, self.user.id, body[:messaging.MAX_BODY_LENGTH])
+            await self.channel_layer.group_send(self.group, {"type": "message.new", "message": message})
+            await messaging.queue(self.redis, message)
+        elif kind == "typing":
+            await self.channel_layer.group_send(
+                self.group,
+                {"type": "typing.update", "user": self.user.id, "is_typing": bool(content.get("is_typing", True))},
+            )
+        elif kind == "read":
+            await database_sync_to_async(self._mark_read)()
+            await self.channel_layer.group_send(self.group, {"type": "read.update", "user": self.user.id})
+        elif kind == "ping":
+            await messaging.presence_touch(self.redis, self.thread_id, self.user.id, self.channel_name)
+            await self.send_json({"type": "pong"})
+
+    def _mark_read(self):
+        from .models.messaging import MessageThread
+
+        thread = MessageThread.objects.filter(id=self.thread_id).only("id", "last_message", "last_message_seq").first()
+        if thread:
+            thread.mark_read(self.user)
+
+    async def _broadcast_presence(self):
+        online = await messaging.presence_online(self.redis, self.thread_id)
+        await self.channel_layer.group_send(self.group, {"type": "presence.update", "online": online})
+
+    # Channel-layer handlers
+    async def message_new(self, event):
+        await self.send_json({"type": "message", "message": event["message"]})
+
+    async def message_persisted(self, event):
+        await self.send_json({"type": "message_persisted", "messages": event["messages"]})
+
+    async def typing_update(self, event):
+        if event["user"] != self.user.id:
+            await self.send_json({"type": "typing", "user": event["user"], "is_typing": event["is_typing"]})
+
+    async def read_update(self, event):
+        await self.send_json({"type": "read", "user": event["user"]})
+
+    async def presence_update(self, event):
+        await self.send_json({"type": "presence", "online": event["online"]})
@@ -0,0 +1,28 @@
+# backend/properties/management/commands/backfill_thread_cursors.py
+from django.core.management.base import BaseCommand, CommandError
+
+from properties.services.thread_backfill import ThreadBackfillError, backfill_thread_state
+
+
+class Command(BaseCommand):
+    help = (
+        "Move existing message threads onto ThreadParticipant read cursors: copy legacy participants, "
+        "number messages, fill last_message_* and seed cursors from read_by. Must run before the migration that "
+        "drops the legacy participants/read_by tables (or from inside it, see thread_backfill.migration_operation)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--allow-missing-legacy", action="store_true",
+            help="Legacy tables are gone: only number messages and fill last_message_*",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            stats = backfill_thread_state(allow_missing_legacy=options["allow_missing_legacy"])
+        except ThreadBackfillError as e:
+            raise CommandError(str(e))
+        self.stdout.write(
+            f"{stats['participants']} participants copied, {stats['messages_numbered']} messages numbered, "
+            f"{stats['threads']} threads updated, {stats['cursors']} read cursors set"
+        )
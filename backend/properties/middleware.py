@@ -1,53 +1,41 @@
 # backend/properties/middleware.py
 from django.utils.deprecation import MiddlewareMixin
-from django.urls import resolve
-from django.db import DatabaseError
 import logging
-from .models.listings import PropertyListing
-from .services.search import SearchRankingService
+import uuid
+from .services.engagement import record_view
 
 logger = logging.getLogger(__name__)
 
 
 class ListingViewTrackingMiddleware(MiddlewareMixin):
     """
-    Middleware to track property listing views and update engagement metrics.
+    Middleware to track property listing views.
+
+    Views are only buffered here; properties.services.engagement flushes them to
+    ListingEngagement (and recomputes ranking) in aggregate, off the request path.
     """
     
     def process_view(self, request, view_func, view_args, view_kwargs):
         """
-        Track listing views and update engagement metrics.
+        Buffer a view for listing detail requests. Performs no database access.
         """
         # Skip for non-GET requests
         if request.method != "GET":
             return None
 
+        # Django has already resolved the URL by the time process_view runs
+        match = getattr(request, "resolver_match", None)
+        if match is None or match.url_name != "listing-detail":
+            return None
+
+        listing_id = view_kwargs.get("pk") or view_kwargs.get("id")
+        if not listing_id:
+            return None
+
         try:
-            match = resolve(request.path_info)
-        except Exception:
+            listing_id = uuid.UUID(str(listing_id))
+        except ValueError:
             return None
 
-        # Track listing detail views
-        if match.url_name == "listing-detail":
-            listing_id = view_kwargs.get("pk") or view_kwargs.get("id")
-            
-            if not listing_id:
-                return None
-
-            try:
-                listing = PropertyListing.objects.select_related('engagement').get(pk=listing_id)
-                self._update_listing_engagement(listing)
-            except PropertyListing.DoesNotExist:
-                pass
-            except Exception as e:
-                logger.error(f"Error tracking listing view: {e}")
-            
+        record_view(listing_id)
         return None
-
-    def _update_listing_engagement(self, listing):
-        """
-        Update engagement metrics and ranking for a listing.
-        """
-        if hasattr(listing, "engagement"):
-            listing.engagement.increment_views()
-            SearchRankingService.update_listing_ranking(listing)
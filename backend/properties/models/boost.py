@@ -70,6 +70,9 @@ class BoostPurchase(models.Model):
 
     class Meta:
         ordering = ["-purchased_at"]
+        indexes = [
+            models.Index(fields=["reference"]),  # webhook confirmation / reconciliation lookups
+        ]
 
     def activate(self, at=None):
         at = at or timezone.now()
@@ -0,0 +1,23 @@
+# backend/properties/models/card.py
+from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+
+
+class ListingCard(models.Model):
+    """
+    Precomputed list-view representation of a published listing.
+    `data` holds the PropertyListingSummarySerializer payload (cover media,
+    counts, price display, owner name) so browse pages skip per-row queries.
+    Maintained by properties.services.cards via signals.
+    """
+    listing = models.OneToOneField(
+        "properties.PropertyListing",
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="card",
+    )
+    data = models.JSONField(encoder=DjangoJSONEncoder)
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Card for {self.listing_id}"
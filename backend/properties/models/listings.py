@@ -1,6 +1,8 @@
 import uuid
 from django.conf import settings
 from django.contrib.gis.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.utils.text import slugify
 from django.utils.timezone import now
 from django.core.validators import MinValueValidator
@@ -12,6 +14,21 @@ def generate_property_uid():
     return f"PROP-{uuid.uuid4().hex[:10].upper()}"
 
 
+# Text search configuration shared by the stored document and the query side
+SEARCH_CONFIG = "english"
+SEARCH_FIELDS = ("title", "short_description", "description", "address")
+
+
+def listing_search_vector():
+    """Weighted search document: title > short description/address > description."""
+    return (
+        SearchVector("title", weight="A", config=SEARCH_CONFIG)
+        + SearchVector("short_description", weight="B", config=SEARCH_CONFIG)
+        + SearchVector("address", weight="B", config=SEARCH_CONFIG)
+        + SearchVector("description", weight="C", config=SEARCH_CONFIG)
+    )
+
+
 class PropertyListing(models.Model):
     class ListingType(models.TextChoices):
         RENT = "RENT", "Rent"
@@ -78,6 +95,9 @@ class PropertyListing(models.Model):
     ranking_score = models.FloatField(default=0)
     boost_until = models.DateTimeField(null=True, blank=True)  # From new code
     is_boosted = models.BooleanField(default=False)  # From new code
+
+    # Full-text search document, maintained in save()
+    search_vector = SearchVectorField(null=True, editable=False)
     
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
@@ -90,6 +110,7 @@ class PropertyListing(models.Model):
             models.Index(fields=["property_uid"]),
             models.Index(fields=["listing_type"]),
             models.Index(fields=["is_published"]),
+            GinIndex(fields=["search_vector"], name="listing_search_vector_gin"),
         ]
 
     def save(self, *args, **kwargs):
@@ -105,6 +126,11 @@ class PropertyListing(models.Model):
             
         super().save(*args, **kwargs)
 
+        # Refresh the search document when text fields may have changed
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or set(update_fields) & set(SEARCH_FIELDS):
+            type(self).objects.filter(pk=self.pk).update(search_vector=listing_search_vector())
+
     def __str__(self):
         return f"{self.title} - {self.property_uid}"
 
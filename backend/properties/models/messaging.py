@@ -2,8 +2,12 @@
 import uuid
 from django.db import models
 from django.conf import settings
+from django.db import transaction
+from django.db.models import F
 from django.utils.timezone import now
 
+PREVIEW_LENGTH = 140
+
 
 class MessageThread(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -22,34 +26,103 @@ class MessageThread(models.Model):
     )
     participants = models.ManyToManyField(
         settings.AUTH_USER_MODEL, 
+        through="ThreadParticipant",
         related_name="threads_participating"
     )
     is_active = models.BooleanField(default=True)  # Added for thread management
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)  # Added for consistency
 
+    # Denormalized from the newest message (kept by Message.save)
+    last_message = models.ForeignKey(
+        "Message",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+"
+    )
+    last_message_seq = models.PositiveIntegerField(default=0)  # also the thread's message count
+    last_message_at = models.DateTimeField(null=True, blank=True)
+    last_message_preview = models.CharField(max_length=PREVIEW_LENGTH, blank=True)
+    last_message_sender = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+"
+    )
+
     class Meta:
         ordering = ["-updated_at"]  # Order by last activity
         indexes = [
             models.Index(fields=["listing", "created_at"]),
             models.Index(fields=["created_by", "created_at"]),
+            models.Index(fields=["-last_message_at"]),
         ]
 
     def __str__(self):
         listing_info = f" - {self.listing.title}" if self.listing else ""
         return f"Thread: {self.subject or 'No Subject'}{listing_info}"
 
-    def last_message(self):
-        """Get the most recent message in the thread"""
-        return self.messages.order_by('-created_at').first()
-
     def unread_count(self, user):
         """Get unread message count for a specific user"""
-        return self.messages.exclude(read_by=user).count()
+        cursor = self.participant_states.filter(user=user).values_list("last_read_seq", flat=True).first()
+        return max(self.last_message_seq - (cursor or 0), 0)
 
     def mark_read(self, user):
-        """Mark all messages in thread as read for a user"""
-        self.messages.exclude(read_by=user).update(read_by=user)
+        """Mark all messages in thread as read for a user (one cursor UPDATE)"""
+        return self.participant_states.filter(user=user, last_read_seq__lt=self.last_message_seq).update(
+            last_read_seq=self.last_message_seq,
+            last_read_message=self.last_message_id,
+            last_read_at=now(),
+        )
+
+    @classmethod
+    def inbox_for(cls, user):
+        """
+        Threads `user` participates in, newest activity first, each annotated with
+        `unread` (messages after the user's read cursor) - a single indexed query.
+        """
+        return (
+            cls.objects.filter(participant_states__user=user)
+            .annotate(unread=F("last_message_seq") - F("participant_states__last_read_seq"))
+            .order_by(F("last_message_at").desc(nulls_last=True), "-created_at")
+        )
+
+
+class ThreadParticipant(models.Model):
+    """
+    A user's membership of a thread plus their read cursor: everything up to
+    last_read_seq is read, so unread = thread.last_message_seq - last_read_seq.
+    """
+    thread = models.ForeignKey(
+        MessageThread,
+        on_delete=models.CASCADE,
+        related_name="participant_states"
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="thread_states"
+    )
+    last_read_message = models.ForeignKey(
+        "Message",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+"
+    )
+    last_read_seq = models.PositiveIntegerField(default=0)
+    last_read_at = models.DateTimeField(null=True, blank=True)
+    joined_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "thread"], name="uniq_thread_participant"),
+        ]
+
+    def __str__(self):
+        return f"{self.user} in {self.thread_id} (read to {self.last_read_seq})"
 
 
 class Message(models.Model):
@@ -65,13 +138,9 @@ class Message(models.Model):
         related_name="sent_messages"
     )
     body = models.TextField()
+    seq = models.PositiveIntegerField(default=0, editable=False)  # position in the thread, from 1
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)  # Added for consistency
-    read_by = models.ManyToManyField(
-        settings.AUTH_USER_MODEL, 
-        related_name="read_messages", 
-        blank=True
-    )
 
     class Meta:
         ordering = ["created_at"]  # Chronological order for messages
@@ -79,16 +148,42 @@ class Message(models.Model):
             models.Index(fields=["thread", "created_at"]),
             models.Index(fields=["sender", "created_at"]),
         ]
+        constraints = [
+            models.UniqueConstraint(fields=["thread", "seq"], name="uniq_message_thread_seq"),
+        ]
 
     def __str__(self):
         return f"Message from {self.sender} in {self.thread}"
 
     def save(self, *args, **kwargs):
-        """Update thread's updated_at when new message is added"""
-        super().save(*args, **kwargs)
-        # Update the thread's updated_at timestamp
-        MessageThread.objects.filter(id=self.thread.id).update(updated_at=now())
+        """New messages take the next seq and update the thread's last_message_* fields"""
+        if not self._state.adding:
+            return super().save(*args, **kwargs)
+        with transaction.atomic():
+            # Row lock serializes senders in this thread, so seq is gapless
+            last_seq = (
+                MessageThread.objects.select_for_update()
+                .filter(id=self.thread_id)
+                .values_list("last_message_seq", flat=True)
+                .get()
+            )
+            self.seq = last_seq + 1
+            super().save(*args, **kwargs)
+            MessageThread.objects.filter(id=self.thread_id).update(
+                last_message=self.pk,
+                last_message_seq=self.seq,
+                last_message_at=self.created_at,
+                last_message_preview=self.body[:PREVIEW_LENGTH],
+                last_message_sender=self.sender_id,
+                updated_at=now(),
+            )
+            # Sending a message reads the thread up to it
+            ThreadParticipant.objects.filter(thread_id=self.thread_id, user_id=self.sender_id).update(
+                last_read_message=self.pk,
+                last_read_seq=self.seq,
+                last_read_at=self.created_at,
+            )
 
     def is_read_by(self, user):
         """Check if message has been read by a specific user"""
-        return self.read_by.filter(id=user.id).exists()
+        return ThreadParticipant.objects.filter(thread_id=self.thread_id, user=user, last_read_seq__gte=self.seq).exists()
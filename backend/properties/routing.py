@@ -0,0 +1,7 @@
+# backend/properties/routing.py
+from django.urls import path
+from .consumers import ThreadConsumer
+
+websocket_urlpatterns = [
+    path("ws/threads/<uuid:thread_id>/", ThreadConsumer.as_asgi()),
+]
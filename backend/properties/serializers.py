@@ -1,4 +1,5 @@
 # backend/properties/serializers.py
+from django.contrib.auth import get_user_model
 from rest_framework import serializers
 from .models.listings import PropertyListing
 from .models.units import ApartmentUnit
@@ -131,14 +132,21 @@ class PropertyListingSummarySerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ["id", "property_uid", "created_at"]
 
+    # Card builds annotate counts and prefetch covers; fall back to queries otherwise
     def get_media_count(self, obj):
-        return obj.media.count()
+        count = getattr(obj, "card_media_count", None)
+        return obj.media.count() if count is None else count
 
     def get_units_count(self, obj):
-        return obj.units.count()
+        count = getattr(obj, "card_units_count", None)
+        return obj.units.count() if count is None else count
 
     def get_cover_image(self, obj):
-        cover_media = obj.media.filter(is_cover=True).first()
+        covers = getattr(obj, "card_covers", None)
+        if covers is not None:
+            cover_media = covers[0] if covers else None
+        else:
+            cover_media = obj.media.filter(is_cover=True).first()
         if cover_media:
             return PropertyMediaSerializer(cover_media).data
         return None
@@ -164,14 +172,18 @@ class MessageSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Message
-        fields = ["id", "thread", "sender", "sender_name", "body", "created_at"]
-        read_only_fields = ["id", "created_at"]
+        fields = ["id", "thread", "sender", "sender_name", "body", "seq", "created_at"]
+        read_only_fields = ["id", "seq", "created_at"]
 
 
 class MessageThreadSerializer(serializers.ModelSerializer):
-    messages = MessageSerializer(many=True, read_only=True)
+    """Inbox row: built from the thread's denormalized last_message_* fields, no message queries."""
     listing_title = serializers.CharField(source="listing.title", read_only=True)
     created_by_name = serializers.CharField(source="created_by.get_full_name", read_only=True)
+    # Declared so it stays writable now that it goes through ThreadParticipant
+    participants = serializers.PrimaryKeyRelatedField(
+        many=True, queryset=get_user_model().objects.all(), required=False
+    )
     last_message = serializers.SerializerMethodField()
     unread_count = serializers.SerializerMethodField()
     
@@ -179,19 +191,35 @@ class MessageThreadSerializer(serializers.ModelSerializer):
         model = MessageThread
         fields = [
             "id", "listing", "listing_title", "subject", "created_by", 
-            "created_by_name", "participants", "messages", "last_message",
+            "created_by_name", "participants", "last_message",
             "unread_count", "is_active", "created_at"
         ]
         read_only_fields = ["id", "created_at"]
 
     def get_last_message(self, obj):
-        last_msg = obj.messages.order_by('-created_at').first()
-        if last_msg:
-            return MessageSerializer(last_msg).data
-        return None
+        if not obj.last_message_id:
+            return None
+        return {
+            "id": obj.last_message_id,
+            "sender": obj.last_message_sender_id,
+            "body": obj.last_message_preview,
+            "seq": obj.last_message_seq,
+            "created_at": obj.last_message_at,
+        }
 
     def get_unread_count(self, obj):
+        # Annotated by MessageThread.inbox_for
+        unread = getattr(obj, "unread", None)
+        if unread is not None:
+            return unread
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            return obj.messages.exclude(read_by=request.user).count()
+            return obj.unread_count(request.user)
         return 0
+
+
+class MessageThreadDetailSerializer(MessageThreadSerializer):
+    messages = MessageSerializer(many=True, read_only=True)
+
+    class Meta(MessageThreadSerializer.Meta):
+        fields = MessageThreadSerializer.Meta.fields + ["messages"]
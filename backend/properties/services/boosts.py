@@ -0,0 +1,41 @@
+# backend/properties/services/boosts.py
+import logging
+
+from django.utils import timezone
+
+from properties.models.boost import BoostPurchase
+
+logger = logging.getLogger(__name__)
+
+BOOST_SCORE = 50  # Admin controlled logic; 50 is example
+
+
+def activate_purchase(purchase, reference=None):
+    """Mark a boost purchase paid, start it and lift the listing's boost score. Idempotent."""
+    if purchase.status == "success":
+        return purchase, False
+    if reference:
+        purchase.reference = reference
+        purchase.save(update_fields=["reference"])
+    purchase.activate(at=timezone.now())
+
+    opt = getattr(purchase.listing, "optimization", None)
+    if opt:
+        opt.boost_score = max(opt.boost_score, BOOST_SCORE)
+        opt.save(update_fields=["boost_score", "updated_at"])
+    return purchase, True
+
+
+def confirm_external(reference, purchase_uid=None):
+    """Activate the purchase paid externally under `reference` (or `purchase_uid`). Returns it or None."""
+    qs = BoostPurchase.objects.select_related("listing", "package")
+    purchase = None
+    if purchase_uid:
+        purchase = qs.filter(uid=purchase_uid).first()
+    if purchase is None and reference:
+        purchase = qs.filter(reference=reference).first()
+    if purchase is None:
+        logger.warning(f"No boost purchase for reference {reference} / uid {purchase_uid}")
+        return None
+    activate_purchase(purchase, reference)
+    return purchase
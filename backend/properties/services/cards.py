@@ -0,0 +1,121 @@
+# backend/properties/services/cards.py
+"""
+Listing cards: denormalized list-view rows for anonymous browse traffic.
+
+- ListingCard rows are rebuilt (after commit) when a listing, its media or its
+  units change; unpublished listings have no card.
+- Browse pages are cached under normalized query params plus a version key;
+  any card change bumps the version so stale pages are never served past a write.
+"""
+import hashlib
+import logging
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Prefetch
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION_KEY = "listing_cards:version"
+CACHE_TTL_SECONDS = 60
+
+
+def _listing_queryset():
+    from properties.models.listings import PropertyListing
+    from properties.models.media import PropertyMedia
+
+    return (
+        PropertyListing.objects.select_related("owner")
+        .annotate(
+            card_media_count=Count("media", distinct=True),
+            card_units_count=Count("units", distinct=True),
+        )
+        .prefetch_related(
+            Prefetch("media", queryset=PropertyMedia.objects.filter(is_cover=True), to_attr="card_covers")
+        )
+    )
+
+
+def build_card_data(listing):
+    """Summary payload for one listing, using annotated counts and the prefetched cover."""
+    from properties.serializers import PropertyListingSummarySerializer
+
+    data = dict(PropertyListingSummarySerializer(listing).data)
+    data["price_display"] = f"{listing.currency} {listing.price:,.2f}"
+    return data
+
+
+def refresh_cards(listing_ids):
+    """Rebuild cards for the given listings; drop cards of unpublished/deleted ones."""
+    from properties.models.card import ListingCard
+
+    listing_ids = list(listing_ids)
+    if not listing_ids:
+        return 0
+    listings = list(_listing_queryset().filter(pk__in=listing_ids, is_published=True))
+    ListingCard.objects.filter(listing_id__in=listing_ids).exclude(
+        listing_id__in=[listing.pk for listing in listings]
+    ).delete()
+    for listing in listings:
+        ListingCard.objects.update_or_create(listing_id=listing.pk, defaults={"data": build_card_data(listing)})
+    bump_version()
+    return len(listings)
+
+
+def rebuild_all_cards(chunk_size=500):
+    """Backfill / repair every card. Returns the number of cards written."""
+    from properties.models.card import ListingCard
+    from properties.models.listings import PropertyListing
+
+    ListingCard.objects.exclude(listing__is_published=True).delete()
+    written = 0
+    ids = list(PropertyListing.objects.filter(is_published=True).values_list("pk", flat=True))
+    for start in range(0, len(ids), chunk_size):
+        written += refresh_cards(ids[start:start + chunk_size])
+    return written
+
+
+def schedule_refresh(listing_id):
+    """Queue a card refresh for after the current transaction commits."""
+    if not listing_id:
+        return
+
+    def _refresh():
+        try:
+            refresh_cards([listing_id])
+        except Exception as e:
+            logger.error(f"Error refreshing card for listing {listing_id}: {e}")
+
+    transaction.on_commit(_refresh)
+
+
+def bump_version():
+    try:
+        cache.incr(CACHE_VERSION_KEY)
+    except ValueError:
+        cache.set(CACHE_VERSION_KEY, 1, None)
+
+
+def page_cache_key(params):
+    """Cache key for a browse page: version + normalized (sorted, non-empty) params."""
+    version = cache.get(CACHE_VERSION_KEY) or 0
+    normalized = "&".join(
+        f"{key}={value.strip()}"
+        for key in sorted(params.keys())
+        for value in sorted(params.getlist(key))
+        if value.strip()
+    )
+    digest = hashlib.sha1(normalized.encode()).hexdigest()
+    return f"listing_cards:page:{version}:{digest}"
+
+
+def cards_for(listing_ids):
+    """Card payloads in the order of `listing_ids`, building any that are missing."""
+    from properties.models.card import ListingCard
+
+    cards = dict(ListingCard.objects.filter(listing_id__in=listing_ids).values_list("listing_id", "data"))
+    missing = [pk for pk in listing_ids if pk not in cards]
+    if missing:
+        refresh_cards(missing)
+        cards.update(ListingCard.objects.filter(listing_id__in=missing).values_list("listing_id", "data"))
+    return [cards[pk] for pk in listing_ids if pk in cards]
@@ -0,0 +1,185 @@
+# backend/properties/services/engagement.py
+"""
+Buffered listing engagement counters.
+
+Request handlers only record increments here (no database writes). A periodic
+flush folds everything buffered for a listing into one aggregated UPDATE on
+ListingEngagement and recomputes ranking for the flushed listings.
+
+Backends (settings.ENGAGEMENT_BUFFER_BACKEND):
+  - "redis": counters live in Redis hashes shared by every web process;
+             flushed by the properties.tasks.flush_listing_engagement beat task.
+  - "local": counters live in process memory; a daemon thread flushes them
+             every ENGAGEMENT_FLUSH_INTERVAL_SECONDS (dev/tests).
+"""
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import F
+from django.utils.timezone import now
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ("views", "inspections", "inquiries")
+
+
+class RedisEngagementBuffer:
+    DIRTY_KEY = "engagement:dirty"
+    KEY = "engagement:{}"
+
+    def __init__(self, client=None):
+        self._client = client
+
+    @property
+    def client(self):
+        if self._client is None:
+            from config.redis import get_redis
+            self._client = get_redis()
+        return self._client
+
+    def add(self, listing_id, field, amount=1, at=None):
+        key = self.KEY.format(listing_id)
+        pipe = self.client.pipeline(transaction=False)
+        pipe.hincrby(key, field, amount)
+        if field == "views":
+            pipe.hset(key, "last_viewed", (at or now()).timestamp())
+        pipe.sadd(self.DIRTY_KEY, str(listing_id))
+        pipe.execute()
+
+    def drain(self, limit=1000):
+        """
+        Pop up to `limit` dirty listings and return {listing_id: {field: value}}.
+        Each hash is read and deleted atomically, so increments that land after
+        the read start a fresh hash and re-mark the listing dirty.
+        """
+        ids = self.client.spop(self.DIRTY_KEY, limit) or []
+        drained = {}
+        for raw_id in ids:
+            listing_id = raw_id.decode() if isinstance(raw_id, bytes) else raw_id
+            pipe = self.client.pipeline(transaction=True)
+            pipe.hgetall(self.KEY.format(listing_id))
+            pipe.delete(self.KEY.format(listing_id))
+            values, _ = pipe.execute()
+            if values:
+                drained[listing_id] = {
+                    (k.decode() if isinstance(k, bytes) else k): float(v) for k, v in values.items()
+                }
+        return drained
+
+    def restore(self, listing_id, values):
+        """Put drained counts back after a failed flush."""
+        for field in FIELDS:
+            if values.get(field):
+                self.add(listing_id, field, int(values[field]))
+
+
+class LocalEngagementBuffer:
+    def __init__(self, interval=None):
+        self.interval = interval or settings.ENGAGEMENT_FLUSH_INTERVAL_SECONDS
+        self._lock = threading.Lock()
+        self._pending = defaultdict(Counter)
+        self._thread = None
+
+    def add(self, listing_id, field, amount=1, at=None):
+        with self._lock:
+            counts = self._pending[str(listing_id)]
+            counts[field] += amount
+            if field == "views":
+                counts["last_viewed"] = (at or now()).timestamp()
+        self._ensure_flusher()
+
+    def drain(self, limit=None):
+        with self._lock:
+            drained, self._pending = self._pending, defaultdict(Counter)
+        return {listing_id: dict(counts) for listing_id, counts in drained.items()}
+
+    def restore(self, listing_id, values):
+        for field in FIELDS:
+            if values.get(field):
+                self.add(listing_id, field, int(values[field]))
+
+    def _ensure_flusher(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="engagement-flush", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                flush(self)
+            except Exception as e:
+                logger.error(f"Engagement flush failed: {e}")
+
+
+_buffer = None
+
+
+def get_buffer():
+    global _buffer
+    if _buffer is None:
+        if getattr(settings, "ENGAGEMENT_BUFFER_BACKEND", "redis") == "local":
+            _buffer = LocalEngagementBuffer()
+        else:
+            _buffer = RedisEngagementBuffer()
+    return _buffer
+
+
+def record(listing_id, field, amount=1):
+    """Buffer an engagement increment. Never raises into the request path."""
+    try:
+        get_buffer().add(listing_id, field, amount)
+    except Exception as e:
+        logger.error(f"Error buffering {field} for listing {listing_id}: {e}")
+
+
+def record_view(listing_id):
+    record(listing_id, "views")
+
+
+def record_inspection(listing_id):
+    record(listing_id, "inspections")
+
+
+def record_inquiry(listing_id):
+    record(listing_id, "inquiries")
+
+
+def flush(buffer=None, limit=1000):
+    """
+    Apply buffered increments: one UPDATE per listing, then a batch ranking recompute.
+    Returns the number of listings flushed.
+    """
+    from properties.models.engagement import ListingEngagement
+    from .ranking import BatchRankingEngine
+
+    buffer = buffer or get_buffer()
+    pending = buffer.drain(limit)
+    if not pending:
+        return 0
+
+    flushed = []
+    for listing_id, values in pending.items():
+        updates = {field: F(field) + int(values[field]) for field in FIELDS if values.get(field)}
+        if values.get("last_viewed"):
+            updates["last_viewed"] = datetime.fromtimestamp(values["last_viewed"], tz=dt_timezone.utc)
+        if not updates:
+            continue
+        # update() skips auto_now, so set updated_at explicitly
+        updates["updated_at"] = now()
+        try:
+            ListingEngagement.objects.filter(listing_id=listing_id).update(**updates)
+            flushed.append(listing_id)
+        except Exception as e:
+            logger.error(f"Error flushing engagement for listing {listing_id}: {e}")
+            buffer.restore(listing_id, values)
+
+    # Ranking is recomputed only here, once per flushed listing
+    if flushed:
+        BatchRankingEngine(published_only=False).run(listing_ids=flushed)
+    return len(flushed)
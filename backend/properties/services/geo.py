@@ -0,0 +1,119 @@
+# backend/properties/services/geo.py
+"""
+Index-friendly geospatial filters for PropertyListing.location (geography, GiST).
+
+- Radius search uses ST_DWithin (`location__dwithin`), which the GiST index can
+  answer, and only then annotates Distance for ordering.
+- Bounds use ST_CoveredBy (`location__coveredby`), supported on geography.
+- Map clustering buckets points into a grid over the requested bounds and
+  aggregates in SQL, so a zoomed-out viewport returns one row per cell.
+"""
+from django.contrib.gis.db.models.functions import Distance
+from django.contrib.gis.geos import Point, Polygon
+from django.contrib.gis.measure import D
+from django.db.models import Avg, CharField, Count, FloatField, Func, IntegerField, Max, Min
+from django.db.models.functions import Cast, Floor
+
+DEFAULT_GRID_SIZE = 24
+MAX_GRID_SIZE = 64
+MAX_RADIUS_KM = 100
+
+
+class _Coord(Func):
+    """ST_X / ST_Y on a geography column (cast to geometry)."""
+    output_field = FloatField()
+
+    def __init__(self, expression, function):
+        super().__init__(expression, function=function, template="%(function)s(%(expressions)s::geometry)")
+
+
+def parse_bounds(value):
+    """`sw_lng,sw_lat,ne_lng,ne_lat` -> (sw_lng, sw_lat, ne_lng, ne_lat) or None."""
+    if not value:
+        return None
+    try:
+        parts = [float(p) for p in value.split(",")]
+    except ValueError:
+        return None
+    if len(parts) != 4:
+        return None
+    sw_lng, sw_lat, ne_lng, ne_lat = parts
+    if sw_lng >= ne_lng or sw_lat >= ne_lat:
+        return None
+    return sw_lng, sw_lat, ne_lng, ne_lat
+
+
+def bounds_polygon(bounds):
+    sw_lng, sw_lat, ne_lng, ne_lat = bounds
+    return Polygon.from_bbox((sw_lng, sw_lat, ne_lng, ne_lat))
+
+
+def parse_point(lat, lng):
+    if lat in (None, "") or lng in (None, ""):
+        return None
+    try:
+        return Point(float(lng), float(lat), srid=4326)
+    except (TypeError, ValueError):
+        return None
+
+
+def filter_bounds(qs, bounds):
+    poly = bounds_polygon(bounds)
+    poly.srid = 4326
+    return qs.filter(location__coveredby=poly)
+
+
+def filter_radius(qs, point, radius_km=None):
+    """
+    Restrict to `radius_km` around `point` with ST_DWithin (GiST-indexed) and
+    annotate `distance`. Without a radius only the distance is annotated.
+    """
+    if radius_km is not None:
+        radius_km = min(float(radius_km), MAX_RADIUS_KM)
+        qs = qs.filter(location__dwithin=(point, D(km=radius_km)))
+    return qs.annotate(distance=Distance("location", point))
+
+
+def cluster(qs, bounds, grid_size=DEFAULT_GRID_SIZE):
+    """
+    Grid-cluster listings inside `bounds`.
+    Returns a list of {lat, lng, count, min_price, max_price, listing_id?, cell}
+    where lat/lng is the centroid of the cell's points; listing_id is set for
+    single-listing cells so the client can link the pin directly.
+    """
+    grid_size = max(1, min(int(grid_size), MAX_GRID_SIZE))
+    sw_lng, sw_lat, ne_lng, ne_lat = bounds
+    cell_w = (ne_lng - sw_lng) / grid_size
+    cell_h = (ne_lat - sw_lat) / grid_size
+
+    rows = (
+        filter_bounds(qs.order_by().prefetch_related(None), bounds)
+        .annotate(pt_lng=_Coord("location", "ST_X"), pt_lat=_Coord("location", "ST_Y"))
+        .annotate(
+            cell_x=Cast(Floor((_Coord("location", "ST_X") - sw_lng) / cell_w), IntegerField()),
+            cell_y=Cast(Floor((_Coord("location", "ST_Y") - sw_lat) / cell_h), IntegerField()),
+        )
+        .values("cell_x", "cell_y")
+        .annotate(
+            count=Count("pk"),
+            lat=Avg("pt_lat"),
+            lng=Avg("pt_lng"),
+            min_price=Min("price"),
+            max_price=Max("price"),
+            sample_id=Min(Cast("pk", CharField())),
+        )
+        .order_by()
+    )
+
+    clusters = []
+    for row in rows:
+        clusters.append({
+            "cell": [row["cell_x"], row["cell_y"]],
+            "lat": row["lat"],
+            "lng": row["lng"],
+            "count": row["count"],
+            "min_price": row["min_price"],
+            "max_price": row["max_price"],
+            "listing_id": row["sample_id"] if row["count"] == 1 else None,
+        })
+    return clusters
@@ -0,0 +1,204 @@
+# backend/properties/services/messaging.py
+"""
+Real-time thread messaging (see properties.consumers.ThreadConsumer).
+
+A message sent over a socket is fanned out to the thread's channel-layer group
+straight away and queued in Redis; persist_pending() writes queued messages in
+batches (one locked thread read, one bulk INSERT and one thread UPDATE per
+thread per batch) from the properties.tasks.persist_thread_messages task, then
+tells the group each message's seq. Clients already have a queued message, so
+a thread whose write fails is put back on the queue for the next sweep (and
+moved to a dead-letter list after MAX_PERSIST_ATTEMPTS); only drafts for a
+thread that no longer exists are dropped.
+
+Presence is a Redis sorted set per thread of "<user_id>|<channel_name>"
+members scored by last heartbeat, so several tabs per user and crashed
+workers (whose entries just age out) are handled.
+"""
+import json
+import logging
+import time
+import uuid
+from collections import defaultdict
+
+from asgiref.sync import async_to_sync, sync_to_async
+from channels.layers import get_channel_layer
+from django.db import transaction
+from django.utils.timezone import now
+
+logger = logging.getLogger(__name__)
+
+PENDING_KEY = "messaging:pending"
+DEAD_LETTER_KEY = "messaging:dead_letter"
+MAX_PERSIST_ATTEMPTS = 5
+PERSIST_LOCK_KEY = "messaging:persist_lock"
+PERSIST_SCHEDULED_KEY = "messaging:persist_scheduled"
+PERSIST_DELAY_SECONDS = 1
+PERSIST_BATCH = 500
+PRESENCE_KEY = "messaging:presence:{}"
+PRESENCE_TTL_SECONDS = 60
+MAX_BODY_LENGTH = 5000
+
+
+def group_name(thread_id):
+    return f"thread.{thread_id}"
+
+
+def is_participant(thread_id, user_id):
+    from properties.models.messaging import ThreadParticipant
+
+    return ThreadParticipant.objects.filter(thread_id=thread_id, user_id=user_id, thread__is_active=True).exists()
+
+
+def draft(thread_id, sender_id, body):
+    """A message as broadcast and queued before it has a seq."""
+    return {
+        "id": str(uuid.uuid4()),
+        "thread": str(thread_id),
+        "sender": sender_id,
+        "body": body,
+        "sent_at": now().isoformat(),
+    }
+
+
+async def queue(redis_client, message):
+    await redis_client.rpush(PENDING_KEY, json.dumps(message))
+    # One delayed persist per burst; the beat sweep covers a lost schedule
+    if await redis_client.set(PERSIST_SCHEDULED_KEY, 1, nx=True, ex=PERSIST_DELAY_SECONDS):
+        from properties.tasks import persist_thread_messages
+
+        await sync_to_async(persist_thread_messages.apply_async)(countdown=PERSIST_DELAY_SECONDS)
+
+
+def append_messages(thread_id, drafts):
+    """
+    Persist drafts for one thread in order. Drafts whose id already exists are
+    skipped, so a batch re-read after a crash is not written twice.
+    Returns [(message_id, seq)] for the rows written.
+    """
+    from properties.models.messaging import PREVIEW_LENGTH, Message, MessageThread, ThreadParticipant
+
+    with transaction.atomic():
+        last_seq = (
+            MessageThread.objects.select_for_update()
+            .filter(id=thread_id)
+            .values_list("last_message_seq", flat=True)
+            .get()
+        )
+        existing = set(
+            str(pk) for pk in Message.objects.filter(id__in=[d["id"] for d in drafts]).values_list("id", flat=True)
+        )
+        rows = []
+        for d in drafts:
+            if d["id"] in existing:
+                continue
+            last_seq += 1
+            rows.append(Message(id=d["id"], thread_id=thread_id, sender_id=d["sender"], body=d["body"], seq=last_seq))
+        if not rows:
+            return []
+        Message.objects.bulk_create(rows)
+        last = rows[-1]
+        MessageThread.objects.filter(id=thread_id).update(
+            last_message=last.pk,
+            last_message_seq=last.seq,
+            last_message_at=last.created_at,
+            last_message_preview=last.body[:PREVIEW_LENGTH],
+            last_message_sender=last.sender_id,
+            updated_at=now(),
+        )
+        # Sending reads the thread up to the sender's last message
+        newest_by_sender = {}
+        for row in rows:
+            newest_by_sender[row.sender_id] = row
+        for sender_id, row in newest_by_sender.items():
+            ThreadParticipant.objects.filter(
+                thread_id=thread_id, user_id=sender_id, last_read_seq__lt=row.seq
+            ).update(last_read_message=row.pk, last_read_seq=row.seq, last_read_at=row.created_at)
+    return [(str(row.pk), row.seq) for row in rows]
+
+
+def persist_pending(limit=PERSIST_BATCH, client=None):
+    """Write up to `limit` queued messages. Returns how many were taken off the queue."""
+    from config.redis import get_redis
+    from properties.models.messaging import MessageThread
+
+    client = client or get_redis()
+    lock = client.lock(PERSIST_LOCK_KEY, timeout=60, blocking_timeout=0)
+    if not lock.acquire(blocking=False):
+        return 0
+    try:
+        raw = client.lrange(PENDING_KEY, 0, limit - 1)
+        if not raw:
+            return 0
+        by_thread = defaultdict(list)
+        for item in raw:
+            try:
+                message = json.loads(item)
+                thread_id = message["thread"]
+            except (ValueError, KeyError, TypeError):
+                logger.error(f"Dropping unreadable queued message: {item!r}")
+                continue
+            by_thread[thread_id].append(message)
+
+        channel_layer = get_channel_layer()
+        retry, dead = [], []
+        for thread_id, drafts in by_thread.items():
+            try:
+                written = append_messages(thread_id, drafts)
+            except MessageThread.DoesNotExist:
+                logger.error(f"Dropping {len(drafts)} queued messages for missing thread {thread_id}")
+                continue
+            except Exception as e:
+                # Deadlock, lost connection, ...: keep them for the next sweep
+                logger.error(f"Failed to persist {len(drafts)} messages for thread {thread_id}, will retry: {e}")
+                for d in drafts:
+                    d["attempts"] = d.get("attempts", 0) + 1
+                    (dead if d["attempts"] >= MAX_PERSIST_ATTEMPTS else retry).append(json.dumps(d))
+                continue
+            if written:
+                try:
+                    async_to_sync(channel_layer.group_send)(
+                        group_name(thread_id),
+                        {"type": "message.persisted", "messages": [{"id": i, "seq": s} for i, s in written]},
+                    )
+                except Exception as e:
+                    logger.error(f"Failed to announce persisted messages for thread {thread_id}: {e}")
+
+        pipe = client.pipeline(transaction=True)
+        pipe.ltrim(PENDING_KEY, len(raw), -1)
+        if retry:
+            # Back at the head, in their original order, ahead of anything queued since
+            pipe.lpush(PENDING_KEY, *reversed(retry))
+        if dead:
+            logger.error(f"Moving {len(dead)} messages to {DEAD_LETTER_KEY} after {MAX_PERSIST_ATTEMPTS} failed attempts")
+            pipe.rpush(DEAD_LETTER_KEY, *dead)
+        pipe.execute()
+        # Put-back drafts do not count, so the task's drain loop stops and retries on the next sweep
+        return len(raw) - len(retry)
+    finally:
+        try:
+            lock.release()
+        except Exception:
+            pass
+
+
+async def presence_touch(redis_client, thread_id, user_id, channel_name):
+    key = PRESENCE_KEY.format(thread_id)
+    await redis_client.zadd(key, {f"{user_id}|{channel_name}": time.time()})
+    await redis_client.expire(key, PRESENCE_TTL_SECONDS * 2)
+
+
+async def presence_leave(redis_client, thread_id, user_id, channel_name):
+    await redis_client.zrem(PRESENCE_KEY.format(thread_id), f"{user_id}|{channel_name}")
+
+
+async def presence_online(redis_client, thread_id):
+    """User ids with a live connection to the thread."""
+    key = PRESENCE_KEY.format(thread_id)
+    await redis_client.zremrangebyscore(key, 0, time.time() - PRESENCE_TTL_SECONDS)
+    members = await redis_client.zrange(key, 0, -1)
+    online = set()
+    for member in members:
+        member = member.decode() if isinstance(member, bytes) else member
+        online.add(member.split("|", 1)[0])
+    return sorted(online)
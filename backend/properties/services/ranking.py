@@ -0,0 +1,133 @@
+# backend/properties/services/ranking.py
+"""
+Set-based ranking recompute.
+
+Each keyset-paginated chunk of listings is scored from one annotated query
+(media presence, engagement counters and boost state come back as columns),
+and only rows whose score changed are written back with bulk_update.
+"""
+import logging
+import time
+
+from django.db.models import BooleanField, Exists, ExpressionWrapper, OuterRef, Q
+from django.utils.timezone import now
+
+from properties.models.listings import PropertyListing
+from properties.models.media import PropertyMedia
+from .search import SearchRankingService
+
+logger = logging.getLogger(__name__)
+
+
+class BatchRankingEngine:
+    """
+    Recompute ranking_score for many listings at once.
+
+    Usage:
+        stats = BatchRankingEngine(chunk_size=1000).run()
+        stats = BatchRankingEngine(published_only=False).run(listing_ids=[...])
+    """
+
+    VALUE_FIELDS = (
+        "pk",
+        "ranking_score",
+        "created_at",
+        "facilities",
+        "service_charge",
+        "is_boosted",
+        "boost_until",
+        "engagement__views",
+        "engagement__inspections",
+        "engagement__inquiries",
+    )
+
+    def __init__(self, chunk_size=1000, published_only=True):
+        self.chunk_size = chunk_size
+        self.published_only = published_only
+
+    def get_queryset(self, listing_ids=None):
+        qs = PropertyListing.objects.all()
+        if self.published_only:
+            qs = qs.filter(is_published=True)
+        if listing_ids is not None:
+            qs = qs.filter(pk__in=listing_ids)
+        return qs.annotate(
+            has_media=Exists(PropertyMedia.objects.filter(listing=OuterRef("pk"))),
+            has_description=ExpressionWrapper(~Q(description=""), output_field=BooleanField()),
+        )
+
+    def iter_chunks(self, qs):
+        """Yield lists of value rows, paginating on pk instead of OFFSET."""
+        last_pk = None
+        while True:
+            page = qs.order_by("pk")
+            if last_pk is not None:
+                page = page.filter(pk__gt=last_pk)
+            rows = list(page.values(*self.VALUE_FIELDS, "has_media", "has_description")[: self.chunk_size])
+            if not rows:
+                return
+            yield rows
+            last_pk = rows[-1]["pk"]
+
+    def score_rows(self, rows, at):
+        """Return {pk: new_score} for rows whose score changed."""
+        changed = {}
+        for row in rows:
+            score = SearchRankingService.total_from_values(
+                created_at=row["created_at"],
+                has_description=row["has_description"],
+                has_media=row["has_media"],
+                has_facilities=bool(row["facilities"]),
+                service_charge=row["service_charge"],
+                views=row["engagement__views"],
+                inspections=row["engagement__inspections"],
+                inquiries=row["engagement__inquiries"],
+                is_boosted=row["is_boosted"],
+                boost_until=row["boost_until"],
+                at=at,
+            )
+            if row["ranking_score"] != score:
+                changed[row["pk"]] = score
+        return changed
+
+    def write_back(self, changed):
+        if not changed:
+            return 0
+        PropertyListing.objects.bulk_update(
+            [PropertyListing(pk=pk, ranking_score=score) for pk, score in changed.items()],
+            ["ranking_score"],
+            batch_size=self.chunk_size,
+        )
+        return len(changed)
+
+    def run(self, listing_ids=None):
+        """
+        Score every matching listing and persist changed scores.
+        Returns throughput stats: processed, updated, chunks, elapsed_seconds, rows_per_sec.
+        """
+        started = time.monotonic()
+        at = now()
+        processed = updated = chunks = 0
+
+        for rows in self.iter_chunks(self.get_queryset(listing_ids)):
+            try:
+                updated += self.write_back(self.score_rows(rows, at))
+            except Exception as e:
+                # Keep going with the next chunk; a failed chunk is retried on the next run
+                logger.error(f"Ranking chunk starting at {rows[0]['pk']} failed: {e}")
+            processed += len(rows)
+            chunks += 1
+
+        elapsed = time.monotonic() - started
+        stats = {
+            "processed": processed,
+            "updated": updated,
+            "chunks": chunks,
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_sec": round(processed / elapsed, 1) if elapsed > 0 else float(processed),
+        }
+        logger.info(
+            "Ranking recompute: %(processed)s rows, %(updated)s updated in %(elapsed_seconds)ss (%(rows_per_sec)s rows/sec)",
+            stats,
+        )
+        return stats
@@ -1,39 +1,38 @@
 # backend/properties/services/search.py
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Cast
 from django.utils.timezone import now
 from datetime import timedelta
 
 
 class SearchRankingService:
     @staticmethod
-    def calculate_recency_weight(created_at):
+    def calculate_recency_weight(created_at, at=None):
         """Recent listings get higher weight (decays over 90 days)."""
-        age_days = (now() - created_at).days
+        age_days = ((at or now()) - created_at).days
         return max(0.1, 1 - (age_days / 90))
 
     @staticmethod
-    def calculate_completeness_weight(listing):
-        """Score based on description, photos, facilities, service charge."""
+    def completeness_from_values(has_description, has_media, has_facilities, service_charge):
+        """Completeness weight from plain values (shared by single and batch scoring)."""
         score = 0
-        if listing.description:
+        if has_description:
             score += 0.2
-        if listing.media.exists():  # Updated from photos to media
+        if has_media:
             score += 0.3
-        if listing.facilities:
+        if has_facilities:
             score += 0.2
-        if listing.service_charge and listing.service_charge > 0:
+        if service_charge and service_charge > 0:
             score += 0.1
         return min(score, 0.8)  # Cap completeness weight at 0.8
 
     @staticmethod
-    def calculate_engagement_weight(listing):
-        """Score based on engagement metrics: views, inspections & inquiries."""
-        if not hasattr(listing, "engagement"):
-            return 0
-
-        # Safe attribute access with defaults
-        views = getattr(listing.engagement, "views", 0) or 0
-        inspections = getattr(listing.engagement, "inspections", 0) or 0
-        inquiries = getattr(listing.engagement, "inquiries", 0) or 0
+    def engagement_from_values(views, inspections, inquiries):
+        """Engagement weight from raw counters (None is treated as 0)."""
+        views = views or 0
+        inspections = inspections or 0
+        inquiries = inquiries or 0
 
         # Normalize engagement with different weights
         score = 0
@@ -47,15 +46,61 @@ class SearchRankingService:
         return min(score, 0.8)  # Cap total engagement at 0.8
 
     @staticmethod
-    def calculate_boost_weight(listing):
-        """Calculate boost score based on current boosting status."""
-        # Check if listing is currently boosted
-        if getattr(listing, "is_boosted", False):
-            boost_until = getattr(listing, "boost_until", None)
-            if boost_until and boost_until > now():
-                return 0.3  # Fixed boost weight
+    def boost_from_values(is_boosted, boost_until, at=None):
+        """Fixed boost weight while a boost is running."""
+        if is_boosted and boost_until and boost_until > (at or now()):
+            return 0.3
         return 0
 
+    @classmethod
+    def total_from_values(cls, *, created_at, has_description, has_media, has_facilities,
+                          service_charge, views, inspections, inquiries, is_boosted,
+                          boost_until, at=None):
+        """
+        Total ranking score from plain column values.
+        Used by the batch engine so a whole chunk is scored without per-listing queries.
+        """
+        at = at or now()
+        total = (
+            cls.calculate_recency_weight(created_at, at=at)
+            + cls.completeness_from_values(has_description, has_media, has_facilities, service_charge)
+            + cls.engagement_from_values(views, inspections, inquiries)
+            + cls.boost_from_values(is_boosted, boost_until, at=at)
+        )
+        # Ensure total doesn't exceed reasonable bounds
+        return min(round(total, 4), 2.5)
+
+    @classmethod
+    def calculate_completeness_weight(cls, listing):
+        """Score based on description, photos, facilities, service charge."""
+        return cls.completeness_from_values(
+            bool(listing.description),
+            listing.media.exists(),  # Updated from photos to media
+            bool(listing.facilities),
+            listing.service_charge,
+        )
+
+    @classmethod
+    def calculate_engagement_weight(cls, listing):
+        """Score based on engagement metrics: views, inspections & inquiries."""
+        if not hasattr(listing, "engagement"):
+            return 0
+
+        # Safe attribute access with defaults
+        return cls.engagement_from_values(
+            getattr(listing.engagement, "views", 0),
+            getattr(listing.engagement, "inspections", 0),
+            getattr(listing.engagement, "inquiries", 0),
+        )
+
+    @classmethod
+    def calculate_boost_weight(cls, listing):
+        """Calculate boost score based on current boosting status."""
+        return cls.boost_from_values(
+            getattr(listing, "is_boosted", False),
+            getattr(listing, "boost_until", None),
+        )
+
     @classmethod
     def calculate_total_ranking(cls, listing):
         """Calculate total ranking score with weighted components."""
@@ -89,22 +134,65 @@ class SearchRankingService:
 
     @classmethod
     def batch_update_rankings(cls, listings=None):
-        """Batch update rankings for multiple listings."""
-        if listings is None:
-            listings = PropertyListing.objects.all()
-        
-        updated_count = 0
-        for listing in listings:
-            try:
-                ranking_score = cls.calculate_total_ranking(listing)
-                if listing.ranking_score != ranking_score:
-                    listing.ranking_score = ranking_score
-                    listing.save(update_fields=['ranking_score'])
-                    updated_count += 1
-            except Exception as e:
-                import logging
-                logger = logging.getLogger(__name__)
-                logger.error(f"Error in batch update for listing {listing.pk}: {e}")
-                continue
-        
-        return updated_count
+        """
+        Batch update rankings for multiple listings.
+        Delegates to the set-based BatchRankingEngine; returns the number of rows changed.
+        """
+        from .ranking import BatchRankingEngine
+
+        listing_ids = None
+        if hasattr(listings, "values_list"):
+            listing_ids = list(listings.values_list("pk", flat=True))
+        elif listings is not None:
+            listing_ids = [getattr(listing, "pk", listing) for listing in listings]
+        stats = BatchRankingEngine(published_only=False).run(listing_ids=listing_ids)
+        return stats["updated"]
+
+
+class ListingSearchService:
+    """
+    Ranked full-text search over PropertyListing.search_vector (GIN-indexed).
+    Shared by both listing viewsets so `?q=` and `?query=` behave the same.
+    """
+
+    # ranking_score is capped at 2.5; text rank is normalised into [0, 1)
+    TEXT_RANK_WEIGHT = 2.5
+    # ts_rank normalisation 32: rank / (rank + 1)
+    RANK_NORMALIZATION = 32
+
+    @staticmethod
+    def build_query(text):
+        from properties.models.listings import SEARCH_CONFIG
+        return SearchQuery(text, search_type="websearch", config=SEARCH_CONFIG)
+
+    @classmethod
+    def search(cls, qs, text):
+        """
+        Filter `qs` to listings matching `text` and annotate:
+          text_rank    - weighted ts_rank of the match
+          search_score - ranking_score blended with text relevance
+        Callers order by `-search_score` in place of `-ranking_score`.
+        """
+        text = (text or "").strip()
+        if not text:
+            return qs
+        query = cls.build_query(text)
+        return (
+            qs.filter(search_vector=query)
+            .annotate(
+                text_rank=SearchRank(
+                    F("search_vector"), query, normalization=Value(cls.RANK_NORMALIZATION)
+                )
+            )
+            .annotate(
+                search_score=Cast(F("ranking_score"), FloatField())
+                + F("text_rank") * cls.TEXT_RANK_WEIGHT
+            )
+        )
+
+    @staticmethod
+    def refresh_vectors(queryset=None):
+        """Rebuild stored search documents in one UPDATE (backfill / bulk imports)."""
+        from properties.models.listings import PropertyListing, listing_search_vector
+        qs = queryset if queryset is not None else PropertyListing.objects.all()
+        return qs.update(search_vector=listing_search_vector())
@@ -0,0 +1,194 @@
+# backend/properties/services/thread_backfill.py
+"""
+One-off move of existing threads onto read cursors (`manage.py backfill_thread_cursors`).
+
+Before ThreadParticipant and Message.seq existed, membership lived in the
+auto-created participants M2M table and read state in Message.read_by. In one
+transaction this:
+  1. drops uniq_message_thread_seq, so legacy messages (all seq=0) can be renumbered
+  2. copies the legacy participants rows into ThreadParticipant
+  3. numbers each thread's legacy messages 1..n by created_at
+  4. fills MessageThread.last_message_* from the newest message
+  5. sets each read cursor to just before the first message the user neither
+     sent nor had in read_by (never moving a cursor backwards)
+  6. adds uniq_message_thread_seq back
+Each step only touches rows still in their legacy state, so re-running is safe.
+Postgres only, like the rest of the schema.
+
+Order matters: the migration generated by the `through=` switch and the
+read_by removal drops both legacy tables. Put migration_operation() in that
+migration after ThreadParticipant (with its user/thread unique constraint, which
+the participant copy's ON CONFLICT relies on) and the new Message/MessageThread
+columns are created, and before the participants/read_by fields are removed:
+
+    operations = [
+        ...CreateModel("ThreadParticipant"), AddField(...seq, last_message_*)...,
+        thread_backfill.migration_operation(),
+        ...RemoveField("messagethread", "participants"), RemoveField("message", "read_by")...,
+    ]
+
+guard_legacy_drop (a pre_migrate receiver) refuses to run a migration that
+drops them without it while they still hold rows, and backfill_thread_state()
+raises rather than silently copying nothing once they are gone.
+"""
+import logging
+
+from django.db import DEFAULT_DB_ALIAS, connections, migrations, transaction
+
+logger = logging.getLogger(__name__)
+
+SEQ_CONSTRAINT = "uniq_message_thread_seq"
+LEGACY_FIELDS = {("messagethread", "participants"), ("message", "read_by")}
+
+
+class ThreadBackfillError(RuntimeError):
+    pass
+
+
+def _legacy_tables():
+    from properties.models.messaging import Message, MessageThread
+
+    return f"{MessageThread._meta.db_table}_participants", f"{Message._meta.db_table}_read_by"
+
+
+def backfill_thread_state(using=DEFAULT_DB_ALIAS, allow_missing_legacy=False):
+    """
+    Run the steps above. Returns rows touched per step. Raises ThreadBackfillError if
+    the legacy tables are already gone while messages are still unnumbered, unless
+    allow_missing_legacy (then only numbering and last_message_* are filled).
+    """
+    from properties.models.messaging import PREVIEW_LENGTH, Message, MessageThread, ThreadParticipant
+
+    connection = connections[using]
+    threads = MessageThread._meta.db_table
+    messages = Message._meta.db_table
+    participants = ThreadParticipant._meta.db_table
+    legacy_participants, legacy_read_by = _legacy_tables()
+    stats = {}
+
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        tables = set(connection.introspection.table_names(cursor))
+        missing = [t for t in (legacy_participants, legacy_read_by) if t not in tables]
+        if missing and not allow_missing_legacy:
+            cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {messages} WHERE seq = 0)")
+            if cursor.fetchone()[0]:
+                raise ThreadBackfillError(
+                    f"{', '.join(missing)} already dropped but messages are still unnumbered: "
+                    f"participants/read state cannot be recovered from them. Restore the tables and run "
+                    f"the backfill before the migration that drops them (or pass allow_missing_legacy)."
+                )
+
+        cursor.execute("SELECT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = %s)", [SEQ_CONSTRAINT])
+        had_constraint = cursor.fetchone()[0]
+        cursor.execute(f"ALTER TABLE {messages} DROP CONSTRAINT IF EXISTS {SEQ_CONSTRAINT}")
+
+        stats["participants"] = 0
+        if legacy_participants in tables:
+            cursor.execute(f"""
+                INSERT INTO {participants} (thread_id, user_id, last_read_seq, joined_at)
+                SELECT lp.messagethread_id, lp.user_id, 0, t.created_at
+                FROM {legacy_participants} lp JOIN {threads} t ON t.id = lp.messagethread_id
+                ON CONFLICT (user_id, thread_id) DO NOTHING
+            """)
+            stats["participants"] = cursor.rowcount
+
+        cursor.execute(f"""
+            UPDATE {messages} m SET seq = n.seq
+            FROM (
+                SELECT id, ROW_NUMBER() OVER (PARTITION BY thread_id ORDER BY created_at, id) AS seq
+                FROM {messages}
+                WHERE thread_id IN (SELECT thread_id FROM {messages} WHERE seq = 0)
+            ) n
+            WHERE m.id = n.id
+        """)
+        stats["messages_numbered"] = cursor.rowcount
+
+        cursor.execute(f"""
+            UPDATE {threads} t SET
+                last_message_id = m.id,
+                last_message_seq = m.seq,
+                last_message_at = m.created_at,
+                last_message_preview = LEFT(m.body, %s),
+                last_message_sender_id = m.sender_id
+            FROM (
+                SELECT DISTINCT ON (thread_id) thread_id, id, seq, created_at, body, sender_id
+                FROM {messages} ORDER BY thread_id, seq DESC
+            ) m
+            WHERE t.id = m.thread_id AND t.last_message_seq < m.seq
+        """, [PREVIEW_LENGTH])
+        stats["threads"] = cursor.rowcount
+
+        read = (
+            f"EXISTS (SELECT 1 FROM {legacy_read_by} r WHERE r.message_id = m.id AND r.user_id = p2.user_id)"
+            if legacy_read_by in tables else "FALSE"
+        )
+        cursor.execute(f"""
+            UPDATE {participants} p SET last_read_seq = c.seq
+            FROM (
+                SELECT p2.id, COALESCE((
+                    SELECT MIN(m.seq) - 1 FROM {messages} m
+                    WHERE m.thread_id = p2.thread_id AND m.sender_id <> p2.user_id AND NOT {read}
+                ), t.last_message_seq) AS seq
+                FROM {participants} p2 JOIN {threads} t ON t.id = p2.thread_id
+            ) c
+            WHERE p.id = c.id AND c.seq > p.last_read_seq
+        """)
+        stats["cursors"] = cursor.rowcount
+        cursor.execute(f"""
+            UPDATE {participants} p SET last_read_message_id = m.id, last_read_at = m.created_at
+            FROM {messages} m
+            WHERE m.thread_id = p.thread_id AND m.seq = p.last_read_seq AND p.last_read_message_id IS NULL
+        """)
+
+        if had_constraint:
+            # Inside the schema migration the constraint may not exist yet; its AddConstraint runs later
+            cursor.execute(f"ALTER TABLE {messages} ADD CONSTRAINT {SEQ_CONSTRAINT} UNIQUE (thread_id, seq)")
+
+    logger.info(f"Thread cursor backfill: {stats}")
+    return stats
+
+
+def _run_in_migration(apps, schema_editor):
+    backfill_thread_state(using=schema_editor.connection.alias)
+
+
+def migration_operation():
+    """RunPython for the schema migration, between creating ThreadParticipant and dropping the legacy fields."""
+    return migrations.RunPython(_run_in_migration, migrations.RunPython.noop)
+
+
+def guard_legacy_drop(plan=None, using=DEFAULT_DB_ALIAS, **kwargs):
+    """
+    pre_migrate receiver: refuse a plan that removes MessageThread.participants or
+    Message.read_by without migration_operation() in the same migration, while the
+    legacy tables still hold rows (a fresh database has nothing to lose).
+    """
+    for migration, backwards in plan or []:
+        if backwards or migration.app_label != "properties":
+            continue
+        drops = any(
+            isinstance(op, (migrations.RemoveField, migrations.AlterField))
+            and (op.model_name_lower, op.name_lower) in LEGACY_FIELDS
+            for op in migration.operations
+        )
+        backfilled = any(
+            isinstance(op, migrations.RunPython) and op.code is _run_in_migration for op in migration.operations
+        )
+        if drops and not backfilled and _legacy_rows(using):
+            raise ThreadBackfillError(
+                f"Migration {migration.app_label}.{migration.name} drops the legacy thread participants/read_by "
+                f"tables, which still hold rows. Add thread_backfill.migration_operation() to it before the "
+                f"RemoveField operations, or run `manage.py backfill_thread_cursors` first and then remove the rows."
+            )
+
+
+def _legacy_rows(using):
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        tables = set(connection.introspection.table_names(cursor))
+        for table in _legacy_tables():
+            if table in tables:
+                cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {table})")
+                if cursor.fetchone()[0]:
+                    return True
+    return False
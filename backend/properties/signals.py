@@ -1,12 +1,16 @@
 # backend/properties/signals.py
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from django.db import DatabaseError
+from django.db import DatabaseError, transaction
 import logging
 from .models.listings import PropertyListing
 from .models.inspection import InspectionBooking
 from .models.engagement import ListingEngagement
+from .models.media import PropertyMedia
+from .models.units import ApartmentUnit
 from .services.search import SearchRankingService
+from .services.engagement import record_inspection
+from .services import cards
 from properties.models.boost import BoostPurchase
 from .signals import update_listing_ranking  # careful with imports; update_listing_ranking already defined in this file
 
@@ -40,24 +44,11 @@ def create_listing_related_records(sender, instance, created, **kwargs):
 @receiver(post_save, sender=InspectionBooking)
 def handle_inspection_booking_engagement(sender, instance, created, **kwargs):
     """
-    Handle inspection booking creation and update engagement metrics.
+    Buffer an inspection for the listing; the engagement flush applies it and
+    recomputes ranking in aggregate.
     """
     if created:
-        listing = instance.listing
-        
-        # Update engagement metrics if engagement record exists
-        if hasattr(listing, 'engagement'):
-            try:
-                listing.engagement.increment_inspections()
-                logger.info(f"Incremented inspections for listing {listing.id}")
-            except Exception as e:
-                logger.error(f"Failed to increment inspections for listing {listing.id}: {e}")
-        
-        # Update ranking for the listing
-        try:
-            SearchRankingService.update_listing_ranking(listing)
-        except Exception as e:
-            logger.error(f"Failed to update ranking after inspection for listing {listing.id}: {e}")
+        record_inspection(instance.listing_id)
 
 
 @receiver(post_save, sender=BoostPurchase)
@@ -68,3 +59,24 @@ def handle_boost_activation(sender, instance, created, **kwargs):
             update_listing_ranking(instance.listing)
         except Exception:
             pass
+
+
+@receiver(post_save, sender=PropertyListing)
+def refresh_listing_card_on_save(sender, instance, **kwargs):
+    """Rebuild (or drop, if unpublished) the listing card after commit."""
+    cards.schedule_refresh(instance.pk)
+
+
+@receiver(post_delete, sender=PropertyListing)
+def invalidate_listing_cards_on_delete(sender, instance, **kwargs):
+    # The card row cascades; only cached browse pages need invalidating
+    transaction.on_commit(cards.bump_version)
+
+
+@receiver(post_save, sender=PropertyMedia)
+@receiver(post_delete, sender=PropertyMedia)
+@receiver(post_save, sender=ApartmentUnit)
+@receiver(post_delete, sender=ApartmentUnit)
+def refresh_listing_card_on_child_change(sender, instance, **kwargs):
+    """Media and unit changes alter cover/counts on the parent listing's card."""
+    cards.schedule_refresh(instance.listing_id)
@@ -7,30 +7,43 @@ from properties.models.boost import PlatformSetting
 from properties.signals import update_listing_ranking
 
 @shared_task
-def recalc_all_listing_rankings(batch_size=500):
+def recalc_all_listing_rankings(batch_size=1000):
     """
-    Recompute ranking_score for all listings. This is scheduled daily.
+    Recompute ranking_score for all published listings. This is scheduled daily.
+    Scores whole keyset-paginated chunks at once and only writes rows whose score changed.
+    Returns throughput stats (processed, updated, rows_per_sec, ...).
     """
-    from properties.services.search import SearchRankingService
-    qs = PropertyListing.objects.filter(is_published=True)
-    total = qs.count()
-    page = 0
+    from properties.services.ranking import BatchRankingEngine
+    return BatchRankingEngine(chunk_size=batch_size).run()
+
+@shared_task
+def flush_listing_engagement(limit=1000):
+    """
+    Apply buffered listing views/inspections/inquiries in aggregate and recompute
+    ranking for the touched listings. Scheduled every minute.
+    """
+    from properties.services.engagement import flush
+    total = 0
     while True:
-        listings = qs[page * batch_size:(page + 1) * batch_size]
-        if not listings:
-            break
-        for listing in listings:
-            try:
-                score = SearchRankingService.calculate_total_ranking(listing)
-                if listing.ranking_score != score:
-                    listing.ranking_score = score
-                    listing.save(update_fields=["ranking_score"])
-            except Exception:
-                # swallow to avoid stopping worker; monitor logs
-                pass
-        page += 1
-        if page * batch_size >= total:
-            break
+        flushed = flush(limit=limit)
+        total += flushed
+        if flushed < limit:
+            return total
+
+@shared_task
+def refresh_listing_search_vectors():
+    """
+    Rebuild PropertyListing.search_vector for every listing (backfill after the
+    column is added, or after bulk writes that bypass save()).
+    """
+    from properties.services.search import ListingSearchService
+    return ListingSearchService.refresh_vectors()
+
+@shared_task
+def rebuild_listing_cards():
+    """Backfill/repair ListingCard rows for all published listings."""
+    from properties.services.cards import rebuild_all_cards
+    return rebuild_all_cards()
 
 @shared_task
 def expire_free_posts():
@@ -57,3 +70,17 @@ def expire_free_posts():
         listing.is_published = False
         listing.save(update_fields=["is_published"])
         # optionally: remove images if admin setting says so (not implemented here but easy to add)
+
+@shared_task
+def persist_thread_messages(limit=500):
+    """
+    Write messages queued by the thread WebSocket consumer in batches. Scheduled
+    right after a burst starts, and every minute as a sweep.
+    """
+    from properties.services.messaging import persist_pending
+    total = 0
+    while True:
+        taken = persist_pending(limit=limit)
+        total += taken
+        if taken < limit:
+            return total
@@ -4,14 +4,19 @@ from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from django.db.models import Count, Sum, F, Q
 from django.utils.timezone import now
+from django.core.cache import cache
 from datetime import timedelta
 
 from .models.listings import PropertyListing
 from .models.units import ApartmentUnit
 from .models.media import PropertyMedia
 from .models.inspection import InspectionBooking
-from .models.messaging import MessageThread, Message
+from .models.messaging import MessageThread, Message, ThreadParticipant
 from .models.engagement import ListingEngagement
+from .services.engagement import record_inquiry
+from .services.search import ListingSearchService
+from .services import cards, geo
+from config.permissions import OwnershipOrReadOnly, OwnershipQuerysetMixin, holds_role, ownership_q
 from .serializers import (
     PropertyListingSerializer,
     PropertyListingCreateSerializer,
@@ -20,60 +25,35 @@ from .serializers import (
     PropertyMediaSerializer,
     InspectionBookingSerializer,
     MessageThreadSerializer,
+    MessageThreadDetailSerializer,
     MessageSerializer
 )
 
 
-class IsOwnerOrAgentOrReadOnly(permissions.BasePermission):
+class IsOwnerOrAgentOrReadOnly(OwnershipOrReadOnly):
     """
-    Custom permission to only allow owners, agents, or staff to edit objects.
+    Only owners, agents (the view's `ownership` roles), or staff may edit objects.
     Read-only for safe methods.
     """
-    def has_object_permission(self, request, view, obj):
-        if request.method in permissions.SAFE_METHODS:
-            return True
-        
-        # Handle different object types
-        if hasattr(obj, 'owner') and hasattr(obj, 'agent'):
-            # For PropertyListing
-            return obj.owner == request.user or obj.agent == request.user or request.user.is_staff
-        elif hasattr(obj, 'listing'):
-            # For ApartmentUnit, PropertyMedia - check parent listing permissions
-            listing = obj.listing
-            return listing.owner == request.user or listing.agent == request.user or request.user.is_staff
-        elif hasattr(obj, 'manager'):
-            # For legacy Property model compatibility
-            return obj.manager == request.user or request.user.is_staff
-        else:
-            return request.user.is_staff
-
-
-class IsInspectionParticipantOrReadOnly(permissions.BasePermission):
+
+
+class IsInspectionParticipantOrReadOnly(OwnershipOrReadOnly):
     """
     Permission for inspection bookings - allow tenants, listing owners/agents, and staff
     """
-    def has_object_permission(self, request, view, obj):
-        if request.method in permissions.SAFE_METHODS:
-            return True
-        
-        # Tenant can update their own booking (cancel, etc.)
-        if obj.tenant == request.user:
-            return True
-        
-        # Listing owner/agent can update status
-        listing = obj.listing
-        if listing.owner == request.user or listing.agent == request.user:
-            return True
-        
-        return request.user.is_staff
 
 
-class PropertyListingViewSet(viewsets.ModelViewSet):
+LISTING_ROLES = {"is_owner": "owner", "is_agent": "agent"}
+LISTING_CHILD_ROLES = {"is_owner": "listing__owner", "is_agent": "listing__agent"}
+
+
+class PropertyListingViewSet(OwnershipQuerysetMixin, viewsets.ModelViewSet):
     """
     ViewSet for PropertyListing with advanced filtering and search
     """
     queryset = PropertyListing.objects.all().prefetch_related("media", "units", "engagement")
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsOwnerOrAgentOrReadOnly]
+    ownership = LISTING_ROLES
 
     def get_serializer_class(self):
         if self.action == 'create':
@@ -91,11 +71,7 @@ class PropertyListingViewSet(viewsets.ModelViewSet):
             qs = qs.filter(is_published=True)
         elif not self.request.user.is_staff:
             # Authenticated non-staff users see their own listings + published
-            qs = qs.filter(
-                Q(is_published=True) | 
-                Q(owner=self.request.user) | 
-                Q(agent=self.request.user)
-            )
+            qs = qs.filter(Q(is_published=True) | ownership_q(self.request.user, self.ownership))
 
         # Apply filters from query parameters
         params = self.request.query_params
@@ -118,15 +94,10 @@ class PropertyListingViewSet(viewsets.ModelViewSet):
         if bedrooms:
             qs = qs.filter(bedrooms__gte=bedrooms)
         
-        # Search query
-        search_query = params.get("q")
+        # Full-text search query (ranked)
+        search_query = (params.get("q") or "").strip()
         if search_query:
-            qs = qs.filter(
-                Q(title__icontains=search_query) |
-                Q(description__icontains=search_query) |
-                Q(short_description__icontains=search_query) |
-                Q(address__icontains=search_query)
-            )
+            qs = ListingSearchService.search(qs, search_query)
         
         # Location-based filtering (simplified - could be enhanced with geo-spatial)
         location_query = params.get("location")
@@ -138,15 +109,54 @@ class PropertyListingViewSet(viewsets.ModelViewSet):
         if available_only and available_only.lower() == 'true':
             qs = qs.filter(units__is_available=True).distinct()
 
-        # Order by boosted, ranking score, and creation date
-        qs = qs.order_by(
+        # Map viewport: bounds=sw_lng,sw_lat,ne_lng,ne_lat
+        bounds = geo.parse_bounds(params.get("bounds"))
+        if bounds:
+            qs = geo.filter_bounds(qs, bounds)
+
+        # Center + radius (km) search via ST_DWithin; results come nearest first
+        point = geo.parse_point(params.get("lat"), params.get("lng"))
+        if point is not None:
+            try:
+                radius = float(params["radius"]) if params.get("radius") else None
+            except ValueError:
+                radius = None
+            qs = geo.filter_radius(qs, point, radius)
+
+        # Order by distance (when searching around a point), boosted, ranking score
+        # (blended with text relevance when searching), and creation date
+        ordering = [
             F("is_boosted").desc(nulls_last=True), 
-            "-ranking_score", 
+            "-search_score" if search_query else "-ranking_score", 
             "-created_at"
-        )
+        ]
+        if point is not None:
+            ordering.insert(0, "distance")
+        qs = qs.order_by(*ordering)
         
         return qs
 
+    def list(self, request, *args, **kwargs):
+        """
+        Anonymous browse is served from precomputed listing cards and a short-lived
+        page cache keyed by normalized query params; authenticated users get the
+        live serializer (they may see their own unpublished listings).
+        """
+        if request.user.is_authenticated:
+            return super().list(request, *args, **kwargs)
+
+        key = cards.page_cache_key(request.query_params)
+        data = cache.get(key)
+        if data is None:
+            ids = self.filter_queryset(self.get_queryset()).prefetch_related(None).values_list("pk", flat=True)
+            page = self.paginate_queryset(ids)
+            if page is not None:
+                data = self.get_paginated_response(cards.cards_for(list(page))).data
+            else:
+                data = cards.cards_for(list(ids))
+            cache.set(key, data, cards.CACHE_TTL_SECONDS)
+        return Response(data)
+
     def perform_create(self, serializer):
         """Set the owner when creating a new listing"""
         serializer.save(owner=self.request.user)
@@ -155,7 +165,7 @@ class PropertyListingViewSet(viewsets.ModelViewSet):
     def publish(self, request, pk=None):
         """Publish a listing"""
         listing = self.get_object()
-        if listing.owner != request.user and listing.agent != request.user and not request.user.is_staff:
+        if not self.holds_role(listing) and not request.user.is_staff:
             return Response(
                 {"detail": "You don't have permission to publish this listing."}, 
                 status=status.HTTP_403_FORBIDDEN
@@ -169,7 +179,7 @@ class PropertyListingViewSet(viewsets.ModelViewSet):
     def unpublish(self, request, pk=None):
         """Unpublish a listing"""
         listing = self.get_object()
-        if listing.owner != request.user and listing.agent != request.user and not request.user.is_staff:
+        if not self.holds_role(listing) and not request.user.is_staff:
             return Response(
                 {"detail": "You don't have permission to unpublish this listing."}, 
                 status=status.HTTP_403_FORBIDDEN
@@ -199,6 +209,31 @@ class PropertyListingViewSet(viewsets.ModelViewSet):
             "days": boost_days
         })
 
+    @action(detail=False, methods=["get"], url_path="map")
+    def map(self, request):
+        """
+        Clustered map pins for a viewport: ?bounds=sw_lng,sw_lat,ne_lng,ne_lat[&grid=24].
+        Other list filters apply. Returns one entry per occupied grid cell.
+        """
+        bounds = geo.parse_bounds(request.query_params.get("bounds"))
+        if not bounds:
+            return Response(
+                {"detail": "bounds=sw_lng,sw_lat,ne_lng,ne_lat is required."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            grid = int(request.query_params.get("grid", geo.DEFAULT_GRID_SIZE))
+        except ValueError:
+            grid = geo.DEFAULT_GRID_SIZE
+
+        clusters = geo.cluster(self.filter_queryset(self.get_queryset()), bounds, grid)
+        return Response({
+            "bounds": bounds,
+            "grid": grid,
+            "total": sum(c["count"] for c in clusters),
+            "clusters": clusters,
+        })
+
     @action(detail=True, methods=["get"])
     def engagement(self, request, pk=None):
         """Get engagement metrics for a listing"""
@@ -215,23 +250,21 @@ class PropertyListingViewSet(viewsets.ModelViewSet):
         return Response({"detail": "No engagement data available."})
 
 
-class ApartmentUnitViewSet(viewsets.ModelViewSet):
+class ApartmentUnitViewSet(OwnershipQuerysetMixin, viewsets.ModelViewSet):
     """
     ViewSet for ApartmentUnit management
     """
     queryset = ApartmentUnit.objects.select_related('listing')
     serializer_class = ApartmentUnitSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrAgentOrReadOnly]
+    ownership = LISTING_CHILD_ROLES
 
     def get_queryset(self):
         qs = super().get_queryset()
         
         # Non-staff users only see units from their listings
         if not self.request.user.is_staff:
-            qs = qs.filter(
-                Q(listing__owner=self.request.user) |
-                Q(listing__agent=self.request.user)
-            )
+            qs = qs.filter(ownership_q(self.request.user, self.ownership))
         
         # Filter by listing if provided
         listing_id = self.request.query_params.get('listing')
@@ -248,59 +281,54 @@ class ApartmentUnitViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         """Validate that user has permission to add units to this listing"""
         listing = serializer.validated_data['listing']
-        if listing.owner != self.request.user and listing.agent != self.request.user and not self.request.user.is_staff:
+        if not holds_role(listing, self.request.user, LISTING_ROLES) and not self.request.user.is_staff:
             raise permissions.PermissionDenied("You don't have permission to add units to this listing.")
         serializer.save()
 
 
-class PropertyMediaViewSet(viewsets.ModelViewSet):
+class PropertyMediaViewSet(OwnershipQuerysetMixin, viewsets.ModelViewSet):
     """
     ViewSet for PropertyMedia management
     """
     queryset = PropertyMedia.objects.select_related('listing')
     serializer_class = PropertyMediaSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrAgentOrReadOnly]
+    ownership = LISTING_CHILD_ROLES
 
     def get_queryset(self):
         qs = super().get_queryset()
         
         # Non-staff users only see media from their listings
         if not self.request.user.is_staff:
-            qs = qs.filter(
-                Q(listing__owner=self.request.user) |
-                Q(listing__agent=self.request.user)
-            )
+            qs = qs.filter(ownership_q(self.request.user, self.ownership))
         
         return qs
 
     def perform_create(self, serializer):
         """Validate permissions and handle cover photo logic"""
         listing = serializer.validated_data['listing']
-        if listing.owner != self.request.user and listing.agent != self.request.user and not self.request.user.is_staff:
+        if not holds_role(listing, self.request.user, LISTING_ROLES) and not self.request.user.is_staff:
             raise permissions.PermissionDenied("You don't have permission to add media to this listing.")
         
         # If this is set as cover, it will be handled in the model's save method
         serializer.save()
 
 
-class InspectionBookingViewSet(viewsets.ModelViewSet):
+class InspectionBookingViewSet(OwnershipQuerysetMixin, viewsets.ModelViewSet):
     """
     ViewSet for InspectionBooking management
     """
     queryset = InspectionBooking.objects.select_related('listing', 'unit', 'tenant')
     serializer_class = InspectionBookingSerializer
     permission_classes = [permissions.IsAuthenticated, IsInspectionParticipantOrReadOnly]
+    ownership = {"is_tenant": "tenant", **LISTING_CHILD_ROLES}
 
     def get_queryset(self):
         qs = super().get_queryset()
         
         # Non-staff users see their own bookings or bookings for their listings
         if not self.request.user.is_staff:
-            qs = qs.filter(
-                Q(tenant=self.request.user) |
-                Q(listing__owner=self.request.user) |
-                Q(listing__agent=self.request.user)
-            )
+            qs = qs.filter(ownership_q(self.request.user, self.ownership))
         
         # Filter by status
         status_filter = self.request.query_params.get('status')
@@ -315,23 +343,14 @@ class InspectionBookingViewSet(viewsets.ModelViewSet):
         return qs.order_by('scheduled_date')
 
     def perform_create(self, serializer):
-        """Set the tenant and update engagement metrics"""
-        booking = serializer.save(tenant=self.request.user)
-        
-        # Update engagement metrics
-        listing = booking.listing
-        if hasattr(listing, "engagement"):
-            listing.engagement.increment_inspections()
-        
-        # Update ranking score (you can implement this signal)
-        # from .signals import update_listing_ranking
-        # update_listing_ranking(listing)
+        """Set the tenant; the post_save signal buffers the inspection count"""
+        serializer.save(tenant=self.request.user)
 
     @action(detail=True, methods=["post"], permission_classes=[permissions.IsAuthenticated])
     def approve(self, request, pk=None):
         """Approve an inspection booking"""
         booking = self.get_object()
-        if booking.listing.owner != request.user and booking.listing.agent != request.user and not request.user.is_staff:
+        if not self.holds_role(booking, "is_owner", "is_agent") and not request.user.is_staff:
             return Response(
                 {"detail": "Only the listing owner or agent can approve inspections."}, 
                 status=status.HTTP_403_FORBIDDEN
@@ -345,7 +364,7 @@ class InspectionBookingViewSet(viewsets.ModelViewSet):
     def complete(self, request, pk=None):
         """Mark an inspection as completed"""
         booking = self.get_object()
-        if booking.listing.owner != request.user and booking.listing.agent != request.user and not request.user.is_staff:
+        if not self.holds_role(booking, "is_owner", "is_agent") and not request.user.is_staff:
             return Response(
                 {"detail": "Only the listing owner or agent can mark inspections as completed."}, 
                 status=status.HTTP_403_FORBIDDEN
@@ -359,16 +378,41 @@ class InspectionBookingViewSet(viewsets.ModelViewSet):
 # Message Thread and Message ViewSets
 class MessageThreadViewSet(viewsets.ModelViewSet):
     """ViewSet for MessageThread management"""
-    queryset = MessageThread.objects.select_related('listing', 'created_by').prefetch_related('participants', 'messages')
+    queryset = MessageThread.objects.select_related('listing', 'created_by')
     serializer_class = MessageThreadSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return self.queryset.filter(participants=self.request.user)
+        # Inbox order and unread counts come from the read cursors in one query
+        qs = MessageThread.inbox_for(self.request.user).select_related('listing', 'created_by')
+        if self.action == "list":
+            return qs.prefetch_related('participants')
+        return qs.prefetch_related('participants', 'messages__sender')
+
+    def get_serializer_class(self):
+        if self.action == "retrieve":
+            return MessageThreadDetailSerializer
+        return MessageThreadSerializer
 
     def perform_create(self, serializer):
         thread = serializer.save(created_by=self.request.user)
         thread.participants.add(self.request.user)
+        if thread.listing_id:
+            record_inquiry(thread.listing_id)
+
+    @action(detail=True, methods=["post"], url_path="mark-read")
+    def mark_read(self, request, pk=None):
+        thread = self.get_object()
+        thread.mark_read(request.user)
+        return Response({"unread_count": 0})
+
+    @action(detail=False, methods=["get"], url_path="unread-count")
+    def unread_total(self, request):
+        """Unread messages across all of the user's threads."""
+        total = ThreadParticipant.objects.filter(user=request.user).aggregate(
+            total=Sum(F("thread__last_message_seq") - F("last_read_seq"))
+        )["total"]
+        return Response({"unread_count": total or 0})
 
 
 class MessageViewSet(viewsets.ModelViewSet):
@@ -378,12 +422,19 @@ class MessageViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return self.queryset.filter(thread__participants=self.request.user)
+        qs = self.queryset.filter(thread__participants=self.request.user)
+        # Catch-up after a socket reconnect: ?thread=<id>&after_seq=<n>
+        thread_id = self.request.query_params.get("thread")
+        if thread_id:
+            qs = qs.filter(thread_id=thread_id)
+            after_seq = self.request.query_params.get("after_seq")
+            if after_seq and after_seq.isdigit():
+                qs = qs.filter(seq__gt=int(after_seq)).order_by("seq")
+        return qs
 
     def perform_create(self, serializer):
-        message = serializer.save(sender=self.request.user)
-        # Mark as read by sender
-        message.read_by.add(self.request.user)
+        # Message.save advances the sender's read cursor
+        serializer.save(sender=self.request.user)
 
 
 # Reporting endpoints
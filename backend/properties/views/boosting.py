@@ -7,16 +7,19 @@ from django.db import transaction
 from django.utils import timezone
 
 from properties.models.boost import BoostPackage, BoostPurchase
+from properties.services import boosts
 from properties.serializers.boosting import BoostPackageSerializer, BoostPurchaseCreateSerializer, BoostPurchaseSerializer
-from wallet.models import Wallet, WalletTransaction
+from wallet import ledger
+from wallet.models import Wallet
 
 class IsPropertyOwnerOrAgent(permissions.BasePermission):
     def has_permission(self, request, view):
         return request.user and request.user.is_authenticated
 
     def has_object_permission(self, request, view, obj):
-        # allow owner or agent or staff
-        return obj.owner == request.user or (hasattr(obj, "agent") and obj.agent == request.user) or request.user.is_staff
+        # allow owner or agent or staff (compare ids: no User rows loaded)
+        user_id = request.user.pk
+        return obj.owner_id == user_id or getattr(obj, "agent_id", None) == user_id or request.user.is_staff
 
 
 class BoostPackageListView(generics.ListAPIView):
@@ -65,22 +68,19 @@ class CreateBoostPurchaseView(APIView):
                 purchase.save(update_fields=["status"])
                 return Response({"detail": "No active wallet found"}, status=status.HTTP_400_BAD_REQUEST)
 
-            if wallet.balance < pkg.price:
+            # Deduct
+            try:
+                ledger.post(
+                    wallet,
+                    pkg.price,
+                    "debit",
+                    reference=f"BOOST:{purchase.uid}",
+                    description=f"Boost purchase for listing {listing.id}",
+                )
+            except ledger.InsufficientFunds:
                 purchase.status = "failed"
                 purchase.save(update_fields=["status"])
                 return Response({"detail": "Insufficient wallet balance"}, status=status.HTTP_400_BAD_REQUEST)
-
-            # Deduct
-            wallet.balance = wallet.balance - pkg.price
-            wallet.save(update_fields=["balance"])
-            WalletTransaction.objects.create(
-                wallet=wallet,
-                txn_type="debit",
-                amount=pkg.price,
-                reference=f"BOOST:{purchase.uid}",
-                description=f"Boost purchase for listing {listing.id}",
-                status="success",
-            )
             # Activate purchase
             purchase.activate(at=timezone.now())
 
@@ -113,17 +113,8 @@ class ConfirmExternalBoostView(APIView):
         except BoostPurchase.DoesNotExist:
             return Response({"detail": "Purchase not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        if purchase.status == "success":
+        purchase, activated = boosts.activate_purchase(purchase, reference)
+        if not activated:
             return Response({"detail": "Already processed"}, status=status.HTTP_200_OK)
 
-        # mark success and activate
-        purchase.reference = reference
-        purchase.activate(at=timezone.now())
-
-        # update boost score
-        opt = getattr(purchase.listing, "optimization", None)
-        if opt:
-            opt.boost_score = max(opt.boost_score, 50)
-            opt.save(update_fields=["boost_score", "updated_at"])
-
         return Response(BoostPurchaseSerializer(purchase).data, status=status.HTTP_200_OK)
@@ -1,7 +1,4 @@
 # backend/properties/views/listings.py
-from django.contrib.gis.geos import Polygon, Point
-from django.contrib.gis.db.models.functions import Distance
-from django.db.models import Q
 from django.utils import timezone
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
@@ -19,7 +16,8 @@ from .serializers.listings import (
     InspectionBookingSerializer,
     SearchOptimizationSerializer,
 )
-from .services.search import SearchRankingService
+from .services.search import SearchRankingService, ListingSearchService
+from .services import geo
 
 
 class PropertyListingViewSet(viewsets.ModelViewSet):
@@ -76,47 +74,24 @@ class PropertyListingViewSet(viewsets.ModelViewSet):
             except Exception:
                 pass
 
-        # Text search: simple IContains on title/description
+        # Full-text search (ranked, GIN-indexed search_vector)
         if qtext:
-            qs = qs.filter(Q(title__icontains=qtext) | Q(description__icontains=qtext))
+            qs = ListingSearchService.search(qs, qtext)
 
         # Bounding box search: bounds=sw_lng,sw_lat,ne_lng,ne_lat
-        bounds = params.get("bounds")
+        bounds = geo.parse_bounds(params.get("bounds"))
         if bounds:
-            try:
-                parts = [float(p) for p in bounds.split(",")]
-                if len(parts) == 4:
-                    sw_lng, sw_lat, ne_lng, ne_lat = parts
-                    # Polygon expects coordinates in (lng, lat) tuples in order
-                    poly = Polygon(
-                        (
-                            (sw_lng, sw_lat),
-                            (sw_lng, ne_lat),
-                            (ne_lng, ne_lat),
-                            (ne_lng, sw_lat),
-                            (sw_lng, sw_lat),
-                        ),
-                        srid=4326,
-                    )
-                    qs = qs.filter(location__within=poly)
-            except Exception:
-                pass
+            qs = geo.filter_bounds(qs, bounds)
 
-        # Center + radius search: lat, lng, radius(km)
-        lat = params.get("lat")
-        lng = params.get("lng")
-        radius = params.get("radius")
-        if lat and lng:
+        # Center + radius search: lat, lng, radius(km). ST_DWithin uses the GiST
+        # index; distance is annotated for ordering only.
+        pt = geo.parse_point(params.get("lat"), params.get("lng"))
+        if pt is not None:
+            radius = params.get("radius")
             try:
-                pt = Point(float(lng), float(lat), srid=4326)
-                if radius:
-                    # Distance expects meters when geography=True; convert km -> meters
-                    meters = float(radius) * 1000.0
-                    qs = qs.annotate(distance=Distance("location", pt)).filter(distance__lte=meters)
-                else:
-                    qs = qs.annotate(distance=Distance("location", pt))
-            except Exception:
-                pass
+                qs = geo.filter_radius(qs, pt, float(radius) if radius else None)
+            except ValueError:
+                qs = geo.filter_radius(qs, pt)
 
         return qs
 
@@ -124,8 +99,14 @@ class PropertyListingViewSet(viewsets.ModelViewSet):
         qs = super().get_queryset().filter(is_published=True)
         qs = self._apply_filters(qs)
 
-        # Ranking: prioritise boost_score, then ranking_score (precomputed), then recency
-        qs = qs.order_by("-optimization__boost_score", "-ranking_score", "-created_at")
+        # Ranking: prioritise boost_score, then ranking_score (precomputed, blended with
+        # text relevance when searching), then recency
+        score = "-search_score" if (self.request.query_params.get("query") or "").strip() else "-ranking_score"
+        ordering = ["-optimization__boost_score", score, "-created_at"]
+        # Centre point given: nearest first
+        if geo.parse_point(self.request.query_params.get("lat"), self.request.query_params.get("lng")):
+            ordering.insert(0, "distance")
+        qs = qs.order_by(*ordering)
         return qs
 
     def list(self, request, *args, **kwargs):
@@ -1,4 +1,3 @@
-import requests
 import uuid
 from decimal import Decimal
 
@@ -8,6 +7,7 @@ from rest_framework import status, permissions
 from rest_framework.views import APIView
 from rest_framework.response import Response
 
+from wallet.services import paystack
 from .models import Property, BoostPaymentLog
 
 
@@ -64,43 +64,25 @@ class InitiateBoostPaymentView(APIView):
         )
 
         # Call Paystack initialize transaction
-        headers = {
-            "Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}",
-            "Content-Type": "application/json",
-        }
-        payload = {
-            "email": user.email,
-            "amount": amount_kobo,
-            "reference": internal_ref,
-            "callback_url": settings.PAYSTACK_CALLBACK_URL,  # e.g., frontend URL or backend callback
-            "metadata": metadata,
-        }
-
         try:
-            resp = requests.post(
-                "https://api.paystack.co/transaction/initialize",
-                json=payload,
-                headers=headers,
-                timeout=30,
+            ps_data = paystack.initialize_transaction(
+                email=user.email,
+                amount_kobo=amount_kobo,
+                reference=internal_ref,
+                callback_url=settings.PAYSTACK_CALLBACK_URL,  # e.g., frontend URL or backend callback
+                metadata=metadata,
             )
-            ps_data = resp.json()
-        except Exception as exc:
+        except paystack.PaystackError as exc:
             return Response(
                 {"detail": f"Paystack init failed: {str(exc)}"},
                 status=status.HTTP_502_BAD_GATEWAY,
             )
 
-        if not ps_data.get("status"):
-            return Response(
-                {"detail": ps_data.get("message", "Failed to init Paystack")},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
         return Response(
             {
-                "authorization_url": ps_data["data"]["authorization_url"],
-                "access_code": ps_data["data"]["access_code"],
-                "reference": ps_data["data"]["reference"],
+                "authorization_url": ps_data["authorization_url"],
+                "access_code": ps_data["access_code"],
+                "reference": ps_data["reference"],
             },
             status=status.HTTP_200_OK,
         )
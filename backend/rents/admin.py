@@ -1,10 +1,10 @@
 # backend/rents/admin.py
 from django.contrib import admin
-from .models import Tenancy, LateFeeRule, RentInvoice, RentPayment, Receipt
+from .models import Tenancy, LateFeeRule, RentInvoice, RentPayment, Receipt, BillingRun, BillingShard
 
 @admin.register(Tenancy)
 class TenancyAdmin(admin.ModelAdmin):
-    list_display = ("uid", "tenant", "apartment", "monthly_rent", "is_active", "created_at")
+    list_display = ("uid", "tenant", "apartment", "monthly_rent", "billing_cycle", "billed_through", "is_active", "created_at")
     search_fields = ("uid", "tenant__email", "apartment__name")
 
 @admin.register(LateFeeRule)
@@ -13,7 +13,7 @@ class LateFeeRuleAdmin(admin.ModelAdmin):
 
 @admin.register(RentInvoice)
 class RentInvoiceAdmin(admin.ModelAdmin):
-    list_display = ("uid", "tenancy", "amount", "outstanding", "due_date", "status")
+    list_display = ("uid", "tenancy", "amount", "outstanding", "due_date", "period_start", "status")
     list_filter = ("status", )
 
 @admin.register(RentPayment)
@@ -24,3 +24,13 @@ class RentPaymentAdmin(admin.ModelAdmin):
 @admin.register(Receipt)
 class ReceiptAdmin(admin.ModelAdmin):
     list_display = ("uid", "payment", "issued_at")
+
+class BillingShardInline(admin.TabularInline):
+    model = BillingShard
+    extra = 0
+    readonly_fields = ("shard", "status", "last_tenancy_id", "tenancies_processed", "invoices_created", "amount_invoiced", "errors", "updated_at")
+
+@admin.register(BillingRun)
+class BillingRunAdmin(admin.ModelAdmin):
+    list_display = ("uid", "run_date", "status", "shard_count", "tenancies_due", "started_at", "finished_at")
+    inlines = [BillingShardInline]
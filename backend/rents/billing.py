@@ -0,0 +1,349 @@
+# backend/rents/billing.py
+"""
+Billing-cycle invoice generation.
+
+Periods are anchored on Tenancy.start_date (a tenancy starting on the 31st is
+billed 31 Jan, 28 Feb, 31 Mar, ...) and invoiced in advance: a period is due
+once its start is within LEAD_DAYS[cycle] of the run date, and its invoice is
+due on the period start. Tenancy.billed_through is the last day already
+invoiced; a tenancy that has never been billed starts at the period containing
+the later of its start date and the run date (history is not back-billed).
+A period cut short by Tenancy.end_date is prorated by days.
+
+A run (one per day) is split into N shards by tenancy id % N; each shard is a
+Celery task that walks its tenancies in id order in chunks. Per chunk, in one
+transaction: bulk_create the invoices (ignore_conflicts on the unique
+(tenancy, period_start) key, so overlapping or repeated runs never bill a
+period twice), advance billed_through, bump the collection rollups and move
+the shard checkpoint. BillingRun/BillingShard rows are the progress report.
+"""
+import calendar
+import logging
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Max, Q
+from django.db.models.functions import Mod
+from django.utils import timezone
+
+from .models import BillingRun, BillingShard, RentInvoice, Tenancy
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SHARDS = 8
+CHUNK_SIZE = 500
+CENTS = Decimal("0.01")
+
+CYCLES = ("monthly", "weekly", "daily")
+LEAD_DAYS = {"monthly": 7, "weekly": 2, "daily": 0}
+# full-period amount as a fraction of monthly_rent
+PERIOD_FACTOR = {"monthly": Decimal(1), "weekly": Decimal(12) / Decimal(52), "daily": Decimal(12) / Decimal(365)}
+MAX_PERIODS_PER_RUN = 31  # catch-up cap per tenancy (a month of daily periods)
+
+
+def add_months(day, months):
+    month = day.month - 1 + months
+    year = day.year + month // 12
+    month = month % 12 + 1
+    return date(year, month, min(day.day, calendar.monthrange(year, month)[1]))
+
+
+def period_containing(cycle, anchor, day):
+    """(start, end) of the `cycle` period anchored on `anchor` that contains `day` (day >= anchor)."""
+    if cycle == "daily":
+        return day, day
+    if cycle == "weekly":
+        start = anchor + timedelta(days=(day - anchor).days // 7 * 7)
+        return start, start + timedelta(days=6)
+    k = (day.year - anchor.year) * 12 + day.month - anchor.month
+    if add_months(anchor, k) > day:
+        k -= 1
+    return add_months(anchor, k), add_months(anchor, k + 1) - timedelta(days=1)
+
+
+def period_amount(cycle, monthly_rent, start, end, end_date=None):
+    """(end, amount) for the period [start, end]: cut at end_date and prorated by days if the tenancy ends inside it."""
+    full = monthly_rent * PERIOD_FACTOR[cycle]
+    if end_date is not None and end_date < end:
+        full = full * Decimal((end_date - start).days + 1) / Decimal((end - start).days + 1)
+        end = end_date
+    return end, full.quantize(CENTS)
+
+
+class BillingCycleEngine:
+    def __init__(self, today=None, chunk_size=CHUNK_SIZE):
+        self.today = today or timezone.now().date()
+        self.chunk_size = chunk_size
+        self.horizon = self.today + timedelta(days=max(LEAD_DAYS.values()))
+
+    def due_queryset(self):
+        """Active tenancies that may have a period to bill (periods_for() has the exact rule)."""
+        return Tenancy.objects.filter(
+            is_active=True,
+            billing_cycle__in=CYCLES,
+            start_date__lte=self.horizon,
+        ).filter(
+            Q(billed_through__isnull=True) | Q(billed_through__lt=self.horizon)
+        ).filter(
+            Q(end_date__isnull=True) | Q(billed_through__isnull=True) | Q(end_date__gt=F("billed_through"))
+        ).exclude(
+            # ended before ever being billed: nothing to bill (history is not back-billed)
+            billed_through__isnull=True, end_date__lt=self.today
+        )
+
+    def periods_for(self, row):
+        """Unbilled periods due for one tenancy row: [(start, end, amount)]."""
+        cycle = row["billing_cycle"]
+        anchor, end_date = row["start_date"], row["end_date"]
+        horizon = self.today + timedelta(days=LEAD_DAYS[cycle])
+        if row["billed_through"]:
+            if end_date is not None and row["billed_through"] >= end_date:
+                return []
+            start, end = period_containing(cycle, anchor, row["billed_through"] + timedelta(days=1))
+        else:
+            start, end = period_containing(cycle, anchor, max(anchor, self.today))
+
+        periods = []
+        while start <= horizon and (end_date is None or start <= end_date) and len(periods) < MAX_PERIODS_PER_RUN:
+            end, amount = period_amount(cycle, row["monthly_rent"], start, end, end_date)
+            periods.append((start, end, amount))
+            if end == end_date:
+                break  # cut short by end_date: the period after it would contain end_date again
+            start, end = period_containing(cycle, anchor, end + timedelta(days=1))
+        return periods
+
+    def _rows(self, qs):
+        return qs.values(
+            "id", "start_date", "end_date", "monthly_rent", "billing_cycle", "billed_through",
+            apartment_name=F("apartment__name"),
+            property_id=F("apartment__property_id"),
+            manager_id=F("apartment__property__manager_id"),
+        ).order_by("id")
+
+    def bill_chunk(self, rows, shard=None):
+        """
+        Invoice every due period for `rows` in one transaction. Returns (invoices created, amount).
+        Periods that already have an invoice are skipped by the unique key.
+        """
+        from payments import rollups
+
+        objs, billed_through = [], {}
+        scope = {}
+        for row in rows:
+            periods = self.periods_for(row)
+            if not periods:
+                continue
+            billed_through[row["id"]] = periods[-1][1]
+            scope[row["id"]] = (row["property_id"], row["manager_id"])
+            for start, end, amount in periods:
+                objs.append(RentInvoice(
+                    tenancy_id=row["id"],
+                    due_date=start,
+                    period_start=start,
+                    period_end=end,
+                    amount=amount,
+                    outstanding=amount,  # bulk_create skips RentInvoice.save()
+                    description=f"Rent for {row['apartment_name']} ({start.isoformat()} to {end.isoformat()})",
+                ))
+
+        with transaction.atomic():
+            created, total = 0, Decimal("0.00")
+            if objs:
+                RentInvoice.objects.bulk_create(objs, ignore_conflicts=True)
+                inserted = set(RentInvoice.objects.filter(uid__in=[obj.uid for obj in objs]).values_list("uid", flat=True))
+
+                # bulk_create sends no post_save, so feed the collection rollup per property here
+                per_property = {}
+                for obj in objs:
+                    if obj.uid in inserted:
+                        created += 1
+                        total += obj.amount
+                        key = scope[obj.tenancy_id]
+                        amount, count = per_property.get(key, (Decimal("0.00"), 0))
+                        per_property[key] = (amount + obj.amount, count + 1)
+                for (property_id, manager_id), (amount, count) in per_property.items():
+                    rollups.bump(self.today, "rent", property_id, manager_id, invoiced=amount, invoices_count=count)
+
+                # One UPDATE per distinct billed_through date, not per tenancy
+                by_date = {}
+                for tenancy_id, through in billed_through.items():
+                    by_date.setdefault(through, []).append(tenancy_id)
+                for through, ids in by_date.items():
+                    Tenancy.objects.filter(pk__in=ids).update(billed_through=through)
+
+            if shard is not None:
+                BillingShard.objects.filter(pk=shard.pk).update(
+                    last_tenancy_id=rows[-1]["id"],
+                    tenancies_processed=F("tenancies_processed") + len(rows),
+                    invoices_created=F("invoices_created") + created,
+                    amount_invoiced=F("amount_invoiced") + total,
+                )
+        return created, total
+
+    def iter_chunks(self, qs, after_id=0):
+        """Yield chunks of tenancy rows, keyset-paginated on id."""
+        rows_qs = self._rows(qs)
+        while True:
+            rows = list(rows_qs.filter(id__gt=after_id)[:self.chunk_size])
+            if not rows:
+                return
+            after_id = rows[-1]["id"]
+            yield rows
+
+
+def start_run(run_date=None, shard_count=DEFAULT_SHARDS):
+    """Get or create the run for `run_date` with its shard checkpoints."""
+    run_date = run_date or timezone.now().date()
+    run, created = BillingRun.objects.get_or_create(run_date=run_date, defaults={"shard_count": shard_count})
+    if created:
+        due = BillingCycleEngine(run_date).due_queryset().count()
+        BillingRun.objects.filter(pk=run.pk).update(tenancies_due=due)
+        run.tenancies_due = due
+    existing = set(run.shards.values_list("shard", flat=True))
+    BillingShard.objects.bulk_create(
+        [BillingShard(run=run, shard=i) for i in range(run.shard_count) if i not in existing],
+        ignore_conflicts=True,
+    )
+    return run
+
+
+def process_shard(run_id, shard_no):
+    """Bill (or resume) one shard of a run. Returns the shard's totals."""
+    run = BillingRun.objects.get(pk=run_id)
+    shard = BillingShard.objects.get(run=run, shard=shard_no)
+    if shard.status == "completed":
+        return {"shard": shard_no, "status": "completed"}
+    BillingShard.objects.filter(pk=shard.pk).update(status="running")
+
+    engine = BillingCycleEngine(run.run_date)
+    qs = engine.due_queryset().annotate(bucket=Mod("id", run.shard_count)).filter(bucket=shard_no)
+    for rows in engine.iter_chunks(qs, after_id=shard.last_tenancy_id):
+        try:
+            engine.bill_chunk(rows, shard)
+        except Exception as e:
+            logger.error(
+                f"Billing failed for tenancies {rows[0]['id']}-{rows[-1]['id']} "
+                f"(run {run.run_date}, shard {shard_no}): {e}"
+            )
+            BillingShard.objects.filter(pk=shard.pk).update(last_tenancy_id=rows[-1]["id"], errors=F("errors") + 1)
+
+    BillingShard.objects.filter(pk=shard.pk).update(status="completed")
+    if not run.shards.exclude(status="completed").exists():
+        BillingRun.objects.filter(pk=run.pk, status="running").update(status="completed", finished_at=timezone.now())
+
+    shard.refresh_from_db()
+    logger.info(
+        f"Billing run {run.run_date} shard {shard_no}: {shard.tenancies_processed} tenancies, "
+        f"{shard.invoices_created} invoices, {shard.amount_invoiced} invoiced, {shard.errors} errors"
+    )
+    return {
+        "shard": shard_no,
+        "tenancies": shard.tenancies_processed,
+        "invoices": shard.invoices_created,
+        "invoiced": str(shard.amount_invoiced),
+        "errors": shard.errors,
+    }
+
+
+def progress(run):
+    """Shard checkpoints rolled up into one progress report."""
+    shards = list(run.shards.order_by("shard"))
+    processed = sum(s.tenancies_processed for s in shards)
+    return {
+        "run": run.uid,
+        "run_date": run.run_date,
+        "status": run.status,
+        "shards_total": len(shards),
+        "shards_completed": sum(1 for s in shards if s.status == "completed"),
+        "tenancies_due": run.tenancies_due,
+        "tenancies_processed": processed,
+        "percent": round(min(100.0, processed * 100 / run.tenancies_due), 1) if run.tenancies_due else 100.0,
+        "invoices_created": sum(s.invoices_created for s in shards),
+        "amount_invoiced": str(sum((s.amount_invoiced for s in shards), Decimal("0.00"))),
+        "errors": sum(s.errors for s in shards),
+        "started_at": run.started_at,
+        "finished_at": run.finished_at,
+        "shards": [
+            {
+                "shard": s.shard,
+                "status": s.status,
+                "tenancies": s.tenancies_processed,
+                "invoices": s.invoices_created,
+                "errors": s.errors,
+            }
+            for s in shards
+        ],
+    }
+
+
+def backfill_periods(chunk_size=CHUNK_SIZE):
+    """
+    One-off for rent invoices created before RentInvoice.period_* and
+    Tenancy.billed_through existed (`manage.py backfill_billing_periods`).
+
+    Each period-less rent invoice (late fees excluded) gets the period of its
+    tenancy's cycle that contains its due date; when two invoices fall in the
+    same period only the earliest is given it. billed_through is then moved up
+    to the last period_end on file, so the engine carries on after what was
+    already invoiced instead of billing it again. Safe to re-run.
+    """
+    from .services import LEGACY_FEE_PREFIX
+
+    stats = {"tenancies": 0, "invoices": 0, "conflicts": 0, "skipped": 0}
+    after_id = 0
+    while True:
+        tenancies = list(
+            Tenancy.objects.filter(id__gt=after_id)
+            .only("id", "start_date", "end_date", "billing_cycle", "billed_through")
+            .order_by("id")[:chunk_size]
+        )
+        if not tenancies:
+            break
+        after_id = tenancies[-1].id
+        by_id = {t.id: t for t in tenancies}
+
+        with transaction.atomic():
+            taken = set(
+                RentInvoice.objects.filter(tenancy_id__in=by_id, period_start__isnull=False)
+                .values_list("tenancy_id", "period_start")
+            )
+            legacy = (
+                RentInvoice.objects.filter(tenancy_id__in=by_id, period_start__isnull=True, source_invoice__isnull=True)
+                .exclude(description__startswith=LEGACY_FEE_PREFIX)
+                .only("id", "tenancy_id", "due_date")
+                .order_by("tenancy_id", "due_date", "id")
+            )
+            updated = []
+            for inv in legacy:
+                tenancy = by_id[inv.tenancy_id]
+                cycle = tenancy.billing_cycle if tenancy.billing_cycle in CYCLES else "monthly"
+                if inv.due_date < tenancy.start_date:
+                    stats["skipped"] += 1
+                    continue
+                start, end = period_containing(cycle, tenancy.start_date, inv.due_date)
+                if (inv.tenancy_id, start) in taken:
+                    stats["conflicts"] += 1
+                    continue
+                taken.add((inv.tenancy_id, start))
+                inv.period_start = start
+                inv.period_end = min(end, tenancy.end_date) if tenancy.end_date else end
+                updated.append(inv)
+            RentInvoice.objects.bulk_update(updated, ["period_start", "period_end"], batch_size=CHUNK_SIZE)
+            stats["invoices"] += len(updated)
+
+            last_billed = dict(
+                RentInvoice.objects.filter(tenancy_id__in=by_id, period_end__isnull=False)
+                .values("tenancy_id").annotate(through=Max("period_end")).values_list("tenancy_id", "through")
+            )
+            # One UPDATE per distinct billed_through date, not per tenancy
+            by_date = {}
+            for tenancy_id, through in last_billed.items():
+                current = by_id[tenancy_id].billed_through
+                if current is None or current < through:
+                    by_date.setdefault(through, []).append(tenancy_id)
+            for through, ids in by_date.items():
+                stats["tenancies"] += Tenancy.objects.filter(pk__in=ids).update(billed_through=through)
+
+    logger.info(f"Billing period backfill: {stats}")
+    return stats
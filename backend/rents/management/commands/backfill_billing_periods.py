@@ -0,0 +1,19 @@
+# backend/rents/management/commands/backfill_billing_periods.py
+from django.core.management.base import BaseCommand
+
+from rents.billing import backfill_periods
+
+
+class Command(BaseCommand):
+    help = "Give rent invoices created before billing cycles existed their period, and set Tenancy.billed_through from them."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        stats = backfill_periods(chunk_size=options["chunk_size"])
+        self.stdout.write(
+            f"Set the period on {stats['invoices']} invoices and billed_through on {stats['tenancies']} tenancies; "
+            f"{stats['conflicts']} invoices share a period with an earlier one and "
+            f"{stats['skipped']} are due before their tenancy starts (left without a period)"
+        )
@@ -0,0 +1,20 @@
+# backend/rents/management/commands/backfill_late_fee_sources.py
+from django.core.management.base import BaseCommand
+
+from rents.services import backfill_legacy_fee_sources
+
+
+class Command(BaseCommand):
+    help = "Link late-fee invoices created before RentInvoice.source_invoice existed to the invoice they charge."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        stats = backfill_legacy_fee_sources(chunk_size=options["chunk_size"])
+        self.stdout.write(
+            f"Linked {stats['linked']} fee invoices; {stats['duplicates']} duplicate and "
+            f"{stats['unmatched']} unmatched legacy fees left unlinked"
+        )
+        if not stats["unmatched"]:
+            self.stdout.write(self.style.SUCCESS("Every legacy fee names a linked source; LATE_FEE_LEGACY_GUARD can be turned off."))
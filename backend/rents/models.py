@@ -5,6 +5,7 @@ from django.db import models, transaction
 from django.conf import settings
 from django.utils import timezone
 from django.core.validators import MinValueValidator
+from payments.rollups import RollupStatusMixin
 
 def generate_uid(prefix: str) -> str:
     return f"{prefix}-{uuid.uuid4().hex[:10].upper()}"
@@ -22,6 +23,8 @@ class Tenancy(models.Model):
     end_date = models.DateField(null=True, blank=True)
     monthly_rent = models.DecimalField(max_digits=12, decimal_places=2)
     billing_cycle = models.CharField(max_length=20, default="monthly")  # monthly/weekly/daily
+    # last day covered by a billing-cycle invoice (rents.billing); null until first billed
+    billed_through = models.DateField(null=True, blank=True)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -30,6 +33,7 @@ class Tenancy(models.Model):
             models.Index(fields=["uid"]),
             models.Index(fields=["tenant"]),
             models.Index(fields=["apartment"]),
+            models.Index(fields=["is_active", "billed_through"]),  # billing-cycle scan
         ]
         ordering = ["-created_at"]
 
@@ -59,6 +63,9 @@ class RentInvoice(models.Model):
     tenancy = models.ForeignKey(Tenancy, on_delete=models.CASCADE, related_name="invoices")
     issue_date = models.DateField(auto_now_add=True)
     due_date = models.DateField()
+    # billing period covered (set by rents.billing; null for ad-hoc and late-fee invoices)
+    period_start = models.DateField(null=True, blank=True)
+    period_end = models.DateField(null=True, blank=True)
     amount = models.DecimalField(max_digits=14, decimal_places=2)
     outstanding = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
@@ -67,6 +74,8 @@ class RentInvoice(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     # optional reference to bills.Invoice if you want to link
     bills_invoice = models.ForeignKey("bills.Invoice", null=True, blank=True, on_delete=models.SET_NULL, related_name="rent_invoices")
+    # set on late-fee invoices: the overdue invoice the fee was charged for (one fee per source)
+    source_invoice = models.ForeignKey("self", null=True, blank=True, on_delete=models.CASCADE, related_name="late_fees")
 
     class Meta:
         ordering = ["-due_date"]
@@ -74,6 +83,19 @@ class RentInvoice(models.Model):
             models.Index(fields=["uid"]),
             models.Index(fields=["tenancy"]),
             models.Index(fields=["status"]),
+            models.Index(fields=["tenancy", "-created_at", "-id"]),  # cursor-paged list
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["source_invoice"],
+                condition=models.Q(source_invoice__isnull=False),
+                name="uniq_rentinvoice_late_fee_per_source",
+            ),
+            models.UniqueConstraint(
+                fields=["tenancy", "period_start"],
+                condition=models.Q(period_start__isnull=False),
+                name="uniq_rentinvoice_tenancy_period",
+            ),
         ]
 
     def __str__(self):
@@ -107,7 +129,7 @@ class RentInvoice(models.Model):
             self.status = "overdue"
             self.save(update_fields=["status", "updated_at"])
 
-class RentPayment(models.Model):
+class RentPayment(RollupStatusMixin, models.Model):
     """
     Payment against a rent invoice. Canonical record. Payment may be from wallet or external.
     """
@@ -165,3 +187,53 @@ class Receipt(models.Model):
 
     def __str__(self):
         return f"Receipt {self.uid} - {self.payment.uid}"
+
+
+class BillingRun(models.Model):
+    """One daily billing-cycle run, split into shards (see BillingShard)."""
+    STATUS_CHOICES = [
+        ("running", "Running"),
+        ("completed", "Completed"),
+    ]
+
+    uid = models.CharField(max_length=32, unique=True, default=lambda: generate_uid("BRUN"))
+    run_date = models.DateField(unique=True)
+    shard_count = models.PositiveIntegerField()
+    tenancies_due = models.PositiveIntegerField(default=0)  # at start, for progress
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="running")
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-run_date"]
+
+    def __str__(self):
+        return f"BillingRun {self.run_date} ({self.status})"
+
+
+class BillingShard(models.Model):
+    """
+    Checkpoint for one shard of a billing run (tenancies with id % shard_count == shard).
+    last_tenancy_id advances in the same transaction as each chunk's invoices.
+    """
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("running", "Running"),
+        ("completed", "Completed"),
+    ]
+
+    run = models.ForeignKey(BillingRun, on_delete=models.CASCADE, related_name="shards")
+    shard = models.PositiveIntegerField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
+    last_tenancy_id = models.BigIntegerField(default=0)
+    tenancies_processed = models.PositiveIntegerField(default=0)
+    invoices_created = models.PositiveIntegerField(default=0)
+    amount_invoiced = models.DecimalField(max_digits=18, decimal_places=2, default=Decimal("0.00"))
+    errors = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = [("run", "shard")]
+
+    def __str__(self):
+        return f"{self.run.run_date} shard {self.shard} ({self.status})"
@@ -0,0 +1,120 @@
+# backend/rents/reports.py
+"""
+Collection report queries. Collected amounts and invoice counts come from the
+daily CollectionRollup (payments.rollups), which reads raw tables only for the
+partial current day. Outstanding balances and paid/overdue counts are current
+invoice state, so they are aggregated from RentInvoice in the database. The
+per-property breakdown is a single annotated queryset, paged and streamed by
+the database rather than built in Python.
+"""
+from decimal import Decimal
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.db.models import Count, DecimalField, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from payments import rollups
+from .models import RentInvoice
+
+ZERO = Decimal("0.00")
+
+PROPERTY_CSV_FIELDS = ["property_uid", "property_name", "manager_id", "collected", "outstanding", "invoices"]
+
+
+class CollectionReport:
+    """
+    Scoped collection figures for a property manager (their properties) or staff (all).
+    Filters: property_id, from_date, to_date (ISO dates, applied to created_at).
+    """
+
+    def __init__(self, user, property_id=None, from_date=None, to_date=None):
+        self.user = user
+        self.property_id = property_id
+        self.from_date = from_date
+        self.to_date = to_date
+
+    @property
+    def scoped_to_manager(self):
+        return getattr(self.user, "role", None) == "property_manager" and not self.user.is_staff
+
+    def invoices(self):
+        qs = RentInvoice.objects.all()
+        if self.scoped_to_manager:
+            qs = qs.filter(tenancy__apartment__property__manager=self.user)
+        if self.property_id:
+            qs = qs.filter(tenancy__apartment__property__id=self.property_id)
+        if self.from_date:
+            qs = qs.filter(created_at__date__gte=self.from_date)
+        if self.to_date:
+            qs = qs.filter(created_at__date__lte=self.to_date)
+        return qs
+
+    @property
+    def scope(self):
+        scope = {}
+        if self.scoped_to_manager:
+            scope["manager_id"] = self.user.pk
+        if self.property_id:
+            scope["property_id"] = self.property_id
+        return scope
+
+    def totals(self):
+        inv = self.invoices().aggregate(
+            outstanding=Sum("outstanding"),
+            invoices_count=Count("id"),
+            paid_count=Count("id", filter=Q(status="paid")),
+            overdue_count=Count("id", filter=Q(status="overdue")),
+        )
+        collected = rollups.aggregate("rent", start=self.from_date, end=self.to_date, **self.scope)[0]["collected"]
+        return {
+            "collected": collected or ZERO,
+            "outstanding": inv["outstanding"] or ZERO,
+            "invoices_count": inv["invoices_count"],
+            "paid_count": inv["paid_count"],
+            "overdue_count": inv["overdue_count"],
+        }
+
+    def per_property(self):
+        """
+        One row per property with activity in range, as an ordered values() queryset
+        (property_uid, property_name, manager_id, collected, outstanding, invoices):
+        everything is computed in SQL, so pagination is LIMIT/OFFSET and the CSV
+        export can stream it with .iterator().
+        """
+        Property = apps.get_model("properties", "Property")
+        measures = rollups.property_measures(
+            "rent", start=self.from_date, end=self.to_date, manager_id=self.scope.get("manager_id")
+        )
+        outstanding = (
+            self.invoices()
+            .filter(tenancy__apartment__property_id=OuterRef("pk"))
+            .order_by()
+            .values("tenancy__apartment__property_id")
+            .annotate(total=Sum("outstanding"))
+            .values("total")[:1]
+        )
+        qs = Property.objects.all()
+        if self.scoped_to_manager:
+            qs = qs.filter(manager=self.user)
+        if self.property_id:
+            qs = qs.filter(id=self.property_id)
+        return (
+            qs.annotate(collected=measures["collected"], invoices=measures["invoices_count"])
+            .filter(Q(collected__gt=0) | Q(invoices__gt=0))
+            .annotate(outstanding=Coalesce(Subquery(outstanding), Value(ZERO), output_field=DecimalField()))
+            .order_by("id")
+            .values("collected", "outstanding", "invoices", "manager_id", property_uid=F("uid"), property_name=F("name"))
+        )
+
+    def per_manager(self):
+        """Collected per property manager, largest first."""
+        rows = [
+            r for r in rollups.aggregate("rent", dims=("manager",), start=self.from_date, end=self.to_date, **self.scope)
+            if r["manager"] is not None and r["collected"]
+        ]
+        emails = dict(get_user_model().objects.filter(pk__in=[r["manager"] for r in rows]).values_list("pk", "email"))
+        return [
+            {"manager_id": r["manager"], "manager_email": emails.get(r["manager"]), "collected": r["collected"]}
+            for r in sorted(rows, key=lambda r: r["collected"], reverse=True)
+        ]
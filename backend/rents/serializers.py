@@ -1,6 +1,7 @@
 # backend/rents/serializers.py
 from rest_framework import serializers
-from .models import Tenancy, LateFeeRule, RentInvoice, RentPayment, Receipt
+from config.serializers import SparseFieldsetMixin
+from .models import Tenancy, LateFeeRule, RentInvoice, RentPayment, Receipt, BillingRun
 from django.utils import timezone
 from decimal import Decimal
 
@@ -11,7 +12,7 @@ class TenancySerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Tenancy
-        read_only_fields = ("id", "uid", "created_at")
+        read_only_fields = ("id", "uid", "billed_through", "created_at")
         fields = [
             "id",
             "uid",
@@ -23,22 +24,30 @@ class TenancySerializer(serializers.ModelSerializer):
             "end_date",
             "monthly_rent",
             "billing_cycle",
+            "billed_through",
             "is_active",
             "created_at",
         ]
 
+    def validate_billing_cycle(self, value):
+        from .billing import CYCLES
+
+        if value not in CYCLES:
+            raise serializers.ValidationError(f"Must be one of: {', '.join(CYCLES)}.")
+        return value
+
 class LateFeeRuleSerializer(serializers.ModelSerializer):  # Keep from Code 1
     class Meta:
         model = LateFeeRule
         fields = ["id", "property", "enabled", "percentage", "fixed_amount", "grace_days"]
 
-class RentInvoiceSerializer(serializers.ModelSerializer):
+class RentInvoiceSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     tenancy_uid = serializers.CharField(source="tenancy.uid", read_only=True)
     tenant = serializers.CharField(source="tenancy.tenant.uid", read_only=True)
 
     class Meta:
         model = RentInvoice
-        read_only_fields = ("id", "uid", "issue_date", "outstanding", "status")
+        read_only_fields = ("id", "uid", "issue_date", "period_start", "period_end", "outstanding", "status")
         fields = [
             "id",
             "uid",
@@ -47,6 +56,8 @@ class RentInvoiceSerializer(serializers.ModelSerializer):
             "tenant",
             "issue_date",
             "due_date",
+            "period_start",
+            "period_end",
             "amount",
             "outstanding",
             "status",
@@ -104,3 +115,17 @@ class ReceiptSerializer(serializers.ModelSerializer):  # Keep from Code 1
 class WalletPaymentCreateSerializer(serializers.Serializer):
     invoice = serializers.UUIDField()
     amount = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+
+class BillingRunSerializer(serializers.ModelSerializer):
+    progress = serializers.SerializerMethodField()
+
+    class Meta:
+        model = BillingRun
+        fields = ["id", "uid", "run_date", "shard_count", "tenancies_due", "status", "started_at", "finished_at", "progress"]
+        read_only_fields = fields
+
+    def get_progress(self, obj):
+        from .billing import progress
+
+        return progress(obj)
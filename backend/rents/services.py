@@ -0,0 +1,241 @@
+# backend/rents/services.py
+import logging
+import re
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, TextField, Value
+from django.db.models.functions import Concat
+from django.utils import timezone
+
+from .models import RentInvoice
+
+logger = logging.getLogger(__name__)
+
+OPEN_STATUSES = ["pending", "partially_paid", "overdue"]
+CENTS = Decimal("0.01")
+# Fee invoices written before source_invoice existed carry only this description
+LEGACY_FEE_PREFIX = "Late fee for invoice "
+LEGACY_FEE_RE = re.compile(rf"^{LEGACY_FEE_PREFIX}(\S+)")
+
+
+class LateFeeEngine:
+    """
+    Set-based late fees for overdue rent invoices.
+
+    Candidates are read in keyset-paginated chunks as plain rows, with the
+    property's LateFeeRule joined in the same query. Invoices that already have a
+    fee (RentInvoice.source_invoice, unique) are excluded in SQL, fee invoices are
+    never charged a fee themselves, and each chunk of fees is written with one
+    bulk_create. preview() and apply() share the same candidate pass.
+
+    Fee invoices written before source_invoice existed are recognised by their
+    description. Until backfill_legacy_fee_sources() has linked them,
+    LATE_FEE_LEGACY_GUARD also excludes the invoices they were charged for.
+    """
+
+    PROPERTY = "tenancy__apartment__property"
+    RULE = "tenancy__apartment__property__late_fee_rule"
+
+    def __init__(self, today=None, chunk_size=1000, tenancy_id=None, property_id=None, manager=None):
+        self.today = today or timezone.now().date()
+        self.chunk_size = chunk_size
+        self.tenancy_id = tenancy_id
+        self.property_id = property_id
+        self.manager = manager
+
+    def get_queryset(self):
+        qs = RentInvoice.objects.filter(
+            status__in=OPEN_STATUSES,
+            due_date__lt=self.today,
+            source_invoice__isnull=True,
+            **{f"{self.RULE}__enabled": True},
+        ).exclude(Exists(RentInvoice.objects.filter(source_invoice=OuterRef("pk"))))
+        # Fee invoices written before source_invoice existed are never candidates either
+        qs = qs.exclude(description__startswith=LEGACY_FEE_PREFIX)
+        if getattr(settings, "LATE_FEE_LEGACY_GUARD", True):
+            qs = qs.exclude(Exists(
+                RentInvoice.objects.filter(
+                    tenancy_id=OuterRef("tenancy_id"),
+                    source_invoice__isnull=True,
+                    description__startswith=Concat(Value(LEGACY_FEE_PREFIX), OuterRef("uid"), output_field=TextField()),
+                )
+            ))
+        if self.tenancy_id:
+            qs = qs.filter(tenancy_id=self.tenancy_id)
+        elif self.property_id:
+            qs = qs.filter(**{f"{self.PROPERTY}_id": self.property_id})
+        if self.manager is not None:
+            qs = qs.filter(**{f"{self.PROPERTY}__manager": self.manager})
+        return qs
+
+    def iter_chunks(self):
+        """Yield lists of candidate rows (dicts), keyset-paginated on id."""
+        qs = self.get_queryset().values(
+            "id", "uid", "amount", "due_date", "tenancy_id",
+            tenancy_uid=F("tenancy__uid"),
+            property_id=F(f"{self.PROPERTY}_id"),
+            property_uid=F(f"{self.PROPERTY}__uid"),
+            manager_id=F(f"{self.PROPERTY}__manager_id"),
+            percentage=F(f"{self.RULE}__percentage"),
+            fixed_amount=F(f"{self.RULE}__fixed_amount"),
+            grace_days=F(f"{self.RULE}__grace_days"),
+        ).order_by("id")
+        last_id = None
+        while True:
+            chunk_qs = qs if last_id is None else qs.filter(id__gt=last_id)
+            rows = list(chunk_qs[:self.chunk_size])
+            if not rows:
+                return
+            last_id = rows[-1]["id"]
+            yield rows
+
+    def fee_for(self, row):
+        """Fee for one candidate row, or None when not (yet) chargeable."""
+        days_past = (self.today - row["due_date"]).days
+        if days_past <= row["grace_days"]:
+            return None
+        percent_part = (row["amount"] * (row["percentage"] / Decimal("100.00"))) if row["percentage"] else Decimal("0.00")
+        fee = (percent_part + (row["fixed_amount"] or Decimal("0.00"))).quantize(CENTS)
+        if fee <= 0:
+            return None
+        return {
+            "invoice_id": row["id"],
+            "invoice_uid": row["uid"],
+            "tenancy_id": row["tenancy_id"],
+            "tenancy_uid": row["tenancy_uid"],
+            "property_id": row["property_id"],
+            "property_uid": row["property_uid"],
+            "manager_id": row["manager_id"],
+            "days_past": days_past,
+            "fee_amount": fee,
+            "description": f"Late fee for invoice {row['uid']}",
+        }
+
+    def _run(self, apply):
+        started = time.monotonic()
+        stats = {"scanned": 0, "eligible": 0, "created": 0, "total_fees": Decimal("0.00"), "chunks": 0}
+        results = []
+        for rows in self.iter_chunks():
+            stats["chunks"] += 1
+            stats["scanned"] += len(rows)
+            fees = [fee for fee in (self.fee_for(row) for row in rows) if fee]
+            stats["eligible"] += len(fees)
+            if apply and fees:
+                fees = self._write(fees)
+                stats["created"] += len(fees)
+            stats["total_fees"] += sum((fee["fee_amount"] for fee in fees), Decimal("0.00"))
+            results.extend(fees)
+
+        elapsed = time.monotonic() - started
+        stats["elapsed_seconds"] = round(elapsed, 3)
+        stats["rows_per_sec"] = round(stats["scanned"] / elapsed, 1) if elapsed > 0 else None
+        logger.info(f"Late fees {'applied' if apply else 'previewed'} for {self.today}: {stats}")
+        return results, stats
+
+    def _write(self, fees):
+        """
+        Create one fee invoice per candidate in a single bulk_create. A concurrent run
+        that got there first is absorbed by the unique source_invoice constraint;
+        only fees that were actually inserted are returned.
+        """
+        from payments import rollups
+
+        objs = [
+            RentInvoice(
+                tenancy_id=fee["tenancy_id"],
+                source_invoice_id=fee["invoice_id"],
+                due_date=self.today,
+                amount=fee["fee_amount"],
+                outstanding=fee["fee_amount"],  # bulk_create skips RentInvoice.save()
+                description=f"{fee['description']} (applied {self.today.isoformat()})",
+            )
+            for fee in fees
+        ]
+        with transaction.atomic():
+            RentInvoice.objects.bulk_create(objs, ignore_conflicts=True)
+            inserted = {
+                source_id: (pk, uid)
+                for source_id, pk, uid in RentInvoice.objects.filter(
+                    uid__in=[obj.uid for obj in objs]
+                ).values_list("source_invoice_id", "id", "uid")
+            }
+
+            # bulk_create sends no post_save, so feed the collection rollup per property here
+            per_property = {}
+            for fee in fees:
+                if fee["invoice_id"] in inserted:
+                    key = (fee["property_id"], fee["manager_id"])
+                    amount, count = per_property.get(key, (Decimal("0.00"), 0))
+                    per_property[key] = (amount + fee["fee_amount"], count + 1)
+            for (property_id, manager_id), (amount, count) in per_property.items():
+                rollups.bump(self.today, "rent", property_id, manager_id, invoiced=amount, invoices_count=count)
+
+        created = []
+        for fee in fees:
+            if fee["invoice_id"] in inserted:
+                pk, uid = inserted[fee["invoice_id"]]
+                created.append(dict(fee, created_invoice_id=pk, created_invoice_uid=uid))
+        return created
+
+    def preview(self):
+        """Dry run: the fee invoices apply() would create, plus metrics. Writes nothing."""
+        return self._run(apply=False)
+
+    def apply(self):
+        """Create the fee invoices; returns (created fees, metrics)."""
+        return self._run(apply=True)
+
+
+def backfill_legacy_fee_sources(chunk_size=1000):
+    """
+    Link late-fee invoices created before RentInvoice.source_invoice existed to
+    the invoice named in their description ("Late fee for invoice <uid> ...").
+    Only the earliest fee per source is linked (the constraint allows one);
+    later duplicates and unparseable descriptions are left alone and counted.
+    Safe to re-run. Returns {"linked", "duplicates", "unmatched"}.
+    """
+    stats = {"linked": 0, "duplicates": 0, "unmatched": 0}
+    qs = RentInvoice.objects.filter(
+        source_invoice__isnull=True, description__startswith=LEGACY_FEE_PREFIX
+    ).values("id", "tenancy_id", "description").order_by("id")
+    last_id = 0
+    while True:
+        rows = list(qs.filter(id__gt=last_id)[:chunk_size])
+        if not rows:
+            break
+        last_id = rows[-1]["id"]
+
+        wanted = {}
+        for row in rows:
+            match = LEGACY_FEE_RE.match(row["description"])
+            if match:
+                wanted[row["id"]] = (row["tenancy_id"], match.group(1))
+        sources = {
+            (tenancy_id, uid): pk
+            for pk, tenancy_id, uid in RentInvoice.objects.filter(
+                uid__in={uid for _, uid in wanted.values()}
+            ).values_list("id", "tenancy_id", "uid")
+        }
+        taken = set(
+            RentInvoice.objects.filter(source_invoice_id__in=sources.values()).values_list("source_invoice_id", flat=True)
+        )
+
+        updates = []
+        for row in rows:
+            source_id = sources.get(wanted.get(row["id"]))
+            if source_id is None or source_id == row["id"]:
+                stats["unmatched"] += 1
+            elif source_id in taken:
+                stats["duplicates"] += 1
+            else:
+                taken.add(source_id)
+                updates.append(RentInvoice(pk=row["id"], source_invoice_id=source_id))
+        with transaction.atomic():
+            RentInvoice.objects.bulk_update(updates, ["source_invoice"])
+        stats["linked"] += len(updates)
+
+    logger.info(f"Legacy late-fee backfill: {stats}")
+    return stats
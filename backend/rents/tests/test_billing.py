@@ -0,0 +1,117 @@
+# backend/rents/tests/test_billing.py
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+
+from rents.billing import MAX_PERIODS_PER_RUN, BillingCycleEngine, add_months, period_amount, period_containing
+
+
+def row(cycle="monthly", start=date(2024, 1, 31), end=None, billed_through=None, rent=Decimal("310000.00")):
+    return {
+        "id": 1, "billing_cycle": cycle, "start_date": start, "end_date": end,
+        "billed_through": billed_through, "monthly_rent": rent,
+    }
+
+
+class AddMonthsTests(SimpleTestCase):
+    def test_clamps_to_month_end(self):
+        self.assertEqual(add_months(date(2024, 1, 31), 1), date(2024, 2, 29))
+        self.assertEqual(add_months(date(2023, 1, 31), 1), date(2023, 2, 28))
+        self.assertEqual(add_months(date(2024, 1, 31), 2), date(2024, 3, 31))
+
+    def test_crosses_years(self):
+        self.assertEqual(add_months(date(2024, 11, 15), 3), date(2025, 2, 15))
+        self.assertEqual(add_months(date(2024, 1, 15), -1), date(2023, 12, 15))
+
+
+class PeriodContainingTests(SimpleTestCase):
+    def test_month_end_anchor(self):
+        anchor = date(2024, 1, 31)
+        self.assertEqual(period_containing("monthly", anchor, date(2024, 1, 31)), (date(2024, 1, 31), date(2024, 2, 28)))
+        self.assertEqual(period_containing("monthly", anchor, date(2024, 2, 29)), (date(2024, 2, 29), date(2024, 3, 30)))
+        self.assertEqual(period_containing("monthly", anchor, date(2024, 3, 30)), (date(2024, 2, 29), date(2024, 3, 30)))
+        self.assertEqual(period_containing("monthly", anchor, date(2024, 3, 31)), (date(2024, 3, 31), date(2024, 4, 29)))
+
+    def test_monthly_mid_month(self):
+        anchor = date(2024, 1, 15)
+        self.assertEqual(period_containing("monthly", anchor, date(2024, 3, 14)), (date(2024, 2, 15), date(2024, 3, 14)))
+        self.assertEqual(period_containing("monthly", anchor, date(2024, 3, 15)), (date(2024, 3, 15), date(2024, 4, 14)))
+
+    def test_weekly(self):
+        anchor = date(2024, 1, 3)
+        self.assertEqual(period_containing("weekly", anchor, date(2024, 1, 3)), (date(2024, 1, 3), date(2024, 1, 9)))
+        self.assertEqual(period_containing("weekly", anchor, date(2024, 1, 16)), (date(2024, 1, 10), date(2024, 1, 16)))
+
+    def test_daily(self):
+        self.assertEqual(period_containing("daily", date(2024, 1, 3), date(2024, 5, 6)), (date(2024, 5, 6), date(2024, 5, 6)))
+
+    def test_periods_are_contiguous(self):
+        anchor = date(2023, 8, 31)
+        _, end = period_containing("monthly", anchor, anchor)
+        for _ in range(24):
+            start, next_end = period_containing("monthly", anchor, end + timedelta(days=1))
+            self.assertEqual(start, end + timedelta(days=1))
+            end = next_end
+
+
+class PeriodAmountTests(SimpleTestCase):
+    def test_full_period(self):
+        self.assertEqual(
+            period_amount("monthly", Decimal("300000.00"), date(2024, 4, 1), date(2024, 4, 30)),
+            (date(2024, 4, 30), Decimal("300000.00")),
+        )
+
+    def test_prorated_by_days(self):
+        self.assertEqual(
+            period_amount("monthly", Decimal("300000.00"), date(2024, 4, 1), date(2024, 4, 30), date(2024, 4, 10)),
+            (date(2024, 4, 10), Decimal("100000.00")),
+        )
+
+    def test_end_after_period_is_ignored(self):
+        self.assertEqual(
+            period_amount("monthly", Decimal("300000.00"), date(2024, 4, 1), date(2024, 4, 30), date(2024, 6, 1)),
+            (date(2024, 4, 30), Decimal("300000.00")),
+        )
+
+
+class PeriodsForTests(SimpleTestCase):
+    def test_first_run_bills_the_current_period_only(self):
+        engine = BillingCycleEngine(today=date(2024, 3, 10))
+        periods = engine.periods_for(row(start=date(2024, 1, 31)))
+        self.assertEqual(periods, [(date(2024, 2, 29), date(2024, 3, 30), Decimal("310000.00"))])
+
+    def test_lead_days_bill_the_next_period_in_advance(self):
+        engine = BillingCycleEngine(today=date(2024, 3, 24))
+        periods = engine.periods_for(row(start=date(2024, 1, 31), billed_through=date(2024, 3, 30)))
+        self.assertEqual(periods, [(date(2024, 3, 31), date(2024, 4, 29), Decimal("310000.00"))])
+
+    def test_outside_lead_days_nothing_is_due(self):
+        engine = BillingCycleEngine(today=date(2024, 3, 23))
+        self.assertEqual(engine.periods_for(row(start=date(2024, 1, 31), billed_through=date(2024, 3, 30))), [])
+
+    def test_continues_after_billed_through(self):
+        engine = BillingCycleEngine(today=date(2024, 5, 1))
+        periods = engine.periods_for(row(start=date(2024, 1, 31), billed_through=date(2024, 2, 28)))
+        self.assertEqual([p[0] for p in periods], [date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 30)])
+
+    def test_last_period_is_prorated(self):
+        engine = BillingCycleEngine(today=date(2024, 4, 1))
+        periods = engine.periods_for(row(start=date(2024, 1, 1), end=date(2024, 4, 10), billed_through=date(2024, 3, 31),
+                                         rent=Decimal("300000.00")))
+        self.assertEqual(periods, [(date(2024, 4, 1), date(2024, 4, 10), Decimal("100000.00"))])
+
+    def test_nothing_after_end_date(self):
+        engine = BillingCycleEngine(today=date(2024, 6, 1))
+        self.assertEqual(engine.periods_for(row(start=date(2024, 1, 1), end=date(2024, 4, 10), billed_through=date(2024, 4, 10))), [])
+
+    def test_weekly_amount(self):
+        engine = BillingCycleEngine(today=date(2024, 1, 1))
+        periods = engine.periods_for(row(cycle="weekly", start=date(2024, 1, 1), rent=Decimal("520000.00")))
+        self.assertEqual(periods, [(date(2024, 1, 1), date(2024, 1, 7), Decimal("120000.00"))])
+
+    def test_catch_up_is_capped(self):
+        engine = BillingCycleEngine(today=date(2024, 6, 1))
+        periods = engine.periods_for(row(cycle="daily", start=date(2024, 1, 1), billed_through=date(2024, 1, 1)))
+        self.assertEqual(len(periods), MAX_PERIODS_PER_RUN)
+        self.assertEqual(periods[0][0], date(2024, 1, 2))
@@ -1,7 +1,7 @@
 # backend/rents/urls.py
 from rest_framework.routers import DefaultRouter
 from django.urls import path, include
-from .views import TenancyViewSet, LateFeeRuleViewSet, RentInvoiceViewSet, RentPaymentViewSet
+from .views import TenancyViewSet, LateFeeRuleViewSet, RentInvoiceViewSet, RentPaymentViewSet, BillingRunViewSet
 from .views_reports import CollectionSummaryView, LateFeePreviewApplyView
 
 router = DefaultRouter()
@@ -9,6 +9,7 @@ router.register(r"tenancies", TenancyViewSet, basename="tenancy")
 router.register(r"late-fee-rules", LateFeeRuleViewSet, basename="latefeerule")
 router.register(r"invoices", RentInvoiceViewSet, basename="rentinvoice")
 router.register(r"payments", RentPaymentViewSet, basename="rentpayment")
+router.register(r"billing-runs", BillingRunViewSet, basename="billingrun")
 
 urlpatterns = [
     path("", include(router.urls)),
@@ -2,105 +2,108 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import permissions, status
-from django.db.models import Sum, F, Count
-from django.utils import timezone
-from decimal import Decimal
-from .models import RentInvoice, RentPayment, Tenancy, LateFeeRule
-from django.db import transaction
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.renderers import BaseRenderer
+from rest_framework.settings import api_settings
+from django.http import StreamingHttpResponse
+from django.db.models import F, Count
+from .models import Tenancy, LateFeeRule
 from datetime import timedelta
+import csv
+import io
+from .reports import CollectionReport, PROPERTY_CSV_FIELDS
+from .services import LateFeeEngine
 
 class IsPropertyManagerOrAdmin(permissions.BasePermission):
     def has_permission(self, request, view):
         return request.user and request.user.is_authenticated and (request.user.is_staff or getattr(request.user, "role", None) == "property_manager")
 
+class CSVRenderer(BaseRenderer):
+    """Lets `?format=csv` pass content negotiation; the view streams the body itself."""
+    media_type = "text/csv"
+    format = "csv"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if isinstance(data, (bytes, str)):
+            return data
+        # Error responses (400/401/403) negotiate to csv too: write them as a one-row table
+        if not isinstance(data, dict):
+            data = {"detail": data}
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(data.keys())
+        writer.writerow(["; ".join(map(str, v)) if isinstance(v, (list, tuple)) else v for v in data.values()])
+        return buffer.getvalue().encode(self.charset)
+
+
+class _Echo:
+    """File-like object whose write() returns the value, for streaming csv.writer output."""
+    def write(self, value):
+        return value
+
+
+class CollectionSummaryPagination(PageNumberPagination):
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+
 class CollectionSummaryView(APIView):
     """
     Admin/PM report: collection summary for a property manager (or global for admins).
     Query params:
       - property_id (optional) -> filter to specific property
       - from_date, to_date (optional) -> ISO dates to filter payments
+      - page, page_size (optional) -> per_property pagination
+      - format=csv (optional) -> stream per-property rows as CSV
     Response:
       totals: { collected, outstanding, invoices_count, paid_count, overdue_count }
-      per_property: list of aggregates per property (if PM/admin)
+      per_property: paginated aggregates per property (count/next/previous/results)
       per_agent: list aggregates per agent (if applicable)
+    Collected figures come from the daily collection rollup (raw tables for today only).
     """
     permission_classes = [permissions.IsAuthenticated, IsPropertyManagerOrAdmin]
+    renderer_classes = list(api_settings.DEFAULT_RENDERER_CLASSES) + [CSVRenderer]
 
     def get(self, request):
-        user = request.user
-        property_id = request.query_params.get("property_id")
-        from_date = request.query_params.get("from_date")
-        to_date = request.query_params.get("to_date")
-
-        payments_qs = RentPayment.objects.filter(status="success")
-        invoices_qs = RentInvoice.objects.all()
-
-        if getattr(user, "role", None) == "property_manager" and not user.is_staff:
-            # Limit to properties managed by this user
-            payments_qs = payments_qs.filter(invoice__tenancy__apartment__property__manager=user)
-            invoices_qs = invoices_qs.filter(tenancy__apartment__property__manager=user)
-        if property_id:
-            payments_qs = payments_qs.filter(invoice__tenancy__apartment__property__id=property_id)
-            invoices_qs = invoices_qs.filter(tenancy__apartment__property__id=property_id)
-
-        if from_date:
-            payments_qs = payments_qs.filter(created_at__date__gte=from_date)
-            invoices_qs = invoices_qs.filter(created_at__date__gte=from_date)
-        if to_date:
-            payments_qs = payments_qs.filter(created_at__date__lte=to_date)
-            invoices_qs = invoices_qs.filter(created_at__date__lte=to_date)
-
-        collected = payments_qs.aggregate(total=Sum("amount"))["total"] or Decimal("0.00")
-        outstanding = invoices_qs.aggregate(total=Sum("outstanding"))["total"] or Decimal("0.00")
-        invoices_count = invoices_qs.count()
-        paid_count = invoices_qs.filter(status="paid").count()
-        overdue_count = invoices_qs.filter(status="overdue").count()
-
-        # per-property aggregation (top-level)
-        per_property = []
-        # Only admins get all properties; PMs get their own properties
-        from collections import defaultdict
-        prop_map = defaultdict(lambda: {"collected": Decimal("0.00"), "outstanding": Decimal("0.00"), "invoices": 0})
-        for p in payments_qs.select_related("invoice__tenancy__apartment__property"):
-            prop = p.invoice.tenancy.apartment.property
-            prop_map[str(prop.uid)]["collected"] += p.amount
-
-        for inv in invoices_qs.select_related("tenancy__apartment__property"):
-            prop = inv.tenancy.apartment.property
-            prop_map[str(prop.uid)]["outstanding"] += inv.outstanding
-            prop_map[str(prop.uid)]["invoices"] += 1
-
-        for uid, data in prop_map.items():
-            per_property.append({"property_uid": uid, "collected": data["collected"], "outstanding": data["outstanding"], "invoices": data["invoices"]})
-
-        # per-agent aggregation (if agents exist)
-        per_agent = []
-        agent_agg = {}
-        agent_qs = payments_qs.select_related("invoice__tenancy__apartment__property__manager")
-        for p in agent_qs:
-            mgr = p.invoice.tenancy.apartment.property.manager
-            if not mgr:
-                continue
-            key = str(mgr.id)
-            agent_agg.setdefault(key, {"manager_id": mgr.id, "manager_email": mgr.email, "collected": Decimal("0.00")})
-            agent_agg[key]["collected"] += p.amount
-        per_agent = list(agent_agg.values())
+        report = CollectionReport(
+            request.user,
+            property_id=request.query_params.get("property_id"),
+            from_date=request.query_params.get("from_date"),
+            to_date=request.query_params.get("to_date"),
+        )
+
+        if getattr(request.accepted_renderer, "format", None) == "csv":
+            return self._stream_csv(report)
+
+        paginator = CollectionSummaryPagination()
+        page = paginator.paginate_queryset(report.per_property(), request, view=self)
+        per_property = paginator.get_paginated_response(page).data
 
         return Response({
-            "totals": {
-                "collected": collected,
-                "outstanding": outstanding,
-                "invoices_count": invoices_count,
-                "paid_count": paid_count,
-                "overdue_count": overdue_count
-            },
+            "totals": report.totals(),
             "per_property": per_property,
-            "per_agent": per_agent
+            "per_agent": report.per_manager(),
         })
 
+    def _stream_csv(self, report):
+        writer = csv.writer(_Echo())
+
+        def rows():
+            yield writer.writerow(PROPERTY_CSV_FIELDS)
+            for row in report.per_property().iterator(chunk_size=1000):
+                yield writer.writerow([row[field] for field in PROPERTY_CSV_FIELDS])
+
+        response = StreamingHttpResponse(rows(), content_type="text/csv")
+        response["Content-Disposition"] = 'attachment; filename="collection-summary.csv"'
+        return response
+
 class LateFeePreviewApplyView(APIView):
     """
     Preview late fees for a property or tenancy (no changes) or apply them (admin action).
+    Both run the same LateFeeEngine pass; preview is the dry-run diff of what apply creates.
     POST payload:
       - property_id (optional) OR tenancy_id (optional)
       - action: "preview" or "apply"
@@ -110,70 +113,35 @@ class LateFeePreviewApplyView(APIView):
 
     def post(self, request):
         action = request.data.get("action", "preview")
-        property_id = request.data.get("property_id")
-        tenancy_id = request.data.get("tenancy_id")
-        today = timezone.now().date()
-
-        invoices = RentInvoice.objects.filter(status__in=["pending", "partially_paid", "overdue"], due_date__lt=today)
-        if tenancy_id:
-            invoices = invoices.filter(tenancy__id=tenancy_id)
-        elif property_id:
-            invoices = invoices.filter(tenancy__apartment__property__id=property_id)
-        else:
-            # default: for PM, only their properties; for admin all
-            user = request.user
-            if getattr(user, "role", None) == "property_manager" and not user.is_staff:
-                invoices = invoices.filter(tenancy__apartment__property__manager=user)
-
-        results = []
-        for inv in invoices.select_related("tenancy__apartment__property"):
-            prop = inv.tenancy.apartment.property
-            rule = getattr(prop, "late_fee_rule", None)
-            if not rule or not rule.enabled:
-                continue
-            days_past = (today - inv.due_date).days
-            if days_past <= rule.grace_days:
-                continue
-            # compute fee
-            percent_part = (inv.amount * (rule.percentage / Decimal("100.00"))) if rule.percentage else Decimal("0.00")
-            fixed_part = rule.fixed_amount or Decimal("0.00")
-            fee_amt = (percent_part + fixed_part).quantize(Decimal("0.01"))
-            if fee_amt <= 0:
-                continue
-            results.append({
-                "invoice_id": inv.id,
-                "invoice_uid": inv.uid,
-                "tenancy_uid": inv.tenancy.uid,
-                "property_uid": prop.uid,
-                "days_past": days_past,
-                "fee_amount": str(fee_amt),
-                "description": f"Late fee for invoice {inv.uid}"
-            })
-
-        if action == "preview":
-            return Response({"preview": results})
-        elif action == "apply":
-            applied = []
-            with transaction.atomic():
-                for r in results:
-                    inv = RentInvoice.objects.get(pk=r["invoice_id"])
-                    # idempotent: skip if a late fee invoice already exists for this invoice uid
-                    sentinel_desc = f"Late fee for invoice {inv.uid}"
-                    exists = RentInvoice.objects.filter(tenancy=inv.tenancy, description__icontains=sentinel_desc).exists()
-                    if exists:
-                        continue
-                    fee_amt = Decimal(r["fee_amount"])
-                    new_inv = RentInvoice.objects.create(
-                        tenancy=inv.tenancy,
-                        due_date=today,
-                        amount=fee_amt,
-                        description=f"{sentinel_desc} (applied {today.isoformat()})"
-                    )
-                    applied.append({
-                        "created_invoice_id": new_inv.id,
-                        "created_invoice_uid": new_inv.uid,
-                        "amount": str(fee_amt)
-                    })
-            return Response({"applied": applied})
-        else:
+        if action not in ("preview", "apply"):
             return Response({"detail": "invalid action"}, status=status.HTTP_400_BAD_REQUEST)
+
+        user = request.user
+        engine = LateFeeEngine(
+            tenancy_id=request.data.get("tenancy_id"),
+            property_id=request.data.get("property_id"),
+            # default: for PM, only their properties; for admin all
+            manager=user if getattr(user, "role", None) == "property_manager" and not user.is_staff else None,
+        )
+        fees, metrics = engine.preview() if action == "preview" else engine.apply()
+
+        def row(fee):
+            data = {
+                "invoice_id": fee["invoice_id"],
+                "invoice_uid": fee["invoice_uid"],
+                "tenancy_uid": fee["tenancy_uid"],
+                "property_uid": fee["property_uid"],
+                "days_past": fee["days_past"],
+                "fee_amount": str(fee["fee_amount"]),
+                "description": fee["description"],
+            }
+            if "created_invoice_uid" in fee:
+                # keys the "applied" list has always carried
+                data["created_invoice_id"] = fee["created_invoice_id"]
+                data["created_invoice_uid"] = fee["created_invoice_uid"]
+                data["amount"] = data["fee_amount"]
+            return data
+
+        metrics["total_fees"] = str(metrics["total_fees"])
+        key = "preview" if action == "preview" else "applied"
+        return Response({key: [row(fee) for fee in fees], "metrics": metrics})
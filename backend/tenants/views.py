@@ -1,40 +1,37 @@
 from rest_framework import viewsets, permissions
+from config.permissions import OwnershipPermission, OwnershipQuerysetMixin
 from .models import TenantBond, TenantApartment, StatementOfStay
 from .serializers import TenantBondSerializer, TenantApartmentSerializer, StatementOfStaySerializer
 
 
-class IsOwnerOrManager(permissions.BasePermission):
-    """Tenant can view own bonds; Manager can approve/reject."""
+class IsOwnerOrManager(OwnershipPermission):
+    """Tenant can view own bonds; Manager can approve/reject (roles from the view's `ownership`)."""
 
-    def has_object_permission(self, request, view, obj):
-        if isinstance(obj, TenantBond):
-            return obj.tenant == request.user or obj.property_manager == request.user
-        elif isinstance(obj, TenantApartment):
-            return obj.tenant_bond.tenant == request.user or obj.tenant_bond.property_manager == request.user
-        elif isinstance(obj, StatementOfStay):
-            return (
-                obj.tenant_apartment.tenant_bond.tenant == request.user
-                or obj.tenant_apartment.tenant_bond.property_manager == request.user
-            )
-        return False
+    staff_allowed = False
 
 
-class TenantBondViewSet(viewsets.ModelViewSet):
+class TenantBondViewSet(OwnershipQuerysetMixin, viewsets.ModelViewSet):
     queryset = TenantBond.objects.all()
     serializer_class = TenantBondSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrManager]
+    ownership = {"is_tenant": "tenant", "is_manager": "property_manager"}
 
     def perform_create(self, serializer):
         serializer.save(tenant=self.request.user)
 
 
-class TenantApartmentViewSet(viewsets.ModelViewSet):
+class TenantApartmentViewSet(OwnershipQuerysetMixin, viewsets.ModelViewSet):
     queryset = TenantApartment.objects.all()
     serializer_class = TenantApartmentSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrManager]
+    ownership = {"is_tenant": "tenant_bond__tenant", "is_manager": "tenant_bond__property_manager"}
 
 
-class StatementOfStayViewSet(viewsets.ReadOnlyModelViewSet):
+class StatementOfStayViewSet(OwnershipQuerysetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = StatementOfStay.objects.all()
     serializer_class = StatementOfStaySerializer
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrManager]
+    ownership = {
+        "is_tenant": "tenant_apartment__tenant_bond__tenant",
+        "is_manager": "tenant_apartment__tenant_bond__property_manager",
+    }
@@ -0,0 +1,22 @@
+# backend/users/management/commands/sync_uid_sequences.py
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from users import sequences
+
+
+class Command(BaseCommand):
+    help = "Create the uid sequences and move them past uids stored outside them (imports, fixtures)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("prefixes", nargs="*", help="Prefixes to sync (default: all registered)")
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        prefixes = [p.upper() for p in options["prefixes"]] or list(sequences.SEQUENCES)
+        unknown = set(prefixes) - set(sequences.SEQUENCES)
+        if unknown:
+            raise CommandError(f"No uid sequence registered for: {', '.join(sorted(unknown))}")
+        for prefix in prefixes:
+            following = sequences.sync_sequence(prefix, using=options["database"])
+            self.stdout.write(f"{prefix}: next uid {sequences.SEQUENCES[prefix].format(following)}")
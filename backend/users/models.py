@@ -1,8 +1,9 @@
 import uuid
-from django.db import models
+from django.db import models, router
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
 from django.utils import timezone
 from django.conf import settings
+from . import sequences
 from .managers import UserManager
 
 
@@ -48,15 +49,8 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     def save(self, *args, **kwargs):
         if not self.uid:
-            # simple uid: USR/000001-like
-            last = self.__class__.objects.order_by("-date_joined").first()
-            seq = 1
-            if last and last.uid:
-                try:
-                    seq = int(last.uid.split("/")[-1]) + 1
-                except Exception:
-                    seq = self.__class__.objects.count() + 1
-            self.uid = generate_uid("USR", seq, width=6)
+            # USR/000001-like, from the USR sequence (see users.sequences)
+            self.uid = sequences.next_uid("USR", using=kwargs.get("using") or router.db_for_write(self.__class__, instance=self))
         super().save(*args, **kwargs)
 
 
@@ -0,0 +1,141 @@
+# backend/users/sequences.py
+"""
+Human-readable sequential uids ("USR/000123") backed by Postgres sequences.
+
+Each registered prefix owns a sequence (uid_seq_<prefix>). nextval() never
+blocks and never hands the same number out twice, even across concurrent
+transactions, so a burst of signups costs one cheap statement each: no scan
+of the users table and no retry on the unique uid. Numbers are not gap-free;
+a rolled-back save burns its number, like any sequence.
+
+Sequences are created (and started past the highest uid already stored) by
+the post_migrate hook, or lazily on first use after a deploy that skipped
+`migrate`. Run `manage.py sync_uid_sequences` after importing rows with
+explicit uids so the sequence skips past them.
+
+Other models opt in with register() and then call next_uid() in save(), or
+reserve_uids() to number a whole bulk_create() batch in one round trip.
+"""
+import logging
+import re
+
+from django.apps import apps
+from django.db import DEFAULT_DB_ALIAS, ProgrammingError, connections, transaction
+from django.db.models import BigIntegerField, Max
+from django.db.models.functions import Cast, Substr
+
+logger = logging.getLogger(__name__)
+
+SEQUENCES = {}
+_ready = set()  # (alias, prefix) whose sequence is known to be committed
+
+
+class UidSequence:
+    def __init__(self, prefix, model, field="uid", width=6):
+        self.prefix = prefix.upper()
+        if not re.fullmatch(r"[A-Z0-9_]+", self.prefix):
+            raise ValueError(f"Invalid uid prefix: {prefix!r}")
+        self.model = model
+        self.field = field
+        self.width = width
+        self.name = f"uid_seq_{self.prefix.lower()}"
+
+    def format(self, seq):
+        return f"{self.prefix}/{str(seq).zfill(self.width)}"
+
+    def highest_stored(self, using=DEFAULT_DB_ALIAS):
+        """Highest number already used by a "<PREFIX>/<digits>" uid (one scan; only run on create/sync)."""
+        model = apps.get_model(self.model)
+        return model._default_manager.using(using).filter(
+            **{f"{self.field}__regex": rf"^{self.prefix}/[0-9]+$"}
+        ).aggregate(
+            highest=Max(Cast(Substr(self.field, len(self.prefix) + 2), BigIntegerField()))
+        )["highest"] or 0
+
+
+def register(prefix, model, field="uid", width=6):
+    """Give `model` ("app_label.Model") sequential `<PREFIX>/000001` uids in `field`."""
+    sequence = UidSequence(prefix, model, field, width)
+    SEQUENCES[sequence.prefix] = sequence
+    return sequence
+
+
+def _get(prefix):
+    try:
+        return SEQUENCES[prefix.upper()]
+    except KeyError:
+        raise LookupError(f"No uid sequence registered for {prefix!r}")
+
+
+def ensure_sequence(prefix, using=DEFAULT_DB_ALIAS):
+    """Create the sequence if missing, starting after the highest uid already stored."""
+    sequence = _get(prefix)
+    start = sequence.highest_stored(using) + 1
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"CREATE SEQUENCE IF NOT EXISTS {sequence.name} START WITH {start}")
+
+
+def sync_sequence(prefix, using=DEFAULT_DB_ALIAS):
+    """Move the sequence past any uid stored outside it (imports, fixtures). Returns the next number."""
+    sequence = _get(prefix)
+    ensure_sequence(prefix, using)
+    highest = sequence.highest_stored(using)
+    # One statement (sequence rows cannot be locked FOR UPDATE): never moves the
+    # sequence backwards; may skip one unused number, which sequences allow anyway
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f"SELECT setval(%s, GREATEST(%s, last_value), true) FROM {sequence.name}",
+            [sequence.name, highest],
+        )
+        following = cursor.fetchone()[0] + 1
+    _ready.add((using, sequence.prefix))
+    return following
+
+
+def _nextvals(sequence, count, using):
+    with connections[using].cursor() as cursor:
+        if count == 1:
+            cursor.execute("SELECT nextval(%s)", [sequence.name])
+        else:
+            cursor.execute("SELECT nextval(%s) FROM generate_series(1, %s)", [sequence.name, count])
+        return [row[0] for row in cursor.fetchall()]
+
+
+def next_values(prefix, count=1, using=DEFAULT_DB_ALIAS):
+    """`count` fresh numbers from the prefix's sequence, in one query."""
+    sequence = _get(prefix)
+    key = (using, sequence.prefix)
+    if key in _ready:
+        return _nextvals(sequence, count, using)
+    try:
+        # Savepoint, so a missing sequence does not abort the caller's transaction
+        with transaction.atomic(using=using):
+            values = _nextvals(sequence, count, using)
+    except ProgrammingError:
+        logger.warning(f"uid sequence {sequence.name} missing; creating it (run migrate to create it up front)")
+        ensure_sequence(prefix, using)
+        # Created inside the caller's transaction, which may still roll back: not cached
+        return _nextvals(sequence, count, using)
+    _ready.add(key)
+    return values
+
+
+def next_uid(prefix, using=DEFAULT_DB_ALIAS):
+    return _get(prefix).format(next_values(prefix, 1, using)[0])
+
+
+def reserve_uids(prefix, count, using=DEFAULT_DB_ALIAS):
+    """`count` uids for a bulk_create() batch, allocated in one round trip."""
+    if count <= 0:
+        return []
+    sequence = _get(prefix)
+    return [sequence.format(seq) for seq in next_values(prefix, count, using)]
+
+
+def create_sequences(using=DEFAULT_DB_ALIAS, **kwargs):
+    """post_migrate receiver: make sure every registered sequence exists."""
+    for prefix in SEQUENCES:
+        ensure_sequence(prefix, using)
+
+
+register("USR", "users.User")
@@ -0,0 +1,65 @@
+# backend/users/tests/test_sequences.py
+import io
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+
+from users import sequences
+
+
+def number(uid):
+    return int(uid.split("/")[1])
+
+
+class UidSequenceFormatTests(SimpleTestCase):
+    def test_format_pads_to_width(self):
+        self.assertEqual(sequences.UidSequence("usr", "users.User").format(123), "USR/000123")
+
+    def test_rejects_unsafe_prefix(self):
+        with self.assertRaises(ValueError):
+            sequences.UidSequence("usr; drop", "users.User")
+
+    def test_unknown_prefix(self):
+        with self.assertRaises(LookupError):
+            sequences.next_uid("NOPE")
+
+
+class UidSequenceTests(TestCase):
+    """Sequences are not rolled back with the test transaction, so assertions are relative."""
+
+    def test_next_uid_increases(self):
+        first = sequences.next_uid("USR")
+        second = sequences.next_uid("USR")
+        self.assertRegex(first, r"^USR/\d{6,}$")
+        self.assertGreater(number(second), number(first))
+
+    def test_reserve_uids_is_one_distinct_batch(self):
+        self.assertEqual(sequences.reserve_uids("USR", 0), [])
+        uids = sequences.reserve_uids("USR", 5)
+        self.assertEqual(len(set(uids)), 5)
+        self.assertEqual(sorted(uids), uids)
+        self.assertGreater(number(sequences.next_uid("USR")), number(uids[-1]))
+
+    def test_user_save_assigns_uid(self):
+        user = get_user_model().objects.create_user(email="seq@example.com", password="x")
+        self.assertRegex(user.uid, r"^USR/\d{6,}$")
+
+    def test_sync_moves_past_imported_uids(self):
+        imported = number(sequences.next_uid("USR")) + 1000
+        user = get_user_model().objects.create_user(email="imported@example.com", password="x")
+        get_user_model().objects.filter(pk=user.pk).update(uid=sequences.SEQUENCES["USR"].format(imported))
+
+        following = sequences.sync_sequence("USR")
+        self.assertEqual(following, imported + 1)
+        self.assertEqual(sequences.next_uid("USR"), sequences.SEQUENCES["USR"].format(imported + 1))
+
+    def test_sync_never_moves_backwards(self):
+        current = number(sequences.next_uid("USR"))
+        self.assertGreater(sequences.sync_sequence("USR"), current)
+        self.assertGreater(number(sequences.next_uid("USR")), current)
+
+    def test_sync_command(self):
+        out = io.StringIO()
+        call_command("sync_uid_sequences", "usr", stdout=out)
+        self.assertIn("USR: next uid USR/", out.getvalue())
@@ -0,0 +1,310 @@
+# backend/wallet/ledger.py
+"""
+Wallet ledger.
+
+Successful WalletTransaction rows are the source of truth; Wallet.balance and
+ledger_balance are caches kept in step by single atomic statements
+(UPDATE ... SET balance = balance + x [WHERE balance >= x]) in the same
+transaction as the posting. Never assign wallet.balance directly.
+
+Historical balances come from WalletBalanceSnapshot plus the postings after it,
+so balance_at() and statement() never rescan a wallet's whole history. Wallets
+whose balance moved before the ledger existed get one opening posting from
+open_balances() (`manage.py open_wallet_ledgers`), which must run before
+snapshots are taken.
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Max, Min, Sum, When
+from django.utils import timezone
+
+from .models import Wallet, WalletBalanceSnapshot, WalletTransaction
+
+logger = logging.getLogger(__name__)
+
+CENTS = Decimal("0.01")
+ZERO = Decimal("0.00")
+
+CREDIT_TYPES = ("fund", "credit")
+DEBIT_TYPES = ("debit", "withdrawal", "auto_deduct", "transfer")
+
+# Postings newer than this are left out of snapshots so in-flight transactions
+# (created_at set before commit) cannot be missed.
+SNAPSHOT_LAG = timedelta(minutes=5)
+
+OPENING_REFERENCE = "ledger-opening"
+
+
+class InsufficientFunds(Exception):
+    pass
+
+
+def to_amount(value):
+    """Decimal, 2dp. Accepts str/int/Decimal (and floats via str, never binary float math)."""
+    return Decimal(str(value)).quantize(CENTS)
+
+
+def parse_amount(value):
+    """Positive 2dp Decimal from request input, or None if missing, non-numeric, non-finite, zero or negative."""
+    try:
+        amount = Decimal(str(value))
+        if not amount.is_finite():
+            return None
+        amount = amount.quantize(CENTS)
+    except (InvalidOperation, TypeError, ValueError):
+        return None
+    return amount if amount > 0 else None
+
+
+def signed(txn_type, amount):
+    if txn_type in DEBIT_TYPES:
+        return -amount
+    if txn_type in CREDIT_TYPES:
+        return amount
+    raise ValueError(f"Unknown wallet transaction type: {txn_type}")
+
+
+def signed_amount_expression():
+    """SQL expression for a posting's effect on the balance."""
+    return Case(
+        When(txn_type__in=DEBIT_TYPES, then=-F("amount")),
+        default=F("amount"),
+        output_field=DecimalField(max_digits=18, decimal_places=2),
+    )
+
+
+def _apply(wallet_id, delta, require_funds):
+    qs = Wallet.objects.filter(pk=wallet_id)
+    if delta < 0 and require_funds:
+        qs = qs.filter(balance__gte=-delta)
+    return qs.update(balance=F("balance") + delta, ledger_balance=F("ledger_balance") + delta)
+
+
+def post(wallet, amount, txn_type, reference=None, description="", require_funds=True):
+    """
+    Record a successful posting and move the cached balance in one transaction.
+    Debits fail with InsufficientFunds (nothing written) unless the balance covers them.
+    """
+    amount = to_amount(amount)
+    if amount <= 0:
+        raise ValueError("amount must be positive")
+    delta = signed(txn_type, amount)
+    with transaction.atomic():
+        if not _apply(wallet.pk, delta, require_funds):
+            raise InsufficientFunds(f"Insufficient balance in wallet {wallet.uid}")
+        txn = WalletTransaction.objects.create(
+            wallet=wallet,
+            txn_type=txn_type,
+            amount=amount,
+            reference=reference,
+            description=description,
+            status="success",
+        )
+    return txn
+
+
+def record_failed(wallet, amount, txn_type, reference=None, description=""):
+    """Failed attempt: recorded for history, no balance effect."""
+    return WalletTransaction.objects.create(
+        wallet=wallet,
+        txn_type=txn_type,
+        amount=to_amount(amount),
+        reference=reference,
+        description=description,
+        status="failed",
+    )
+
+
+def transfer(sender, recipient, amount, reference=None, description="Fund transfer"):
+    """
+    Move funds between wallets: a debit on the sender and a matching credit on the
+    recipient, sharing one reference. Rows are locked in pk order to avoid deadlocks.
+    Returns (debit_txn, credit_txn).
+    """
+    amount = to_amount(amount)
+    if sender.pk == recipient.pk:
+        raise ValueError("cannot transfer to the same wallet")
+    with transaction.atomic():
+        list(Wallet.objects.select_for_update().filter(pk__in=[sender.pk, recipient.pk]).order_by("pk"))
+        debit = post(sender, amount, "debit", reference=reference, description=description)
+        credit = post(recipient, amount, "credit", reference=reference, description=description)
+    return debit, credit
+
+
+def refresh(wallet):
+    """Reload cached balances on an in-memory wallet after postings."""
+    wallet.refresh_from_db(fields=["balance", "ledger_balance"])
+    return wallet
+
+
+def _postings(wallet_id):
+    return WalletTransaction.objects.filter(wallet_id=wallet_id, status="success")
+
+
+def balance_at(wallet, at):
+    """Balance as of `at`: latest snapshot at/before `at` + postings since."""
+    snapshot = (
+        WalletBalanceSnapshot.objects.filter(wallet=wallet, taken_at__lte=at)
+        .order_by("-taken_at")
+        .first()
+    )
+    postings = _postings(wallet.pk).filter(created_at__lte=at)
+    base = ZERO
+    if snapshot:
+        base = snapshot.balance
+        postings = postings.filter(created_at__gt=snapshot.taken_at)
+    delta = postings.aggregate(total=Sum(signed_amount_expression()))["total"] or ZERO
+    return base + delta
+
+
+def statement(wallet, start, end):
+    """
+    Statement for (start, end]: opening/closing balance and entries with running balance.
+    Costs one snapshot lookup plus the postings since it.
+    """
+    opening = balance_at(wallet, start)
+    entries = []
+    running = opening
+    for txn in _postings(wallet.pk).filter(created_at__gt=start, created_at__lte=end).order_by("created_at", "id"):
+        running += signed(txn.txn_type, txn.amount)
+        entries.append({
+            "uid": txn.uid,
+            "created_at": txn.created_at,
+            "txn_type": txn.txn_type,
+            "amount": txn.amount,
+            "reference": txn.reference,
+            "description": txn.description,
+            "balance": running,
+        })
+    return {"opening_balance": opening, "closing_balance": running, "entries": entries}
+
+
+def take_snapshots(at=None, batch_size=1000):
+    """
+    Snapshot every wallet's balance as of `at` (default: now - SNAPSHOT_LAG).
+    Each wallet's balance is its previous snapshot + grouped sum of postings since,
+    so the cost is proportional to activity since the last snapshot.
+    Returns the number of snapshots written.
+    """
+    at = at or (timezone.now() - SNAPSHOT_LAG)
+    written = 0
+    last_id = 0
+    while True:
+        wallet_ids = list(
+            Wallet.objects.filter(pk__gt=last_id).order_by("pk").values_list("pk", flat=True)[:batch_size]
+        )
+        if not wallet_ids:
+            break
+        last_id = wallet_ids[-1]
+
+        previous = {
+            row["wallet_id"]: row["latest"]
+            for row in WalletBalanceSnapshot.objects.filter(wallet_id__in=wallet_ids, taken_at__lte=at)
+            .values("wallet_id").annotate(latest=Max("taken_at"))
+        }
+        previous_balance = {
+            (row["wallet_id"], row["taken_at"]): row["balance"]
+            for row in WalletBalanceSnapshot.objects.filter(
+                wallet_id__in=list(previous), taken_at__in=set(previous.values())
+            ).values("wallet_id", "taken_at", "balance")
+        }
+
+        # Wallets are snapshotted together, so they share few "since" times:
+        # one grouped query per distinct previous snapshot time
+        by_since = defaultdict(list)
+        for wallet_id in wallet_ids:
+            by_since[previous.get(wallet_id)].append(wallet_id)
+        deltas = {}
+        for since, ids in by_since.items():
+            postings = WalletTransaction.objects.filter(wallet_id__in=ids, status="success", created_at__lte=at)
+            if since is not None:
+                postings = postings.filter(created_at__gt=since)
+            deltas.update(
+                postings.order_by().values_list("wallet_id").annotate(total=Sum(signed_amount_expression()))
+            )
+
+        snapshots = []
+        for wallet_id in wallet_ids:
+            base = previous_balance.get((wallet_id, previous.get(wallet_id)), ZERO)
+            if wallet_id in previous and previous[wallet_id] == at:
+                continue
+            snapshots.append(WalletBalanceSnapshot(
+                wallet_id=wallet_id, taken_at=at, balance=base + (deltas.get(wallet_id) or ZERO)
+            ))
+        WalletBalanceSnapshot.objects.bulk_create(snapshots, ignore_conflicts=True)
+        written += len(snapshots)
+
+    logger.info(f"Wrote {written} wallet balance snapshots at {at}")
+    return written
+
+
+def open_balances(batch_size=1000):
+    """
+    Reconcile wallets whose stored balance differs from the sum of their postings
+    (balances changed before the ledger existed) with one opening credit/debit,
+    dated at the wallet's creation (or just before its first posting, if that is
+    earlier). The posting does not move the
+    cached balance, which already includes it. Snapshots of adjusted wallets are
+    dropped, since they were summed without it. Wallets that already have an
+    opening posting are skipped, so this is safe to re-run.
+    Returns {"wallets", "adjusted", "net"}.
+    """
+    stats = {"wallets": 0, "adjusted": 0, "net": ZERO}
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            # Locked like post() does, so no posting lands between the two reads
+            wallets = list(
+                Wallet.objects.select_for_update().filter(pk__gt=last_id).order_by("pk")
+                .values("pk", "balance", "created_at")[:batch_size]
+            )
+            if not wallets:
+                break
+            last_id = wallets[-1]["pk"]
+            ids = [w["pk"] for w in wallets]
+            opened = set(
+                WalletTransaction.objects.filter(wallet_id__in=ids, reference=OPENING_REFERENCE)
+                .values_list("wallet_id", flat=True)
+            )
+            sums = {
+                row["wallet_id"]: row
+                for row in WalletTransaction.objects.filter(wallet_id__in=ids, status="success")
+                .order_by().values("wallet_id")
+                .annotate(total=Sum(signed_amount_expression()), first=Min("created_at"))
+            }
+
+            openings, opened_at = [], []
+            for w in wallets:
+                posted = sums.get(w["pk"], {})
+                diff = w["balance"] - (posted.get("total") or ZERO)
+                if w["pk"] in opened or not diff:
+                    continue
+                opened_at.append(
+                    min(w["created_at"], posted["first"] - timedelta(microseconds=1)) if posted else w["created_at"]
+                )
+                openings.append(WalletTransaction(
+                    wallet_id=w["pk"],
+                    txn_type="credit" if diff > 0 else "debit",
+                    amount=abs(diff),
+                    reference=OPENING_REFERENCE,
+                    description="Opening balance (balance held before the ledger)",
+                    status="success",
+                ))
+                stats["net"] += diff
+            if openings:
+                # bulk_create: no balance move, no per-row audit. It stamps created_at
+                # (auto_now_add), so the opening time is written afterwards
+                WalletTransaction.objects.bulk_create(openings)
+                for txn, at in zip(openings, opened_at):
+                    txn.created_at = at
+                WalletTransaction.objects.bulk_update(openings, ["created_at"])
+                WalletBalanceSnapshot.objects.filter(wallet_id__in=[t.wallet_id for t in openings]).delete()
+        stats["wallets"] += len(wallets)
+        stats["adjusted"] += len(openings)
+
+    logger.info(f"Wallet ledger openings: {stats}")
+    return stats
@@ -0,0 +1,17 @@
+# backend/wallet/management/commands/open_wallet_ledgers.py
+from django.core.management.base import BaseCommand
+
+from wallet import ledger
+
+
+class Command(BaseCommand):
+    help = "Post an opening balance for wallets whose stored balance differs from the sum of their postings."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        stats = ledger.open_balances(batch_size=options["batch_size"])
+        self.stdout.write(
+            f"Checked {stats['wallets']} wallets; {stats['adjusted']} opening postings (net {stats['net']})"
+        )
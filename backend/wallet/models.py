@@ -82,6 +82,8 @@ class WalletTransaction(models.Model):
             models.Index(fields=["wallet"]),
             models.Index(fields=["reference"]),
             models.Index(fields=["txn_type"]),
+            models.Index(fields=["wallet", "status", "created_at"]),  # balance_at / statements
+            models.Index(fields=["wallet", "-created_at", "-id"]),  # cursor-paged history
         ]
 
     def __str__(self):
@@ -96,6 +98,8 @@ class WalletTransaction(models.Model):
         if not reference:
             raise ValueError("reference is required for idempotent credit")
 
+        from .ledger import post
+
         # Use a DB transaction
         with transaction.atomic():
             existing = cls.objects.select_for_update().filter(reference=reference, status="success").first()
@@ -103,21 +107,134 @@ class WalletTransaction(models.Model):
                 return existing, False
 
             # If there is a pending/failed txn with same reference, still allow creating new success entry
-            txn = cls.objects.create(
-                wallet=wallet,
-                txn_type=txn_type,
-                amount=amount,
-                reference=reference,
-                description=description,
-                status="success",
-            )
-            # update balances atomically
-            wallet.balance = (wallet.balance or 0) + amount
-            wallet.ledger_balance = (wallet.ledger_balance or 0) + amount
-            wallet.save(update_fields=["balance", "ledger_balance"])
+            txn = post(wallet, amount, txn_type, reference=reference, description=description)
             return txn, True
 
 
+class WalletBalanceSnapshot(models.Model):
+    """
+    Wallet balance as of `taken_at`, derived from successful WalletTransaction postings.
+    wallet.ledger.balance_at() starts from the latest snapshot and only sums postings after it.
+    """
+    wallet = models.ForeignKey(Wallet, on_delete=models.CASCADE, related_name="balance_snapshots")
+    taken_at = models.DateTimeField()
+    balance = models.DecimalField(max_digits=18, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-taken_at"]
+        unique_together = [("wallet", "taken_at")]
+        indexes = [
+            models.Index(fields=["wallet", "-taken_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.wallet.uid} @ {self.taken_at}: {self.balance}"
+
+
+class StandingOrder(models.Model):
+    """
+    Standing instruction to auto-pay a tenant apartment's bills from a wallet.
+    Processed daily by wallet.tasks.process_standing_orders (sharded by wallet).
+    """
+    uid = models.CharField(max_length=32, unique=True, default=lambda: generate_uid("SO"))
+    wallet = models.ForeignKey(Wallet, on_delete=models.CASCADE, related_name="standing_orders")
+    tenant_apartment = models.ForeignKey("tenants.TenantApartment", on_delete=models.CASCADE, related_name="standing_orders")
+    pay_all_bills = models.BooleanField(default=True)
+    bill_types = models.JSONField(default=list, blank=True)  # bills.Invoice.type values when not pay_all_bills
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["wallet", "is_active"]),
+        ]
+
+    def __str__(self):
+        return f"StandingOrder {self.uid} ({self.wallet.uid})"
+
+
+class StandingOrderRun(models.Model):
+    """One daily standing-order run, split into shards (see StandingOrderShard)."""
+    STATUS_CHOICES = [
+        ("running", "Running"),
+        ("completed", "Completed"),
+    ]
+
+    uid = models.CharField(max_length=32, unique=True, default=lambda: generate_uid("SOR"))
+    run_date = models.DateField(unique=True)
+    shard_count = models.PositiveIntegerField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="running")
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-run_date"]
+
+    def __str__(self):
+        return f"StandingOrderRun {self.run_date} ({self.status})"
+
+
+class StandingOrderShard(models.Model):
+    """
+    Checkpoint for one shard of a run (wallets with wallet_id % shard_count == shard).
+    last_wallet_id advances in the same transaction as each wallet's debits, so a
+    crashed shard resumes after the last committed wallet.
+    """
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("running", "Running"),
+        ("completed", "Completed"),
+    ]
+
+    run = models.ForeignKey(StandingOrderRun, on_delete=models.CASCADE, related_name="shards")
+    shard = models.PositiveIntegerField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
+    last_wallet_id = models.BigIntegerField(default=0)
+    wallets_processed = models.PositiveIntegerField(default=0)
+    charges_succeeded = models.PositiveIntegerField(default=0)
+    charges_failed = models.PositiveIntegerField(default=0)
+    amount_debited = models.DecimalField(max_digits=18, decimal_places=2, default=Decimal("0.00"))
+    errors = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = [("run", "shard")]
+
+    def __str__(self):
+        return f"{self.run.run_date} shard {self.shard} ({self.status})"
+
+
+class StandingOrderCharge(models.Model):
+    """
+    Outcome of one standing-order attempt on one invoice.
+    At most one successful charge per invoice ever, and one attempt per invoice per run.
+    """
+    STATUS_CHOICES = [
+        ("success", "Success"),
+        ("failed", "Failed"),
+    ]
+
+    run = models.ForeignKey(StandingOrderRun, on_delete=models.CASCADE, related_name="charges")
+    order = models.ForeignKey(StandingOrder, on_delete=models.CASCADE, related_name="charges")
+    wallet = models.ForeignKey(Wallet, on_delete=models.CASCADE, related_name="standing_order_charges")
+    invoice = models.ForeignKey("bills.Invoice", on_delete=models.CASCADE, related_name="standing_order_charges")
+    wallet_transaction = models.ForeignKey(WalletTransaction, on_delete=models.SET_NULL, null=True, blank=True)
+    amount = models.DecimalField(max_digits=18, decimal_places=2)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["invoice"], condition=models.Q(status="success"), name="uniq_standing_order_paid_invoice"),
+            models.UniqueConstraint(fields=["run", "invoice"], name="uniq_standing_order_run_invoice"),
+        ]
+
+    def __str__(self):
+        return f"{self.invoice_id} {self.amount} ({self.status})"
+
+
 class WalletSecurity(models.Model):
     """
     Wallet security features (PIN, 2FA).
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from config.serializers import SparseFieldsetMixin
 from .models import Wallet, WalletTransaction, WalletSecurity, StandingOrder, PaystackCustomer, DedicatedVirtualAccount, Transaction, FixedSaving, Bill
 
 class WalletSerializer(serializers.ModelSerializer):
@@ -7,7 +8,7 @@ class WalletSerializer(serializers.ModelSerializer):
         fields = ["id", "uid", "user", "wallet_type", "account_number", "paystack_account_id", "balance", "ledger_balance", "is_active", "created_at"]
         read_only_fields = ["uid", "account_number", "paystack_account_id", "balance", "ledger_balance", "created_at"]
 
-class WalletTransactionSerializer(serializers.ModelSerializer):
+class WalletTransactionSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = WalletTransaction
         fields = ["id", "uid", "wallet", "txn_type", "amount", "reference", "description", "created_at", "status"]
@@ -1,41 +1,209 @@
 # backend/wallet/services/paystack.py
 """
-Small Paystack client for required operations:
+Paystack API client (the only place that talks to api.paystack.co):
 - create_customer
 - create_dedicated_account (DVA)
-- verify_transaction (optional)
-This is lightweight and designed for synchronous calls with basic error handling.
+- initialize_transaction
+- verify_transaction
+- list_transactions (paged, for reconciliation)
+
+PaystackClient keeps one pooled requests.Session per process (keep-alive, so
+TCP+TLS setup is paid once per connection, not per call) with split
+connect/read timeouts and bounded retries with exponential backoff:
+  - GETs are retried on connection errors and 429/5xx responses
+  - POSTs are retried only when the connection failed before the request was
+    sent, so a charge/customer is never created twice
+
+AsyncPaystackClient is the same API over httpx for ASGI/async code paths.
+Set PAYSTACK_BASE_URL to a wallet.services.paystack_stub server to benchmark
+latency and failure handling offline.
 """
 
-import hmac
+import asyncio
 import hashlib
-import json
-from typing import Optional, Dict, Any
+import hmac
+import threading
+from typing import Any, Dict, Optional
+
 import requests
 from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-PAYSTACK_SECRET_KEY = getattr(settings, "PAYSTACK_SECRET_KEY", None)
-PAYSTACK_BASE = "https://api.paystack.co"
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+BACKOFF_FACTOR = 0.3
 
 
 class PaystackError(Exception):
     pass
 
 
-def _headers():
-    if not PAYSTACK_SECRET_KEY:
-        raise PaystackError("PAYSTACK_SECRET_KEY not set in settings")
-    return {
-        "Authorization": f"Bearer {PAYSTACK_SECRET_KEY}",
-        "Content-Type": "application/json",
-    }
+def _setting(name, default):
+    return getattr(settings, name, default)
 
 
-def create_customer(email: str, first_name: Optional[str] = None, last_name: Optional[str] = None, phone: Optional[str] = None) -> Dict[str, Any]:
+class PaystackClient:
+    def __init__(self, secret_key=None, base_url=None, timeout=None, max_retries=None, pool_size=None):
+        self.secret_key = secret_key if secret_key is not None else _setting("PAYSTACK_SECRET_KEY", None)
+        self.base_url = (base_url or _setting("PAYSTACK_BASE_URL", "https://api.paystack.co")).rstrip("/")
+        self.timeout = timeout or (
+            _setting("PAYSTACK_CONNECT_TIMEOUT", 3.05),
+            _setting("PAYSTACK_READ_TIMEOUT", 15),
+        )
+        self.max_retries = max_retries if max_retries is not None else _setting("PAYSTACK_MAX_RETRIES", 3)
+        pool_size = pool_size or _setting("PAYSTACK_POOL_SIZE", 20)
+
+        retry = Retry(
+            total=self.max_retries,
+            connect=self.max_retries,
+            read=self.max_retries,
+            status=self.max_retries,
+            backoff_factor=BACKOFF_FACTOR,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset({"GET"}),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _headers(self):
+        if not self.secret_key:
+            raise PaystackError("PAYSTACK_SECRET_KEY not set in settings")
+        return {
+            "Authorization": f"Bearer {self.secret_key}",
+            "Content-Type": "application/json",
+        }
+
+    def request_body(self, method: str, path: str, payload: Optional[Dict] = None, op: str = "request",
+                     params: Optional[Dict] = None) -> Dict[str, Any]:
+        """Call the API and return the whole body; raises PaystackError on transport or API failure."""
+        try:
+            resp = self.session.request(
+                method, f"{self.base_url}{path}", headers=self._headers(), json=payload, params=params,
+                timeout=self.timeout,
+            )
+        except requests.RequestException as e:
+            raise PaystackError(f"{op} failed: {e}") from e
+        return _parse(resp.status_code, resp.text, resp.json, op)
+
+    def request(self, method: str, path: str, payload: Optional[Dict] = None, op: str = "request") -> Dict[str, Any]:
+        """Call the API and return body["data"]."""
+        return self.request_body(method, path, payload, op)["data"]
+
+    def create_customer(self, email: str, first_name: Optional[str] = None, last_name: Optional[str] = None,
+                        phone: Optional[str] = None) -> Dict[str, Any]:
+        return self.request("POST", "/customer", _customer_payload(email, first_name, last_name, phone), "create_customer")
+
+    def create_dedicated_account(self, customer: str, preferred_bank: Optional[str] = None,
+                                 metadata: Optional[Dict] = None) -> Dict[str, Any]:
+        return self.request("POST", "/dedicated_account", _dva_payload(customer, preferred_bank, metadata),
+                            "create_dedicated_account")
+
+    def initialize_transaction(self, email: str, amount_kobo: int, reference: str, callback_url: Optional[str] = None,
+                               metadata: Optional[Dict] = None) -> Dict[str, Any]:
+        return self.request("POST", "/transaction/initialize",
+                            _init_payload(email, amount_kobo, reference, callback_url, metadata), "initialize_transaction")
+
+    def verify_transaction(self, reference: str) -> Dict[str, Any]:
+        return self.request("GET", f"/transaction/verify/{reference}", op="verify_transaction")
+
+    def list_transactions(self, page: int = 1, per_page: int = 100, date_from=None, date_to=None,
+                          status: Optional[str] = None):
+        """One page of transactions; returns (rows, meta) where meta has page/pageCount/total."""
+        params = {"page": page, "perPage": per_page}
+        if date_from:
+            params["from"] = date_from.isoformat()
+        if date_to:
+            params["to"] = date_to.isoformat()
+        if status:
+            params["status"] = status
+        body = self.request_body("GET", "/transaction", op="list_transactions", params=params)
+        return body.get("data") or [], body.get("meta") or {}
+
+    def close(self):
+        self.session.close()
+
+
+class AsyncPaystackClient:
     """
-    Create a Paystack customer. Returns the API response data (raises PaystackError on failure).
+    asyncio variant over a pooled httpx.AsyncClient. Create one per event loop
+    (e.g. at ASGI startup) and reuse it; call `await client.aclose()` on shutdown.
     """
-    url = f"{PAYSTACK_BASE}/customer"
+
+    def __init__(self, secret_key=None, base_url=None, timeout=None, max_retries=None, pool_size=None):
+        import httpx
+
+        self._httpx = httpx
+        self.secret_key = secret_key if secret_key is not None else _setting("PAYSTACK_SECRET_KEY", None)
+        self.base_url = (base_url or _setting("PAYSTACK_BASE_URL", "https://api.paystack.co")).rstrip("/")
+        connect, read = timeout or (_setting("PAYSTACK_CONNECT_TIMEOUT", 3.05), _setting("PAYSTACK_READ_TIMEOUT", 15))
+        self.max_retries = max_retries if max_retries is not None else _setting("PAYSTACK_MAX_RETRIES", 3)
+        pool_size = pool_size or _setting("PAYSTACK_POOL_SIZE", 20)
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=httpx.Timeout(read, connect=connect),
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        )
+
+    async def request(self, method: str, path: str, payload: Optional[Dict] = None, op: str = "request") -> Dict[str, Any]:
+        if not self.secret_key:
+            raise PaystackError("PAYSTACK_SECRET_KEY not set in settings")
+        headers = {"Authorization": f"Bearer {self.secret_key}", "Content-Type": "application/json"}
+        httpx = self._httpx
+        attempt = 0
+        while True:
+            try:
+                resp = await self.client.request(method, path, headers=headers, json=payload)
+                retryable = method == "GET" and resp.status_code in RETRY_STATUSES
+            except httpx.ConnectError as e:
+                # Nothing was sent: safe to retry any method
+                resp, retryable, error = None, True, e
+            except httpx.HTTPError as e:
+                resp, retryable, error = None, method == "GET", e
+            if not retryable or attempt >= self.max_retries:
+                break
+            attempt += 1
+            await asyncio.sleep(BACKOFF_FACTOR * (2 ** (attempt - 1)))
+        if resp is None:
+            raise PaystackError(f"{op} failed: {error}") from error
+        return _parse(resp.status_code, resp.text, resp.json, op)["data"]
+
+    async def create_customer(self, email, first_name=None, last_name=None, phone=None):
+        return await self.request("POST", "/customer", _customer_payload(email, first_name, last_name, phone),
+                                  "create_customer")
+
+    async def create_dedicated_account(self, customer, preferred_bank=None, metadata=None):
+        return await self.request("POST", "/dedicated_account", _dva_payload(customer, preferred_bank, metadata),
+                                  "create_dedicated_account")
+
+    async def initialize_transaction(self, email, amount_kobo, reference, callback_url=None, metadata=None):
+        return await self.request("POST", "/transaction/initialize",
+                                  _init_payload(email, amount_kobo, reference, callback_url, metadata),
+                                  "initialize_transaction")
+
+    async def verify_transaction(self, reference):
+        return await self.request("GET", f"/transaction/verify/{reference}", op="verify_transaction")
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+def _parse(status_code, text, json_fn, op):
+    if status_code not in (200, 201):
+        raise PaystackError(f"{op} failed: {status_code} {text}")
+    try:
+        body = json_fn()
+    except ValueError:
+        raise PaystackError(f"{op} failed: invalid JSON {text[:200]}")
+    if not body.get("status"):
+        raise PaystackError(f"{op} error: {body.get('message') or body}")
+    return body
+
+
+def _customer_payload(email, first_name, last_name, phone):
     payload = {"email": email}
     if first_name:
         payload["first_name"] = first_name
@@ -43,14 +211,46 @@ def create_customer(email: str, first_name: Optional[str] = None, last_name: Opt
         payload["last_name"] = last_name
     if phone:
         payload["phone"] = phone
+    return payload
+
+
+def _dva_payload(customer, preferred_bank, metadata):
+    payload = {"customer": customer}
+    if preferred_bank:
+        payload["preferred_bank"] = preferred_bank
+    if metadata:
+        payload["metadata"] = metadata
+    return payload
 
-    resp = requests.post(url, headers=_headers(), json=payload, timeout=20)
-    if resp.status_code not in (200, 201):
-        raise PaystackError(f"create_customer failed: {resp.status_code} {resp.text}")
-    body = resp.json()
-    if not body.get("status"):
-        raise PaystackError(f"create_customer error: {body}")
-    return body["data"]
+
+def _init_payload(email, amount_kobo, reference, callback_url, metadata):
+    payload = {"email": email, "amount": int(amount_kobo), "reference": reference}
+    if callback_url:
+        payload["callback_url"] = callback_url
+    if metadata:
+        payload["metadata"] = metadata
+    return payload
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> PaystackClient:
+    """Process-wide client, so every caller shares one connection pool."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = PaystackClient()
+    return _client
+
+
+def create_customer(email: str, first_name: Optional[str] = None, last_name: Optional[str] = None, phone: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Create a Paystack customer. Returns the API response data (raises PaystackError on failure).
+    """
+    return get_client().create_customer(email, first_name, last_name, phone)
 
 
 def create_dedicated_account(customer: str, preferred_bank: Optional[str] = None, metadata: Optional[Dict] = None) -> Dict[str, Any]:
@@ -59,34 +259,22 @@ def create_dedicated_account(customer: str, preferred_bank: Optional[str] = None
     customer: Paystack customer code or id (e.g., "CUS_xxx")
     preferred_bank: optional slug like "test-bank" or "titan-paystack"
     """
-    url = f"{PAYSTACK_BASE}/dedicated_account"
-    payload = {"customer": customer}
-    if preferred_bank:
-        payload["preferred_bank"] = preferred_bank
-    if metadata:
-        payload["metadata"] = metadata
+    return get_client().create_dedicated_account(customer, preferred_bank, metadata)
 
-    resp = requests.post(url, headers=_headers(), json=payload, timeout=20)
-    if resp.status_code not in (200, 201):
-        raise PaystackError(f"create_dedicated_account failed: {resp.status_code} {resp.text}")
-    body = resp.json()
-    if not body.get("status"):
-        raise PaystackError(f"create_dedicated_account error: {body}")
-    return body["data"]
+
+def initialize_transaction(email: str, amount_kobo: int, reference: str, callback_url: Optional[str] = None,
+                           metadata: Optional[Dict] = None) -> Dict[str, Any]:
+    """
+    Start a checkout. Returns authorization_url, access_code and reference.
+    """
+    return get_client().initialize_transaction(email, amount_kobo, reference, callback_url, metadata)
 
 
 def verify_transaction(reference: str) -> Dict[str, Any]:
     """
     Verify a transaction by reference.
     """
-    url = f"{PAYSTACK_BASE}/transaction/verify/{reference}"
-    resp = requests.get(url, headers=_headers(), timeout=20)
-    if resp.status_code != 200:
-        raise PaystackError(f"verify_transaction failed: {resp.status_code} {resp.text}")
-    body = resp.json()
-    if not body.get("status"):
-        raise PaystackError(f"verify_transaction error: {body}")
-    return body["data"]
+    return get_client().verify_transaction(reference)
 
 
 def verify_webhook_signature(payload_body: bytes, header_signature: str) -> bool:
@@ -94,8 +282,9 @@ def verify_webhook_signature(payload_body: bytes, header_signature: str) -> bool
     Paystack uses HMAC-SHA512 with your secret key.
     Header name x-paystack-signature (lowercase) is used in docs.
     """
-    if not PAYSTACK_SECRET_KEY:
+    secret_key = _setting("PAYSTACK_SECRET_KEY", None)
+    if not secret_key or not header_signature:
         return False
-    computed = hmac.new(PAYSTACK_SECRET_KEY.encode(), payload_body, hashlib.sha512).hexdigest()
+    computed = hmac.new(secret_key.encode(), payload_body, hashlib.sha512).hexdigest()
     # header may be provided without hex normalization; compare safely
     return hmac.compare_digest(computed, header_signature)
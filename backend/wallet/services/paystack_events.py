@@ -0,0 +1,101 @@
+# backend/wallet/services/paystack_events.py
+"""
+Paystack webhook event handling (run by the payments webhook worker, not the request):
+- logs & confirms external boosts
+- credits wallets funded through a dedicated virtual account (DVA)
+- credits transfers into a DVA
+Every wallet credit goes through credit_wallet_idempotent, so a replayed event is harmless.
+"""
+import logging
+from decimal import Decimal
+
+from ..models import DedicatedVirtualAccount, WalletTransaction
+
+logger = logging.getLogger(__name__)
+
+
+def _amount(payload):
+    amount_kobo = payload.get("amount", 0)
+    return Decimal(amount_kobo) / 100 if amount_kobo else Decimal("0")
+
+
+def _dva_wallet(account_number):
+    if not account_number:
+        return None
+    dva = (
+        DedicatedVirtualAccount.objects.select_related("wallet")
+        .filter(account_number=str(account_number))
+        .first()
+    )
+    return dva.wallet if dva else None
+
+
+def _handle_boost(event, payload, data, amount):
+    from properties.models import BoostPaymentLog
+    from properties.services import boosts
+
+    reference = payload.get("reference")
+    metadata = payload.get("metadata", {}) or {}
+    succeeded = event == "charge.success"
+    if reference:
+        BoostPaymentLog.objects.update_or_create(
+            reference=reference,
+            defaults={
+                "amount": amount,
+                "property_id": metadata.get("property_id"),
+                "agent_id": metadata.get("agent_id"),
+                "status": "success" if succeeded else "failed",
+                "raw": data,
+            },
+        )
+    if not succeeded:
+        return {"boost": "failed"}
+    purchase = boosts.confirm_external(reference, purchase_uid=metadata.get("purchase_uid"))
+    return {"boost": purchase.uid if purchase else None}
+
+
+def _credit(wallet, amount, reference, description):
+    txn, created = WalletTransaction.credit_wallet_idempotent(
+        wallet=wallet,
+        amount=amount,
+        reference=reference,
+        description=description,
+        txn_type="fund",
+    )
+    return created or txn is not None
+
+
+def handle(event, data):
+    """Apply one Paystack event (`data` is the full webhook body). Raises on failure so it is retried."""
+    payload = data.get("data", {}) or {}
+    amount = _amount(payload)
+    metadata = payload.get("metadata", {}) or {}
+
+    # === Case 1: External Boost Payments ===
+    if metadata.get("reference_type") == "boost" and event in ("charge.success", "charge.failed", "charge.failure"):
+        return _handle_boost(event, payload, data, amount)
+
+    # === Case 2: Wallet Funding via DVA ===
+    if event.startswith("charge."):
+        if event != "charge.success":
+            return {"ignored_event": event}
+        auth = payload.get("authorization") or {}
+        wallet = _dva_wallet(auth.get("receiver_bank_account_number") or auth.get("receiver_account"))
+        if wallet is None:
+            return {"credited": False}
+        reference = payload.get("reference") or str(payload.get("id"))
+        return {"credited": _credit(wallet, amount, reference, f"Paystack DVA credit - {event}")}
+
+    # === Case 3: Transfers (optional support) ===
+    if event.startswith("transfer."):
+        if event != "transfer.success":
+            return {"ignored_event": event}
+        receiver = payload.get("recipient") or payload.get("receiver") or {}
+        account_number = receiver.get("account_number") if isinstance(receiver, dict) else receiver
+        wallet = _dva_wallet(account_number)
+        if wallet is None:
+            return {"credited": False}
+        reference = payload.get("reference") or f"paystack_transfer:{payload.get('id')}"
+        return {"credited": _credit(wallet, amount, reference, f"Paystack transfer credit - {event}")}
+
+    return {"ignored_event": event}
@@ -0,0 +1,167 @@
+# backend/wallet/services/paystack_stub.py
+"""
+Local Paystack stand-in for offline benchmarks and failure drills.
+
+Serves the endpoints PaystackClient uses with canned success bodies, after an
+optional delay, and fails a configurable share of requests with a 5xx (or
+drops the connection). Point PAYSTACK_BASE_URL (or PaystackClient(base_url=...))
+at it:
+
+    with running_stub(latency=0.05, failure_rate=0.2) as stub:
+        client = PaystackClient(secret_key="sk_test", base_url=stub.base_url)
+        ...
+        stub.stats  # {"requests": ..., "failed": ..., "by_path": {...}}
+
+or from a shell: python -m wallet.services.paystack_stub --port 8765 --latency 0.05
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def _ok(data):
+    return {"status": True, "message": "ok", "data": data}
+
+
+def _response_for(method, path, body):
+    if method == "POST" and path == "/customer":
+        return _ok({"customer_code": f"CUS_{uuid.uuid4().hex[:12]}", "email": body.get("email")})
+    if method == "POST" and path == "/dedicated_account":
+        return _ok({"id": random.randint(1, 10 ** 6), "account_number": str(random.randint(10 ** 9, 10 ** 10 - 1)),
+                    "bank": {"slug": body.get("preferred_bank") or "test-bank"}})
+    if method == "POST" and path == "/transaction/initialize":
+        reference = body.get("reference") or uuid.uuid4().hex
+        return _ok({"authorization_url": f"https://checkout.example/{reference}", "access_code": uuid.uuid4().hex[:12],
+                    "reference": reference})
+    if method == "GET" and path.split("?")[0] == "/transaction":
+        query = parse_qs(urlparse(path).query)
+        page, per_page = int(query.get("page", ["1"])[0]), int(query.get("perPage", ["50"])[0])
+        total = 1000
+        rows = [
+            {"id": n, "reference": f"STUB-{n:06d}", "amount": 100000, "status": "success", "currency": "NGN"}
+            for n in range((page - 1) * per_page + 1, min(page * per_page, total) + 1)
+        ]
+        return dict(_ok(rows), meta={"total": total, "perPage": per_page, "page": page,
+                                     "pageCount": -(-total // per_page)})
+    if method == "GET" and path.startswith("/transaction/verify/"):
+        return _ok({"reference": path.rsplit("/", 1)[-1], "status": "success", "amount": 100000})
+    return None
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.0, jitter=0.0, failure_rate=0.0, drop_rate=0.0):
+        super().__init__(address, StubHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.drop_rate = drop_rate
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "failed": 0, "dropped": 0, "by_path": {}}
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, path, outcome=None):
+        with self.lock:
+            self.stats["requests"] += 1
+            self.stats["by_path"][path] = self.stats["by_path"].get(path, 0) + 1
+            if outcome:
+                self.stats[outcome] += 1
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+
+    def log_message(self, format, *args):
+        pass
+
+    def _handle(self, method):
+        server = self.server
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        try:
+            body = json.loads(raw) if raw else {}
+        except ValueError:
+            body = {}
+
+        delay = server.latency + (random.uniform(0, server.jitter) if server.jitter else 0)
+        if delay:
+            time.sleep(delay)
+
+        roll = random.random()
+        if roll < server.drop_rate:
+            server.count(urlparse(self.path).path, "dropped")
+            self.close_connection = True
+            self.connection.close()
+            return
+        if roll < server.drop_rate + server.failure_rate:
+            server.count(urlparse(self.path).path, "failed")
+            self._send(503, {"status": False, "message": "stub failure"})
+            return
+
+        if not (self.headers.get("Authorization") or "").startswith("Bearer "):
+            server.count(urlparse(self.path).path)
+            self._send(401, {"status": False, "message": "Invalid key"})
+            return
+
+        data = _response_for(method, self.path, body)
+        server.count(urlparse(self.path).path)
+        if data is None:
+            self._send(404, {"status": False, "message": "not found"})
+        else:
+            self._send(200, data)
+
+    def _send(self, code, payload):
+        out = json.dumps(payload).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(out)))
+        self.end_headers()
+        self.wfile.write(out)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+
+@contextmanager
+def running_stub(host="127.0.0.1", port=0, **behaviour):
+    """Run a StubServer on a background thread for the duration of the block."""
+    server = StubServer((host, port), **behaviour)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local Paystack stub")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--drop-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    stub = StubServer((args.host, args.port), latency=args.latency, jitter=args.jitter,
+                      failure_rate=args.failure_rate, drop_rate=args.drop_rate)
+    print(f"Paystack stub on {stub.base_url}")
+    try:
+        stub.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,231 @@
+# backend/wallet/services/standing_orders.py
+"""
+Sharded standing-order processing.
+
+A run (one per day) is split into N shards by wallet_id % N; each shard is a
+Celery task. Within a shard, wallets are processed in id order and each wallet
+is one transaction:
+
+  1. lock the wallet row (select_for_update)
+  2. read its due, unpaid invoices across all active orders (one query),
+     excluding invoices that already have a successful standing-order charge
+  3. decide which invoices the balance covers (oldest due first) and post each
+     debit through wallet.ledger (conditional balance UPDATE + transaction row,
+     like every other balance change; failed attempts via ledger.record_failed)
+  4. bulk_create payment records and charge rows, queue the payment records'
+     audit rows as one batch (finance.audit, written on commit; the ledger's
+     wallet transactions are audited by the finance post_save signal), mark the
+     paid invoices, and advance the shard checkpoint
+
+Because the checkpoint moves inside the wallet's transaction and a successful
+charge is unique per invoice, a crashed shard resumes after its last committed
+wallet and can never debit the same invoice twice.
+"""
+import logging
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Q
+from django.db.models.functions import Mod
+from django.utils import timezone
+
+from bills.models import Invoice
+from finance import audit
+from finance.services import active_fee_configs, build_audit_for_payment_record
+from payments.models import PaymentRecord
+from .. import ledger
+from ..models import (
+    StandingOrder,
+    StandingOrderCharge,
+    StandingOrderRun,
+    StandingOrderShard,
+    Wallet,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SHARDS = 8
+WALLET_BATCH = 500
+
+
+def start_run(run_date=None, shard_count=DEFAULT_SHARDS):
+    """Get or create the run for `run_date` with its shard checkpoints."""
+    run_date = run_date or timezone.now().date()
+    run, _ = StandingOrderRun.objects.get_or_create(run_date=run_date, defaults={"shard_count": shard_count})
+    existing = set(run.shards.values_list("shard", flat=True))
+    StandingOrderShard.objects.bulk_create(
+        [StandingOrderShard(run=run, shard=i) for i in range(run.shard_count) if i not in existing],
+        ignore_conflicts=True,
+    )
+    return run
+
+
+def _due_invoices(wallet_id, run_date):
+    """Due, unpaid invoices for every active order on the wallet, oldest first."""
+    orders = list(StandingOrder.objects.filter(wallet_id=wallet_id, is_active=True))
+    if not orders:
+        return []
+
+    scope = Q()
+    order_for = {}
+    for order in orders:
+        clause = Q(tenant_apartment_id=order.tenant_apartment_id)
+        if not order.pay_all_bills and order.bill_types:
+            clause &= Q(type__in=order.bill_types)
+        scope |= clause
+        order_for.setdefault(order.tenant_apartment_id, order)
+
+    rows = (
+        Invoice.objects.filter(scope, due_date__lte=run_date, is_paid=False, total_amount__gt=0)
+        .exclude(Exists(StandingOrderCharge.objects.filter(invoice=OuterRef("pk"), status="success")))
+        .values(
+            "id", "uid", "total_amount", "tenant_apartment_id",
+            property_id=F("tenant_apartment__apartment__property_id"),
+            manager_id=F("tenant_apartment__apartment__property__manager_id"),
+        )
+        .order_by("due_date", "id")
+    )
+    return [dict(row, order=order_for[row["tenant_apartment_id"]]) for row in rows]
+
+
+def process_wallet(run, shard, wallet_id, fee_configs):
+    """Debit one wallet for all its due invoices in a single transaction. Returns shard deltas."""
+    from payments import rollups
+
+    now = timezone.now()
+    with transaction.atomic():
+        wallet = (
+            Wallet.objects.select_for_update()
+            .select_related("user")
+            .get(pk=wallet_id)
+        )
+        invoices = _due_invoices(wallet_id, run.run_date)
+        # A resumed run skips invoices already attempted (failed) in this run
+        attempted = set(
+            StandingOrderCharge.objects.filter(run=run, invoice_id__in=[inv["id"] for inv in invoices])
+            .values_list("invoice_id", flat=True)
+        )
+        invoices = [inv for inv in invoices if inv["id"] not in attempted]
+
+        balance = wallet.balance
+        paid, failed = [], []
+        for inv in invoices:
+            if balance >= inv["total_amount"]:
+                balance -= inv["total_amount"]
+                paid.append(inv)
+            else:
+                failed.append(inv)
+
+        total = sum((inv["total_amount"] for inv in paid), Decimal("0.00"))
+        # ledger.post applies the balance >= amount guard; InsufficientFunds cannot happen
+        # under the row lock, and would roll the whole wallet back rather than overdraw
+        txns = [
+            ledger.post(
+                wallet, inv["total_amount"], "auto_deduct",
+                reference=f"SO-{inv['uid']}", description=f"Auto-deduction for Invoice {inv['uid']}",
+            )
+            for inv in paid
+        ] + [
+            ledger.record_failed(
+                wallet, inv["total_amount"], "auto_deduct",
+                description=f"FAILED auto-deduction for Invoice {inv['uid']} (Insufficient funds)",
+            )
+            for inv in failed
+        ]
+
+        records = [
+            PaymentRecord(
+                invoice_id=inv["id"],
+                tenant_id=wallet.user_id,
+                amount=inv["total_amount"],
+                method="wallet_auto",
+                reference=txn.uid,
+                status="success",
+                confirmed_at=now,
+            )
+            for inv, txn in zip(paid, txns)
+        ]
+        PaymentRecord.objects.bulk_create(records)
+
+        StandingOrderCharge.objects.bulk_create([
+            StandingOrderCharge(
+                run=run, order=inv["order"], wallet=wallet, invoice_id=inv["id"],
+                wallet_transaction=txn, amount=inv["total_amount"],
+                status="success" if i < len(paid) else "failed",
+            )
+            for i, (inv, txn) in enumerate(zip(paid + failed, txns))
+        ])
+
+        # bulk_create skips the per-row finance signal for payment records
+        audit.enqueue([
+            build_audit_for_payment_record(record, fee_configs, invoice_uid=inv["uid"], tenant_uid=wallet.user.uid)
+            for inv, record in zip(paid, records)
+        ])
+
+        if paid:
+            Invoice.objects.filter(pk__in=[inv["id"] for inv in paid]).update(is_paid=True)
+            per_property = {}
+            for inv in paid:
+                key = (inv["property_id"], inv["manager_id"])
+                amount, count = per_property.get(key, (Decimal("0.00"), 0))
+                per_property[key] = (amount + inv["total_amount"], count + 1)
+            for (property_id, manager_id), (amount, count) in per_property.items():
+                rollups.bump(timezone.localdate(now), "bills", property_id, manager_id, method="wallet_auto",
+                             collected=amount, payments_count=count)
+
+        # Checkpoint in the same transaction as the debits
+        StandingOrderShard.objects.filter(pk=shard.pk).update(
+            last_wallet_id=wallet_id,
+            wallets_processed=F("wallets_processed") + 1,
+            charges_succeeded=F("charges_succeeded") + len(paid),
+            charges_failed=F("charges_failed") + len(failed),
+            amount_debited=F("amount_debited") + total,
+        )
+    return {"paid": len(paid), "failed": len(failed), "debited": total}
+
+
+def process_shard(run_id, shard_no):
+    """Process (or resume) one shard of a run. Returns the shard's totals."""
+    run = StandingOrderRun.objects.get(pk=run_id)
+    shard = StandingOrderShard.objects.get(run=run, shard=shard_no)
+    if shard.status == "completed":
+        return {"shard": shard_no, "status": "completed"}
+    StandingOrderShard.objects.filter(pk=shard.pk).update(status="running")
+
+    fee_configs = active_fee_configs()
+    wallet_ids = (
+        StandingOrder.objects.filter(is_active=True)
+        .annotate(bucket=Mod("wallet_id", run.shard_count))
+        .filter(bucket=shard_no)
+        .values_list("wallet_id", flat=True)
+        .distinct()
+        .order_by("wallet_id")
+    )
+    last_wallet_id = shard.last_wallet_id
+    while True:
+        batch = list(wallet_ids.filter(wallet_id__gt=last_wallet_id)[:WALLET_BATCH])
+        if not batch:
+            break
+        for wallet_id in batch:
+            try:
+                process_wallet(run, shard, wallet_id, fee_configs)
+            except Exception as e:
+                logger.error(f"Standing orders failed for wallet {wallet_id} (run {run.run_date}, shard {shard_no}): {e}")
+                StandingOrderShard.objects.filter(pk=shard.pk).update(
+                    last_wallet_id=wallet_id, errors=F("errors") + 1
+                )
+            last_wallet_id = wallet_id
+
+    StandingOrderShard.objects.filter(pk=shard.pk).update(status="completed")
+    if not run.shards.exclude(status="completed").exists():
+        StandingOrderRun.objects.filter(pk=run.pk, status="running").update(status="completed", finished_at=timezone.now())
+
+    shard.refresh_from_db()
+    return {
+        "shard": shard_no,
+        "wallets": shard.wallets_processed,
+        "succeeded": shard.charges_succeeded,
+        "failed": shard.charges_failed,
+        "debited": str(shard.amount_debited),
+        "errors": shard.errors,
+    }
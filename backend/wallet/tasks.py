@@ -1,60 +1,29 @@
-from celery import shared_task
-from django.utils.timezone import now
-from bills.models import Invoice, PaymentRecord  # ← Ensure PaymentRecord is imported
-from .models import StandingOrder, WalletTransaction
+from celery import group, shared_task
+from . import ledger
+from .services.standing_orders import DEFAULT_SHARDS, process_shard, start_run
+
 
 @shared_task
-def process_standing_orders():
+def process_standing_orders(shards=DEFAULT_SHARDS):
     """
     Runs daily → finds due invoices and auto-debits from linked wallets.
+    Fans out one task per wallet shard; re-running on the same day resumes
+    unfinished shards from their checkpoints.
     """
-    today = now().date()
-    orders = StandingOrder.objects.filter(is_active=True)
-
-    for order in orders:
-        wallet = order.wallet
-        invoices = Invoice.objects.filter(
-            tenant_apartment=order.tenant_apartment,
-            due_date__lte=today,
-            status="pending"
-        )
-
-        if not order.pay_all_bills and order.bill_types:
-            invoices = invoices.filter(category__in=order.bill_types)
+    run = start_run(shard_count=shards)
+    pending = list(run.shards.exclude(status="completed").values_list("shard", flat=True))
+    if pending:
+        group(process_standing_order_shard.s(run.pk, shard) for shard in pending).apply_async()
+    return {"run": run.uid, "shards": run.shard_count, "dispatched": pending}
 
-        for invoice in invoices:
-            if wallet.balance >= invoice.amount:
-                # Deduct from wallet
-                wallet.balance -= invoice.amount
-                wallet.save()
 
-                # Create wallet transaction
-                WalletTransaction.objects.create(
-                    wallet=wallet,
-                    txn_type="auto_deduct",
-                    amount=invoice.amount,
-                    description=f"Auto-deduction for Invoice {invoice.uid}",
-                    status="success"
-                )
+@shared_task(acks_late=True)
+def process_standing_order_shard(run_id, shard):
+    """Process one shard; acks_late so a worker crash redelivers it (safe: checkpointed)."""
+    return process_shard(run_id, shard)
 
-                # CREATE PaymentRecord for billing system tracking
-                PaymentRecord.objects.create(
-                    invoice=invoice,
-                    amount_paid=invoice.amount,
-                    paid_at=now(),
-                    method="wallet_auto"  # ← This requires the updated PaymentRecord
-                )
 
-                invoice.status = "paid"
-                invoice.save()
-
-            else:
-                # Insufficient funds → notification + leave pending
-                WalletTransaction.objects.create(
-                    wallet=wallet,
-                    txn_type="auto_deduct",
-                    amount=invoice.amount,
-                    description=f"FAILED auto-deduction for Invoice {invoice.uid} (Insufficient funds)",
-                    status="failed"
-                )
-                # TODO: trigger notification here
+@shared_task
+def snapshot_wallet_balances():
+    """Daily balance snapshots so balance_at()/statements only sum recent postings."""
+    return ledger.take_snapshots()
@@ -56,7 +56,8 @@ def process_auto_refunds():
 
             notify_admins(
                 subject="Auto Refund Issued",
-                message=f"Refund for transaction {txn.reference} (₦{refund.total_refund}) has been auto-processed."
+                message=f"Refund for transaction {txn.reference} (₦{refund.total_refund}) has been auto-processed.",
+                dedup_key=f"auto-refund:{txn.reference}",
             )
 
         except Exception as e:
@@ -68,5 +69,6 @@ def process_auto_refunds():
 
             notify_admins(
                 subject="Auto Refund Failed",
-                message=f"Refund for transaction {txn.reference} failed.\nError: {str(e)}"
+                message=f"Refund for transaction {txn.reference} failed.\nError: {str(e)}",
+                dedup_key=f"auto-refund-failed:{txn.reference}",
             )
@@ -0,0 +1,18 @@
+# backend/wallet/tests/test_ledger.py
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+
+from wallet.ledger import parse_amount
+
+
+class ParseAmountTests(SimpleTestCase):
+    def test_valid_amounts(self):
+        self.assertEqual(parse_amount("1500"), Decimal("1500.00"))
+        self.assertEqual(parse_amount(12), Decimal("12.00"))
+        self.assertEqual(parse_amount("0.5"), Decimal("0.50"))
+
+    def test_rejects_bad_input(self):
+        for value in (None, "", "abc", "0", "-5", "0.001", "NaN", "Infinity", "1e400"):
+            with self.subTest(value=value):
+                self.assertIsNone(parse_amount(value))
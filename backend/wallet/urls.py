@@ -3,7 +3,8 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import WalletViewSet, WalletTransactionViewSet, WalletSecurityViewSet
 from .views import StandingOrderViewSet
-from .views_paystack import CreatePaystackCustomerView, CreateDedicatedAccountView, PaystackWebhookView
+from .views_paystack import CreatePaystackCustomerView, CreateDedicatedAccountView
+from payments.webhooks import PaystackWebhookView
 from wallet.views.refund import RefundViewSet
 from .views_dispute import DisputeViewSet
 
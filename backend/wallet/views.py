@@ -1,11 +1,19 @@
+import uuid
+from datetime import timedelta
+
 from django.contrib.auth import authenticate
 from django.db import transaction
-from django.db.models import Sum, Count, Avg
+from django.db.models import Sum, Count, Avg, Q
 from django.db.models.functions import TruncMonth
-from rest_framework import viewsets, filters, permissions, status
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
+from config.pagination import CreatedAtCursorPagination
+
+from . import ledger
 from .models import Wallet, WalletTransaction, WalletSecurity, StandingOrder, Bill, FixedSaving
 from .serializers import WalletSerializer, WalletTransactionSerializer, WalletSecuritySerializer, StandingOrderSerializer, BillSerializer, FixedSavingSerializer
 
@@ -35,6 +43,16 @@ class WalletViewSet(viewsets.ModelViewSet):
         )
         return Response(qs)
 
+    @action(detail=True, methods=["get"])
+    def statement(self, request, pk=None):
+        """Opening/closing balance and entries with running balance; ?start=&end= (ISO datetimes)."""
+        wallet = self.get_object()
+        end = parse_datetime(request.query_params.get("end") or "") or timezone.now()
+        start = parse_datetime(request.query_params.get("start") or "") or (end - timedelta(days=30))
+        if start >= end:
+            return Response({"error": "start must be before end"}, status=400)
+        return Response(dict(ledger.statement(wallet, start, end), wallet=wallet.uid, start=start, end=end))
+
     @action(detail=False, methods=["post"])
     def validate(self, request):
         user = request.user
@@ -65,28 +83,20 @@ class WalletViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=["post"])
     def fund_confirm(self, request):
         reference = request.data.get("reference")
-        amount = request.data.get("amount")
         wallet_id = request.data.get("wallet_id")
 
-        if not all([reference, amount, wallet_id]):
+        if not all([reference, request.data.get("amount"), wallet_id]):
             return Response({"error": "Missing required parameters"}, status=400)
+        amount = ledger.parse_amount(request.data.get("amount"))
+        if amount is None:
+            return Response({"error": "Invalid amount"}, status=400)
 
         try:
             wallet = Wallet.objects.get(id=wallet_id, user=request.user)
         except Wallet.DoesNotExist:
             return Response({"error": "Wallet not found"}, status=404)
 
-        with transaction.atomic():
-            wallet.balance += float(amount)
-            wallet.save()
-
-            WalletTransaction.objects.create(
-                wallet=wallet,
-                amount=amount,
-                txn_type="credit",
-                reference=reference,
-                description="Wallet funding"
-            )
+        ledger.post(wallet, amount, "credit", reference=reference, description="Wallet funding")
 
         return Response({"success": True, "message": "Wallet funded successfully"})
 
@@ -94,40 +104,32 @@ class WalletViewSet(viewsets.ModelViewSet):
     def transfer(self, request):
         sender = request.user
         recipient_identifier = request.data.get("recipient")
-        amount = float(request.data.get("amount", 0))
+        amount = ledger.parse_amount(request.data.get("amount"))
 
-        if amount <= 0:
+        if amount is None:
             return Response({"error": "Invalid amount"}, status=400)
 
         try:
             sender_wallet = Wallet.objects.get(user=sender)
-            recipient_wallet = Wallet.objects.get(wallet_number=recipient_identifier)
+            recipient_wallet = Wallet.objects.get(
+                Q(uid=recipient_identifier) | Q(account_number=recipient_identifier)
+            )
         except Wallet.DoesNotExist:
             return Response({"error": "Wallet not found"}, status=404)
 
-        if sender_wallet.balance < amount:
-            return Response({"error": "Insufficient balance"}, status=400)
+        if sender_wallet.pk == recipient_wallet.pk:
+            return Response({"error": "Cannot transfer to the same wallet"}, status=400)
 
-        with transaction.atomic():
-            sender_wallet.balance -= amount
-            recipient_wallet.balance += amount
-            sender_wallet.save()
-            recipient_wallet.save()
-
-            WalletTransaction.objects.create(
-                wallet=sender_wallet,
-                amount=amount,
-                txn_type="debit",
-                reference=f"TRF-{recipient_wallet.wallet_number}",
-                description="Fund transfer"
-            )
-            WalletTransaction.objects.create(
-                wallet=recipient_wallet,
-                amount=amount,
-                txn_type="credit",
-                reference=f"TRF-{sender_wallet.wallet_number}",
-                description="Fund transfer"
+        try:
+            ledger.transfer(
+                sender_wallet,
+                recipient_wallet,
+                amount,
+                reference=f"TRF-{sender_wallet.uid}-{recipient_wallet.uid}-{uuid.uuid4().hex[:8].upper()}",
+                description="Fund transfer",
             )
+        except ledger.InsufficientFunds:
+            return Response({"error": "Insufficient balance"}, status=400)
 
         return Response({"success": True, "message": "Transfer completed successfully"})
 
@@ -154,7 +156,9 @@ class WalletViewSet(viewsets.ModelViewSet):
 
         if request.method == "POST":
             bill_id = request.data.get("bill_id")
-            amount = request.data.get("amount")
+            amount = ledger.parse_amount(request.data.get("amount"))
+            if amount is None:
+                return Response({"error": "Invalid amount"}, status=400)
             try:
                 bill = Bill.objects.get(id=bill_id, wallet__user=request.user)
             except Bill.DoesNotExist:
@@ -164,23 +168,14 @@ class WalletViewSet(viewsets.ModelViewSet):
                 return Response({"error": "Bill already paid"}, status=400)
 
             wallet = bill.wallet
-            if wallet.balance < float(amount):
+            try:
+                with transaction.atomic():
+                    ledger.post(wallet, amount, "debit", reference=f"BILL-{bill.id}", description="Bill payment")
+                    bill.status = "paid"
+                    bill.save()
+            except ledger.InsufficientFunds:
                 return Response({"error": "Insufficient balance"}, status=400)
 
-            with transaction.atomic():
-                wallet.balance -= float(amount)
-                wallet.save()
-                bill.status = "paid"
-                bill.save()
-
-                WalletTransaction.objects.create(
-                    wallet=wallet,
-                    amount=amount,
-                    txn_type="debit",
-                    reference=f"BILL-{bill.id}",
-                    description="Bill payment"
-                )
-
             return Response({"success": True, "message": "Bill paid"})
 
     # ADDED FROM CODE 2: Savings shortcut
@@ -192,17 +187,19 @@ class WalletViewSet(viewsets.ModelViewSet):
 
         if request.method == "POST":
             action_type = request.data.get("action")
-            amount = float(request.data.get("amount", 0))
             wallet = Wallet.objects.get(user=request.user)
 
             if action_type == "lock":
-                if wallet.balance < amount:
+                amount = ledger.parse_amount(request.data.get("amount"))
+                if amount is None:
+                    return Response({"error": "Invalid amount"}, status=400)
+                try:
+                    with transaction.atomic():
+                        saving = FixedSaving.objects.create(wallet=wallet, amount=amount)
+                        ledger.post(wallet, amount, "debit", reference=f"SAVE-{saving.id}",
+                                    description="Fixed saving lock")
+                except ledger.InsufficientFunds:
                     return Response({"error": "Insufficient balance"}, status=400)
-
-                with transaction.atomic():
-                    wallet.balance -= amount
-                    wallet.save()
-                    saving = FixedSaving.objects.create(wallet=wallet, amount=amount)
                 return Response(FixedSavingSerializer(saving).data, status=201)
 
             elif action_type == "unlock":
@@ -213,8 +210,8 @@ class WalletViewSet(viewsets.ModelViewSet):
                     return Response({"error": "Saving not found"}, status=404)
 
                 with transaction.atomic():
-                    wallet.balance += saving.amount
-                    wallet.save()
+                    ledger.post(wallet, saving.amount, "credit", reference=f"UNSAVE-{saving.id}",
+                                description="Fixed saving unlock")
                     saving.delete()
                 return Response({"success": True, "message": "Funds unlocked"})
 
@@ -226,9 +223,7 @@ class WalletTransactionViewSet(viewsets.ModelViewSet):
     queryset = WalletTransaction.objects.all()
     serializer_class = WalletTransactionSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [filters.OrderingFilter]
-    ordering_fields = ["created_at", "amount"]
-    ordering = ["-created_at"]
+    pagination_class = CreatedAtCursorPagination
 
     def get_queryset(self):
         return WalletTransaction.objects.filter(wallet__user=self.request.user)
@@ -26,7 +26,7 @@ class IsAdminOrOwner(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         if request.user.is_staff or getattr(request.user, "role", None) == "platform_owner":
             return True
-        return obj.raised_by == request.user
+        return obj.raised_by_id == request.user.pk
 
 class IsAdminUserOrReadOnly(permissions.BasePermission):
     def has_permission(self, request, view):